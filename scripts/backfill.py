@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Historical usage backfill
+Splits the range into (date chunk x SIM window) units and loads them in
+parallel, by default through the COPY path (--mode copy), under a
+requests-per-second budget.
+Finished units are checkpointed, so an interrupted backfill can be resumed.
+
+Usage:
+    python scripts/backfill.py --days 180 --workers 8 --rps 40
+    python scripts/backfill.py --start 2025-05-01 --end 2025-10-31 --resume
+    python scripts/backfill.py --days 30 --mode upsert
+    python scripts/backfill.py --days 180 --queue
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.api.rate_limiter import get_rate_limiter
+from src.config import config
+from src.services.data_collector import DataCollector
+from src.utils.logger import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill SIM usage history in parallel")
+    parser.add_argument('--start', help="First day to load (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last day to load (YYYY-MM-DD), defaults to today")
+    parser.add_argument(
+        '--days', type=int, default=config.USAGE_RETENTION_DAYS,
+        help="Days back from --end when --start is not given (default: USAGE_RETENTION_DAYS)"
+    )
+    parser.add_argument(
+        '--chunk-days', type=int, default=config.BACKFILL_CHUNK_DAYS,
+        help="Days per API request (default: BACKFILL_CHUNK_DAYS)"
+    )
+    parser.add_argument('--workers', type=int, help="Parallel units (default: USAGE_COLLECTION_WORKERS)")
+    parser.add_argument(
+        '--rps', type=float,
+        help="Maximum 1NCE API requests per second for this run (local runs only)"
+    )
+    parser.add_argument(
+        '--mode', choices=['copy', 'upsert'], default='copy',
+        help="Ingestion path: COPY through a staging table, or row upserts (default: copy)"
+    )
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted backfill of the same range")
+    parser.add_argument('--queue', action='store_true', help="Queue the units for the consumers instead of running them here")
+    args = parser.parse_args()
+    if args.queue and args.rps:
+        # The consumers share their own API_RATE_LIMIT_* budget
+        parser.error("--rps only applies to local runs, not to --queue")
+    if args.queue and args.mode != 'copy':
+        # Queued units always load through the COPY path
+        parser.error("--mode upsert only applies to local runs, not to --queue")
+
+    end_date = args.end or datetime.now().strftime('%Y-%m-%d')
+    start_date = args.start or (
+        datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=args.days)
+    ).strftime('%Y-%m-%d')
+
+    setup_logging()
+
+    if args.queue:
+        # Imported here so local runs don't need the queue backend
+        from src.services.dispatcher import Dispatcher
+
+        result = Dispatcher().dispatch_backfill(start_date, end_date, args.chunk_days)
+        print(
+            f"Queued {result['queued']} of {result['tasks']} units for {result['sims']} SIMs "
+            f"({result['in_flight']} already in flight)"
+        )
+        return
+
+    if args.rps:
+        get_rate_limiter().cap(args.rps)
+
+    print(
+        f"Backfilling usage from {start_date} to {end_date} in {args.chunk_days}-day chunks "
+        f"({args.mode} mode" + (f", {args.rps:g} req/s" if args.rps else "") + ")..."
+    )
+
+    try:
+        result = DataCollector().backfill_usage(
+            start_date, end_date, mode=args.mode, workers=args.workers,
+            chunk_days=args.chunk_days, resume=args.resume
+        )
+    except Exception as e:
+        print(f"Error backfilling usage: {e}")
+        sys.exit(1)
+
+    print(
+        f"Processed {result['batches_done']} of {result['batches']} units: "
+        f"{result['rows_inserted']} rows inserted, {result['rows_updated']} updated, {result['errors']} errors"
+    )
+    if result['rows_per_second']:
+        print(f"Throughput: {result['rows_per_second']:.0f} rows/s")
+    if result['errors'] or result['batches_done'] < result['batches']:
+        print("Some units did not complete; rerun with --resume to retry them")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Dashboard query benchmark
+Times every query the Streamlit pages and AlertService issue against the
+current database (fill it with scripts/generate_fleet.py first) and
+compares the medians with a JSON baseline, so query regressions show up
+in review as a changed baseline file.
+
+Usage:
+    python scripts/benchmark_queries.py                     # compare with the baseline
+    python scripts/benchmark_queries.py --update-baseline   # record a new baseline
+    python scripts/benchmark_queries.py --only overview --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import queries
+from src.database.connection import get_db
+from src.database.models import Alert, ConnectivityLog, SIMCard, UsageRecord
+from src.services.alert_service import AlertService
+from src.utils.profiling import percentile
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baselines' / 'dashboard_queries.json'
+
+# A query is a regression when its median exceeds the baseline by this
+# factor and by at least MIN_REGRESSION_MS (sub-millisecond noise is ignored)
+DEFAULT_TOLERANCE = 0.5
+MIN_REGRESSION_MS = 5.0
+
+
+# ===== Queries: the shared functions src/app.py, src/pages/ and AlertService call =====
+
+def _scalar(value) -> int:
+    """Row count of a query that returns a single value"""
+    return 1
+
+
+def _quota_alert_scan(db, ctx) -> int:
+    """The reads of AlertService.check_quota_alerts, without creating alerts"""
+    checked = 0
+    for quota_type, alert_type in (('data', 'quota_warning'), ('sms', 'sms_quota_warning')):
+        for sim in queries.low_quota_sims(db, quota_type):
+            queries.open_alert(db, sim.id, alert_type)
+            checked += 1
+    return checked
+
+
+QUERIES: Dict[str, Callable[[Any, Dict[str, Any]], int]] = {
+    # src/app.py
+    'app.total_sims': lambda db, ctx: _scalar(queries.count_sims(db)),
+    'app.active_sims': lambda db, ctx: _scalar(queries.count_sims(db, 'Enabled')),
+    'app.usage_today': lambda db, ctx: _scalar(queries.total_data_usage(db, ctx['today'])),
+    'app.quota_alert_sims': lambda db, ctx: _scalar(queries.count_low_quota_sims(db)),
+    'app.recent_activity': lambda db, ctx: len(queries.recently_updated_sims(db)),
+
+    # Overview
+    'overview.total_usage': lambda db, ctx: _scalar(queries.total_data_usage(db, ctx['since'])),
+    'overview.status_distribution': lambda db, ctx: len(queries.sim_status_distribution(db)),
+    'overview.usage_trend': lambda db, ctx: len(queries.daily_usage(db, ctx['since'])),
+    'overview.top_consumers': lambda db, ctx: len(queries.top_data_consumers(db, ctx['since'])),
+
+    # SIM Management
+    'sim_management.list_recent': lambda db, ctx: len(queries.search_sims(db)),
+    'sim_management.search': lambda db, ctx: len(queries.search_sims(db, ctx['search'])),
+    'sim_management.enabled_by_iccid': lambda db, ctx: len(
+        queries.search_sims(db, status='Enabled', sort_by='ICCID')
+    ),
+
+    # Usage Analytics
+    'usage_analytics.totals': lambda db, ctx: len([
+        queries.total_data_usage(db, ctx['start_date'], ctx['end_date']),
+        queries.total_sms_usage(db, ctx['start_date'], ctx['end_date']),
+    ]),
+    'usage_analytics.usage_trend': lambda db, ctx: len(
+        queries.daily_usage(db, ctx['start_date'], ctx['end_date'], with_sms=True)
+    ),
+    'usage_analytics.sim_breakdown': lambda db, ctx: len(
+        queries.sim_usage_breakdown(db, ctx['start_date'], ctx['end_date'])
+    ),
+
+    # Alerts
+    'alerts.counts': lambda db, ctx: len(queries.alert_counts(db)),
+    'alerts.active_with_sims': lambda db, ctx: len(queries.active_alerts_with_sims(db)),
+    'alerts.recently_resolved': lambda db, ctx: len(queries.recently_resolved_alerts(db)),
+
+    # AlertService
+    'alert_service.check_quota_alerts': _quota_alert_scan,
+    'alert_service.get_active_alerts': lambda db, ctx: len(AlertService().get_active_alerts()),
+    'alert_service.get_alerts_by_severity': lambda db, ctx: len(
+        AlertService().get_alerts_by_severity('critical')
+    ),
+    'alert_service.get_sim_alerts': lambda db, ctx: len(AlertService().get_sim_alerts(ctx['sim_id'])),
+}
+
+
+def fleet_scale(db) -> Dict[str, int]:
+    """Row counts the timings depend on"""
+    return {
+        'sim_cards': db.query(SIMCard).count(),
+        'usage_records': db.query(UsageRecord).count(),
+        'alerts': db.query(Alert).count(),
+        'connectivity_logs': db.query(ConnectivityLog).count(),
+    }
+
+
+def run_benchmark(names, repeat: int, warmup: int, ctx: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Time each query `repeat` times after `warmup` untimed runs"""
+    results = {}
+    for name in names:
+        query = QUERIES[name]
+        timings = []
+        rows = 0
+        with get_db() as db:
+            for run in range(warmup + repeat):
+                started = time.perf_counter()
+                rows = query(db, ctx)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if run >= warmup:
+                    timings.append(elapsed_ms)
+            db.rollback()
+
+        results[name] = {
+            'rows': rows,
+            'min_ms': round(min(timings), 2),
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+        }
+        print(f"  {name:<42} {results[name]['median_ms']:>10.2f} ms  ({rows} rows)")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> int:
+    """Print median changes against the baseline, returning the number of regressions"""
+    regressions = 0
+    print(f"\nCompared with baseline from {baseline.get('generated_at')}:")
+    for name, result in results.items():
+        previous = baseline.get('queries', {}).get(name)
+        if previous is None:
+            print(f"  {name:<42} new")
+            continue
+
+        before, after = previous['median_ms'], result['median_ms']
+        change = (after - before) / before if before else 0.0
+        regressed = after > before * (1 + tolerance) and after - before >= MIN_REGRESSION_MS
+        regressions += regressed
+        print(
+            f"  {name:<42} {before:>10.2f} -> {after:>10.2f} ms ({change:+.0%})"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard and AlertService queries")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query")
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed runs per query first")
+    parser.add_argument('--days', type=int, default=30, help="Date range the pages are viewed with")
+    parser.add_argument('--search', default='device-0004', help="SIM Management search term")
+    parser.add_argument('--only', help="Only run queries whose name starts with this prefix")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--output', type=Path, help="Also write the results to this JSON file")
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help="Allowed median slowdown before a query counts as a regression (0.5 = +50%%)"
+    )
+    args = parser.parse_args()
+
+    names = [name for name in QUERIES if not args.only or name.startswith(args.only)]
+    if not names:
+        print(f"No queries match '{args.only}'")
+        sys.exit(1)
+
+    now = datetime.now()
+    with get_db() as db:
+        scale = fleet_scale(db)
+        sim_id = db.query(Alert.sim_card_id).filter(Alert.sim_card_id.isnot(None)).limit(1).scalar()
+        if sim_id is None:
+            sim_id = db.query(SIMCard.id).limit(1).scalar()
+
+    ctx = {
+        'today': now.date(),
+        'since': now - timedelta(days=args.days),
+        'start_date': (now - timedelta(days=args.days)).date(),
+        'end_date': now.date(),
+        'search': args.search,
+        'sim_id': sim_id,
+    }
+
+    print(
+        "Benchmarking " + str(len(names)) + " queries on "
+        + ", ".join(f"{count} {table}" for table, count in scale.items()) + "..."
+    )
+    results = run_benchmark(names, args.repeat, args.warmup, ctx)
+
+    report = {
+        'generated_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'scale': scale,
+        'params': {'repeat': args.repeat, 'warmup': args.warmup, 'days': args.days, 'search': args.search},
+        'queries': results,
+    }
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nWrote baseline to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; record one with --update-baseline")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get('scale') != scale:
+        print(f"\nWarning: baseline was recorded at a different scale: {baseline.get('scale')}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{regressions} queries regressed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
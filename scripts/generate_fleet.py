@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Synthetic fleet generator
+Fills sim_cards, usage_records, alerts and connectivity_logs with a
+synthetic fleet at a configurable scale, for benchmarking dashboard
+queries (see scripts/benchmark_queries.py). SIMs and daily usage follow
+the same distributions the local API simulator serves (scripts/mock_api.py).
+Reruns with the same seed overwrite SIMs and usage instead of duplicating
+them; alerts and connectivity logs are appended.
+
+Usage:
+    python scripts/generate_fleet.py --sims 100000 --days 180
+    python scripts/generate_fleet.py --sims 1000 --days 30 --seed 7
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import insert
+
+from mock_api import MockFleet, seeded_rng
+from src.database.connection import get_db, init_db
+from src.database.ingest import copy_usage_records, upsert_sim_cards
+from src.database.models import Alert, ConnectivityLog, SIMCard
+from src.utils.logger import setup_logging
+
+# SIMs generated and written per round trip
+SIM_BATCH_SIZE = 1000
+
+# Alert types with their share of historical alerts and severities
+ALERT_MIX = (
+    ('quota_warning', 0.6, ('warning', 'critical')),
+    ('sms_quota_warning', 0.25, ('warning', 'critical')),
+    ('connectivity_issue', 0.15, ('info', 'warning')),
+)
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
+
+
+def sim_rows(fleet: MockFleet, start: int, stop: int, now: datetime) -> List[Dict[str, Any]]:
+    """sim_cards rows for fleet indexes [start, stop)"""
+    rows = []
+    for index in range(start, stop):
+        sim = fleet.sim(index)
+        rng = seeded_rng(fleet.seed, sim['iccid'], 'meta')
+        updated_at = now - timedelta(minutes=rng.randint(0, 30 * 1440))
+        rows.append({
+            'iccid': sim['iccid'],
+            'iccid_with_luhn': sim['iccid_with_luhn'],
+            'imsi': sim['imsi'],
+            'imsi_2': sim['imsi_2'],
+            'current_imsi': sim['current_imsi'],
+            'msisdn': sim['msisdn'],
+            'imei': sim['imei'],
+            'imei_lock': sim['imei_lock'],
+            'status': sim['status'],
+            'ip_address': sim['ip_address'],
+            'label': sim['label'],
+            'activation_date': _parse_time(sim['activation_date']),
+            'current_quota_mb': sim['current_quota'],
+            'quota_status_id': sim['quota_status']['id'],
+            'current_quota_sms': sim['current_quota_SMS'],
+            'quota_sms_status_id': sim['quota_status_SMS']['id'],
+            'created_at': updated_at,
+            'last_synced_at': now,
+            'updated_at': updated_at,
+        })
+    return rows
+
+
+def usage_rows(fleet: MockFleet, sims: List[Tuple[int, str]], days: int, today: date):
+    """Daily usage_records rows for the last `days` days of each SIM"""
+    created_at = datetime.utcnow()
+    for sim_id, iccid in sims:
+        for offset in range(days, 0, -1):
+            day = today - timedelta(days=offset)
+            usage = fleet.daily_usage(iccid, day)
+            data, sms = usage['data'], usage['sms']
+            yield {
+                'sim_card_id': sim_id,
+                'date': datetime.combine(day, datetime.min.time()),
+                'data_volume_mb': float(data['volume']),
+                'data_volume_rx_mb': float(data['volume_rx']),
+                'data_volume_tx_mb': float(data['volume_tx']),
+                'sms_volume': int(sms['volume']),
+                'sms_volume_mo': int(sms['volume_rx']),
+                'sms_volume_mt': int(sms['volume_tx']),
+                'created_at': created_at,
+            }
+
+
+def alert_rows(
+    fleet: MockFleet,
+    sims: List[Any],
+    days: int,
+    alerts_per_sim_month: float,
+    now: datetime
+) -> List[Dict[str, Any]]:
+    """Open quota alerts for low-quota SIMs plus a resolved alert history"""
+    rows = []
+    for sim in sims:
+        label = sim.label or 'No Label'
+
+        # What AlertService.check_quota_alerts keeps open
+        for alert_type, status_id, kind in (
+            ('quota_warning', sim.quota_status_id, 'data'),
+            ('sms_quota_warning', sim.quota_sms_status_id, 'SMS'),
+        ):
+            if status_id in (1, 2):
+                rows.append({
+                    'sim_card_id': sim.id,
+                    'alert_type': alert_type,
+                    'severity': 'critical' if status_id == 2 else 'warning',
+                    'message': f"SIM {sim.iccid} ({label}) has less than "
+                               f"{'10%' if status_id == 2 else '20%'} {kind} quota remaining",
+                    'is_resolved': False,
+                    'created_at': now - timedelta(hours=seeded_rng(fleet.seed, sim.iccid, alert_type).randint(0, 72)),
+                    'resolved_at': None,
+                })
+
+        rng = seeded_rng(fleet.seed, sim.iccid, 'alerts')
+        expected = alerts_per_sim_month * days / 30
+        count = int(expected) + (1 if rng.random() < expected % 1 else 0)
+        for _ in range(count):
+            roll = rng.random()
+            for alert_type, share, severities in ALERT_MIX:
+                if roll < share:
+                    break
+                roll -= share
+            created_at = now - timedelta(minutes=rng.randint(60, days * 1440))
+            rows.append({
+                'sim_card_id': sim.id,
+                'alert_type': alert_type,
+                'severity': rng.choice(severities),
+                'message': f"SIM {sim.iccid} ({label}): {alert_type.replace('_', ' ')}",
+                'is_resolved': True,
+                'created_at': created_at,
+                'resolved_at': min(now, created_at + timedelta(minutes=rng.randint(5, 3 * 1440))),
+            })
+    return rows
+
+
+def connectivity_rows(
+    fleet: MockFleet,
+    sims: List[Tuple[int, str]],
+    samples: int,
+    days: int,
+    now: datetime
+) -> List[Dict[str, Any]]:
+    """connectivity_logs samples spread over the last `days` days"""
+    rows = []
+    for sim_id, iccid in sims:
+        rng = seeded_rng(fleet.seed, iccid, 'cell')
+        # Mobile SIMs change cell every few hours, static ones never
+        mobile = rng.random() < 0.3
+        for n in range(samples):
+            replied = now - timedelta(minutes=int((n + rng.random()) * days * 1440 / samples))
+            epoch = int(replied.timestamp() // 3600 // 4) if mobile else 0
+            cell_rng = seeded_rng(fleet.seed, iccid, 'cell', epoch)
+            rows.append({
+                'sim_card_id': sim_id,
+                'current_location_retrieved': True,
+                'age_of_location_minutes': cell_rng.randint(0, 30),
+                'cid': cell_rng.randint(1000, 65000),
+                'lac': cell_rng.randint(100, 9000),
+                'mcc': '262',
+                'mnc': cell_rng.choice(['01', '02', '03']),
+                'request_timestamp': replied,
+                'reply_timestamp': replied,
+                'created_at': replied,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with a synthetic fleet")
+    parser.add_argument('--sims', type=int, default=1000, help="Fleet size")
+    parser.add_argument('--days', type=int, default=180, help="Days of usage history per SIM")
+    parser.add_argument('--seed', type=int, default=1, help="Fleet generation seed")
+    parser.add_argument('--alerts-per-sim-month', type=float, default=0.1, help="Resolved alert history rate")
+    parser.add_argument('--connectivity-samples', type=int, default=24, help="connectivity_logs rows per SIM")
+    parser.add_argument('--skip-usage', action='store_true', help="Only generate SIMs, alerts and connectivity")
+    args = parser.parse_args()
+
+    setup_logging()
+    init_db()
+
+    fleet = MockFleet(args.sims, args.seed, args.days)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = now.date()
+    started = time.monotonic()
+    totals = {'sims': 0, 'usage_records': 0, 'alerts': 0, 'connectivity_logs': 0}
+
+    print(f"Generating {args.sims} SIMs with {args.days} days of history (seed {args.seed})...")
+
+    for start in range(0, args.sims, SIM_BATCH_SIZE):
+        stop = min(args.sims, start + SIM_BATCH_SIZE)
+
+        with get_db() as db:
+            upsert_sim_cards(db, sim_rows(fleet, start, stop, now))
+            db.commit()
+
+            iccids = [fleet.iccid(index) for index in range(start, stop)]
+            sims = db.query(
+                SIMCard.id, SIMCard.iccid, SIMCard.label,
+                SIMCard.quota_status_id, SIMCard.quota_sms_status_id
+            ).filter(SIMCard.iccid.in_(iccids)).order_by(SIMCard.id).all()
+            pairs = [(sim.id, sim.iccid) for sim in sims]
+
+            if not args.skip_usage:
+                inserted, updated = copy_usage_records(db, usage_rows(fleet, pairs, args.days, today))
+                totals['usage_records'] += inserted + updated
+
+            alerts = alert_rows(fleet, sims, args.days, args.alerts_per_sim_month, now)
+            if alerts:
+                db.execute(insert(Alert), alerts)
+
+            samples = connectivity_rows(fleet, pairs, args.connectivity_samples, args.days, now)
+            if samples:
+                db.execute(insert(ConnectivityLog), samples)
+            db.commit()
+
+        totals['sims'] += len(sims)
+        totals['alerts'] += len(alerts)
+        totals['connectivity_logs'] += len(samples)
+        print(
+            f"  {stop}/{args.sims} SIMs ({time.monotonic() - started:.0f}s): "
+            + ", ".join(f"{count} {table}" for table, count in totals.items())
+        )
+
+    print(f"Done in {time.monotonic() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Local 1NCE API simulator
+Serves the endpoints OnceAPIClient uses for a synthetic fleet, with
+configurable latency, 429/5xx injection and token expiry, so the API client
+and DataCollector can be load tested without touching the production API.
+
+Usage:
+    python scripts/mock_api.py --sims 20000 --latency-ms 200 --throttle-rate 0.01
+    ONENCE_API_BASE_URL=http://localhost:8080 python scripts/worker.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ICCID_PREFIX = "898822806660"
+
+SIM_PATH = re.compile(r'^/v1/sims/(?P<iccid>[0-9]+)(?P<rest>/.*)?$')
+
+
+def seeded_rng(*parts) -> random.Random:
+    """Deterministic RNG for a (sim, day, ...) key so repeated calls agree"""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def _iso(dt: datetime) -> str:
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class LatencyModel:
+    """Per-request latency distribution"""
+
+    def __init__(self, distribution: str, mean_ms: float, jitter_ms: float):
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+
+    def sample(self) -> float:
+        """Latency in seconds"""
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == 'uniform':
+            ms = random.uniform(self.mean_ms - self.jitter_ms, self.mean_ms + self.jitter_ms)
+        elif self.distribution == 'normal':
+            ms = random.gauss(self.mean_ms, self.jitter_ms)
+        elif self.distribution == 'lognormal':
+            # Long-tailed: median ~mean_ms, jitter_ms controls the spread
+            sigma = max(0.01, self.jitter_ms / self.mean_ms)
+            ms = random.lognormvariate(math.log(self.mean_ms), sigma)
+        else:
+            ms = self.mean_ms
+        return max(0.0, ms) / 1000.0
+
+
+class MockFleet:
+    """Synthetic fleet of SIMs and the simulator's mutable state"""
+
+    def __init__(self, size: int, seed: int, history_days: int):
+        self.size = size
+        self.seed = seed
+        self.history_days = history_days
+        self.overrides = {}
+        self.tokens = {}
+        self.lock = threading.Lock()
+
+    def iccid(self, index: int) -> str:
+        return f"{ICCID_PREFIX}{index:07d}"
+
+    def index_of(self, iccid: str):
+        if not iccid.startswith(ICCID_PREFIX):
+            return None
+        index = int(iccid[len(ICCID_PREFIX):])
+        return index if 0 <= index < self.size else None
+
+    def sim(self, index: int) -> dict:
+        iccid = self.iccid(index)
+        rng = seeded_rng(self.seed, iccid)
+        total_quota = rng.choice([500, 1000, 5000])
+        used = rng.betavariate(2, 3) * total_quota
+        remaining = total_quota - used
+        quota_status = 2 if remaining < total_quota * 0.1 else 1 if remaining < total_quota * 0.2 else 0
+        sms_remaining = rng.randint(0, 250)
+        sms_status = 2 if sms_remaining < 25 else 1 if sms_remaining < 50 else 0
+        activation = datetime(2023, 1, 1) + timedelta(days=rng.randint(0, 600))
+
+        sim = {
+            'iccid': iccid,
+            'iccid_with_luhn': iccid + str(rng.randint(0, 9)),
+            'imsi': f"90140{rng.randint(10**9, 10**10 - 1)}",
+            'imsi_2': None,
+            'current_imsi': None,
+            'msisdn': f"882285{rng.randint(10**8, 10**9 - 1)}",
+            'imei': f"35{rng.randint(10**12, 10**13 - 1)}",
+            'imei_lock': False,
+            'status': 'Enabled' if rng.random() < 0.9 else 'Disabled',
+            'activation_date': _iso(activation),
+            'ip_address': f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+            'current_quota': round(remaining, 2),
+            'quota_status': {'id': quota_status},
+            'current_quota_SMS': sms_remaining,
+            'quota_status_SMS': {'id': sms_status},
+            'label': f"device-{index:06d}" if rng.random() < 0.8 else None,
+        }
+        sim['current_imsi'] = sim['imsi']
+        sim.update(self.overrides.get(iccid, {}))
+        return sim
+
+    def daily_usage(self, iccid: str, day: date) -> dict:
+        rng = seeded_rng(self.seed, iccid, 'profile')
+        # A fifth of the fleet is dormant, the rest has a per-SIM daily mean
+        mean_mb = 0.0 if rng.random() < 0.2 else rng.lognormvariate(1.0, 1.2)
+        day_rng = seeded_rng(self.seed, iccid, day.isoformat())
+        volume = round(mean_mb * day_rng.uniform(0.3, 1.7), 6) if mean_mb else 0.0
+        rx = round(volume * day_rng.uniform(0.5, 0.9), 6)
+        sms = day_rng.randint(0, 5) if mean_mb else 0
+        sms_mo = day_rng.randint(0, sms)
+        return {
+            'date': day.isoformat(),
+            'data': {'volume': str(volume), 'volume_rx': str(rx), 'volume_tx': str(round(volume - rx, 6))},
+            'sms': {'volume': str(sms), 'volume_rx': str(sms_mo), 'volume_tx': str(sms - sms_mo)},
+        }
+
+    def connectivity(self, iccid: str) -> dict:
+        now = datetime.utcnow()
+        rng = seeded_rng(self.seed, iccid, 'cell')
+        # Mobile SIMs change cell a few times per day, static ones never
+        mobile = rng.random() < 0.3
+        epoch = int(now.timestamp() // 3600 // 4) if mobile else 0
+        cell_rng = seeded_rng(self.seed, iccid, 'cell', epoch)
+        return {
+            'subscriber_info': {'state': 'ATTACHED'},
+            'current_location_retrieved': True,
+            'age_of_location_minutes': cell_rng.randint(0, 30),
+            'cid': cell_rng.randint(1000, 65000),
+            'lac': cell_rng.randint(100, 9000),
+            'mcc': '262',
+            'mnc': cell_rng.choice(['01', '02', '03']),
+            'request_timestamp': _iso(now),
+            'reply_timestamp': _iso(now),
+        }
+
+    def events(self, iccid: str) -> list:
+        rng = seeded_rng(self.seed, iccid, 'events')
+        now = datetime.utcnow().replace(microsecond=0)
+        events = []
+        for n in range(rng.randint(0, 20)):
+            occurred = now - timedelta(minutes=rng.randint(0, self.history_days * 1440))
+            events.append({
+                'id': int(hashlib.sha256(f"{iccid}:{n}".encode()).hexdigest()[:12], 16),
+                'timestamp': _iso(occurred),
+                'event_type': rng.choice(['Create PDP Context', 'Delete PDP Context', 'Update Location', 'Purge']),
+                'event_severity': 'INFO',
+                'description': 'Simulated event',
+            })
+        return sorted(events, key=lambda e: e['timestamp'], reverse=True)
+
+    def quota(self, sim: dict, kind: str) -> dict:
+        # Quotas expire on the anniversary of activation, like a yearly plan
+        activation = datetime.strptime(sim['activation_date'], '%Y-%m-%dT%H:%M:%SZ')
+        years = (datetime.utcnow() - activation).days // 365 + 1
+        expiry = _iso(activation + timedelta(days=365 * years))
+        if kind == 'sms':
+            return {
+                'volume': sim['current_quota_SMS'],
+                'total_volume': 250,
+                'quota_status': sim['quota_status_SMS'],
+                'expiry_date': expiry,
+            }
+        return {
+            'volume': sim['current_quota'],
+            'total_volume': max(500, math.ceil(sim['current_quota'] / 500) * 500),
+            'quota_status': sim['quota_status'],
+            'expiry_date': expiry,
+        }
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    server_version = "OnceMock/1.0"
+    protocol_version = "HTTP/1.1"
+
+    # Set by create_server()
+    fleet: MockFleet
+    latency: LatencyModel
+    error_rate: float
+    throttle_rate: float
+    token_ttl: int
+    stats: Counter
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body, headers: dict = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _handle(self, method: str):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if path.startswith('/management-api'):
+            path = path[len('/management-api'):]
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        body = self._read_body()
+
+        self.stats[f"{method} {re.sub(r'/v1/sims/[0-9]+', '/v1/sims/{iccid}', path)}"] += 1
+
+        time.sleep(self.latency.sample())
+
+        if path == '/_mock/stats':
+            return self._send_json(200, dict(self.stats))
+
+        if path == '/oauth/token' and method == 'POST':
+            return self._issue_token()
+
+        if not self._authorized():
+            return self._send_json(401, {'message': 'Unauthorized'})
+
+        # Fault injection applies to API calls, not to token requests
+        if random.random() < self.throttle_rate:
+            self.stats['injected_429'] += 1
+            return self._send_json(429, {'message': 'Too Many Requests'}, {'Retry-After': 1})
+        if random.random() < self.error_rate:
+            self.stats['injected_5xx'] += 1
+            return self._send_json(random.choice([500, 502, 503]), {'message': 'Simulated failure'})
+
+        if path == '/v1/sims' and method == 'GET':
+            return self._list_sims(params)
+
+        match = SIM_PATH.match(path)
+        if not match:
+            return self._send_json(404, {'message': 'Not found'})
+
+        index = self.fleet.index_of(match.group('iccid'))
+        if index is None:
+            return self._send_json(404, {'message': 'SIM not found'})
+
+        return self._sim_endpoint(method, index, match.group('rest') or '', params, body)
+
+    def _issue_token(self):
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Basic ') or ':' not in base64.b64decode(auth[6:]).decode(errors='ignore'):
+            return self._send_json(400, {'message': 'Invalid credentials'})
+
+        token = secrets.token_hex(16)
+        with self.fleet.lock:
+            self.fleet.tokens[token] = time.time() + self.token_ttl
+        return self._send_json(200, {
+            'access_token': token,
+            'token_type': 'bearer',
+            'expires_in': self.token_ttl,
+        })
+
+    def _authorized(self) -> bool:
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return False
+        expires_at = self.fleet.tokens.get(auth[7:])
+        return expires_at is not None and expires_at > time.time()
+
+    def _list_sims(self, params: dict):
+        page = max(1, int(params.get('page', 1)))
+        page_size = max(1, min(100, int(params.get('pageSize', 10))))
+        total_pages = max(1, math.ceil(self.fleet.size / page_size))
+        start = (page - 1) * page_size
+        sims = [self.fleet.sim(i) for i in range(start, min(start + page_size, self.fleet.size))]
+        return self._send_json(200, sims, {
+            'X-Total-Pages': total_pages,
+            'X-Total-Count': self.fleet.size,
+        })
+
+    def _sim_endpoint(self, method: str, index: int, rest: str, params: dict, body: dict):
+        fleet = self.fleet
+        sim = fleet.sim(index)
+        iccid = sim['iccid']
+
+        if method == 'GET':
+            if rest == '':
+                return self._send_json(200, sim)
+            if rest == '/status':
+                return self._send_json(200, {'status': 'ONLINE' if sim['status'] == 'Enabled' else 'OFFLINE'})
+            if rest == '/usage':
+                end = date.fromisoformat(params.get('end_dt', date.today().isoformat()))
+                start = date.fromisoformat(params.get('start_dt', end.isoformat()))
+                first = max(start, date.today() - timedelta(days=fleet.history_days))
+                days = (end - first).days + 1
+                stats = [fleet.daily_usage(iccid, first + timedelta(days=n)) for n in range(max(0, days))]
+                return self._send_json(200, {'stats': stats})
+            if rest == '/connectivity_info':
+                return self._send_json(200, fleet.connectivity(iccid))
+            if rest in ('/quota/data', '/quota/sms'):
+                return self._send_json(200, fleet.quota(sim, rest.rsplit('/', 1)[1]))
+            if rest == '/events':
+                events = fleet.events(iccid)
+                if params.get('sort') == 'timestamp':
+                    events.reverse()
+                page = max(1, int(params.get('page', 1)))
+                page_size = max(1, min(1000, int(params.get('pageSize', 100))))
+                total_pages = max(1, math.ceil(len(events) / page_size))
+                chunk = events[(page - 1) * page_size:page * page_size]
+                return self._send_json(200, chunk, {
+                    'X-Total-Pages': total_pages,
+                    'X-Total-Count': len(events),
+                })
+
+        changes = None
+        if method == 'PATCH' and rest == '':
+            changes = {k: v for k, v in body.items() if k in ('label',)}
+        elif method == 'POST' and rest == '/enable':
+            changes = {'status': 'Enabled'}
+        elif method == 'POST' and rest == '/disable':
+            changes = {'status': 'Disabled'}
+        elif method == 'POST' and rest == '/imei_lock':
+            changes = {'imei_lock': True, 'imei': body.get('imei', sim['imei'])}
+        elif method == 'DELETE' and rest == '/imei_lock':
+            changes = {'imei_lock': False}
+
+        if changes is None:
+            return self._send_json(404, {'message': 'Not found'})
+
+        with fleet.lock:
+            fleet.overrides.setdefault(iccid, {}).update(changes)
+        return self._send_json(200, {})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+def create_server(
+    host: str = '127.0.0.1',
+    port: int = 8080,
+    sims: int = 1000,
+    seed: int = 1,
+    history_days: int = 180,
+    latency_distribution: str = 'fixed',
+    latency_ms: float = 0.0,
+    latency_jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    token_ttl: int = 3600
+) -> ThreadingHTTPServer:
+    """Create (but don't start) a simulator server"""
+    handler = type('ConfiguredMockAPIHandler', (MockAPIHandler,), {
+        'fleet': MockFleet(sims, seed, history_days),
+        'latency': LatencyModel(latency_distribution, latency_ms, latency_jitter_ms),
+        'error_rate': error_rate,
+        'throttle_rate': throttle_rate,
+        'token_ttl': token_ttl,
+        'stats': Counter(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local 1NCE API simulator")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--sims', type=int, default=1000, help="Fleet size")
+    parser.add_argument('--seed', type=int, default=1, help="Fleet generation seed")
+    parser.add_argument('--history-days', type=int, default=180, help="Days of usage/event history")
+    parser.add_argument('--latency', dest='latency_distribution', default='fixed',
+                        choices=['fixed', 'uniform', 'normal', 'lognormal'])
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Mean (or median) latency")
+    parser.add_argument('--latency-jitter-ms', type=float, default=0.0, help="Spread of the latency distribution")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls answered with 5xx")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument('--token-ttl', type=int, default=3600, help="Access token lifetime in seconds")
+    args = parser.parse_args()
+
+    server = create_server(**vars(args))
+    print(f"1NCE API simulator with {args.sims} SIMs on http://{args.host}:{args.port}")
+    print(f"Point the app at it with ONENCE_API_BASE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Simulator stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,21 @@
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+import argparse
 import logging
+import signal
+import threading
 from datetime import datetime
 
+from src.api.auth_manager import get_auth_manager
+from src.api.metrics import start_metrics_server
+from src.api.rate_limiter import get_rate_limiter
+from src.api.resilience import get_circuit_breaker
 from src.services.data_collector import DataCollector
+from src.services.dispatcher import Dispatcher, task_handlers
+from src.services.work_queue import TaskConsumer, get_work_queue
 from src.config import config
 from src.utils.logger import setup_logging
+from src.utils.profiling import profile_run
 
 # Setup logging
 setup_logging()
@@ -17,40 +27,230 @@ def collect_usage_job():
     logger.info("Starting usage data collection...")
     try:
         collector = DataCollector()
-        collector.collect_all_usage_data(days_back=1)
+        collector.collect_all_usage_data(days_back=1, due_only=config.ADAPTIVE_POLLING)
         logger.info("Usage data collection completed")
     except Exception as e:
         logger.error(f"Usage data collection failed: {e}")
 
 
+def collect_connectivity_job():
+    """Scheduled job to collect connectivity for the fleet"""
+    logger.info("Starting connectivity collection...")
+    try:
+        collector = DataCollector()
+        collector.collect_fleet_connectivity()
+        logger.info("Connectivity collection completed")
+    except Exception as e:
+        logger.error(f"Connectivity collection failed: {e}")
+
+
+def collect_events_job():
+    """Scheduled job to collect new SIM events"""
+    logger.info("Starting event collection...")
+    try:
+        collector = DataCollector()
+        collector.collect_events()
+        logger.info("Event collection completed")
+    except Exception as e:
+        logger.error(f"Event collection failed: {e}")
+
+
+def collect_quota_job():
+    """Scheduled job to refresh SIM quotas"""
+    logger.info("Starting quota collection...")
+    try:
+        collector = DataCollector()
+        collector.collect_quotas()
+        logger.info("Quota collection completed")
+    except Exception as e:
+        logger.error(f"Quota collection failed: {e}")
+
+
 def full_sync_job():
     """Scheduled job for full SIM sync"""
     logger.info("Starting full SIM sync...")
     try:
         collector = DataCollector()
-        result = collector.sync_all_sims()
+        result = collector.sync_all_sims(resume=True)
         logger.info(f"Full sync completed: {result}")
     except Exception as e:
         logger.error(f"Full sync failed: {e}")
 
 
+def enqueue_usage_job():
+    """Scheduled job to queue usage collection as chunked tasks"""
+    try:
+        Dispatcher().dispatch_usage(days_back=1, due_only=config.ADAPTIVE_POLLING)
+    except Exception as e:
+        logger.error(f"Queueing usage collection failed: {e}")
+
+
+def enqueue_connectivity_job():
+    """Scheduled job to queue connectivity collection as chunked tasks"""
+    try:
+        Dispatcher().dispatch_connectivity()
+    except Exception as e:
+        logger.error(f"Queueing connectivity collection failed: {e}")
+
+
+def enqueue_events_job():
+    """Scheduled job to queue event collection as chunked tasks"""
+    try:
+        Dispatcher().dispatch_events()
+    except Exception as e:
+        logger.error(f"Queueing event collection failed: {e}")
+
+
+def enqueue_quota_job():
+    """Scheduled job to queue quota collection as chunked tasks"""
+    try:
+        Dispatcher().dispatch_quota()
+    except Exception as e:
+        logger.error(f"Queueing quota collection failed: {e}")
+
+
+def enqueue_full_sync_job():
+    """Scheduled job to queue a full SIM sync"""
+    try:
+        Dispatcher().dispatch_full_sync()
+    except Exception as e:
+        logger.error(f"Queueing full sync failed: {e}")
+
+
+def purge_tasks_job():
+    """Scheduled job to delete finished queue tasks"""
+    try:
+        deleted = get_work_queue().purge_finished()
+        logger.info(f"Purged {deleted} finished tasks")
+    except Exception as e:
+        logger.error(f"Purging finished tasks failed: {e}")
+
+
+def run_consumer():
+    """Run collection tasks from the queue until SIGTERM/SIGINT"""
+    consumer = TaskConsumer(get_work_queue(), task_handlers())
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    consumer.run(stop)
+
+
+# Jobs that `--profile` can run once
+PROFILE_JOBS = {
+    'sync': full_sync_job,
+    'usage': collect_usage_job,
+    'connectivity': collect_connectivity_job,
+    'events': collect_events_job,
+    'quota': collect_quota_job,
+}
+
+
+def client_state_metrics() -> str:
+    """Rate limiter and circuit breaker state as Prometheus gauges"""
+    limiter = get_rate_limiter().snapshot()
+    breaker = get_circuit_breaker().snapshot()
+    gauges = {
+        'onence_api_rate_limit_per_second': limiter['rate_per_second'],
+        'onence_api_concurrency_limit': limiter['concurrency_limit'],
+        'onence_api_in_flight': limiter['in_flight'],
+        'onence_api_backoff_remaining_seconds': limiter['backoff_remaining_seconds'],
+        'onence_api_circuit_open': int(breaker['state'] != 'closed'),
+    }
+    return "".join(f"# TYPE {name} gauge\n{name} {value}\n" for name, value in gauges.items())
+
+
 def main():
+    parser = argparse.ArgumentParser(description="1NCE data collection worker")
+    parser.add_argument(
+        '--mode', choices=['inline', 'dispatch', 'consume'], default='inline',
+        help="inline: run scheduled jobs and queued dashboard tasks in this process; "
+             "dispatch: queue scheduled jobs as tasks; consume: run queued tasks "
+             "(start as many as needed)"
+    )
+    parser.add_argument(
+        '--profile', choices=sorted(PROFILE_JOBS), metavar='JOB',
+        help="Run one job once under the profiler, write the report to PROFILE_DIR "
+             f"and exit ({', '.join(sorted(PROFILE_JOBS))})"
+    )
+    args = parser.parse_args()
+
+    if args.profile:
+        # Only the calling thread is profiled; phase timings on the run's
+        # data_collection_logs row cover its worker threads
+        with profile_run(args.profile):
+            PROFILE_JOBS[args.profile]()
+        return
+
+    if config.AUTH_BACKGROUND_REFRESH:
+        get_auth_manager().start_background_refresh()
+
+    if config.METRICS_PORT:
+        start_metrics_server(config.METRICS_PORT, extra=client_state_metrics)
+
+    if args.mode == 'consume':
+        run_consumer()
+        return
+
+    dispatch = args.mode == 'dispatch'
     scheduler = BlockingScheduler()
 
-    # Collect usage data every hour
+    if not dispatch:
+        # Run what the dashboard buttons queue when no consumers are deployed
+        consumer = TaskConsumer(get_work_queue(), task_handlers())
+        threading.Thread(target=consumer.run, name='task-consumer', daemon=True).start()
+
+    # Collect usage data every hour, or poll due SIMs every tick with adaptive polling
+    usage_interval = (
+        config.POLL_TICK_MINUTES if config.ADAPTIVE_POLLING
+        else config.DATA_COLLECTION_INTERVAL_MINUTES
+    )
     scheduler.add_job(
-        collect_usage_job,
+        enqueue_usage_job if dispatch else collect_usage_job,
         trigger=IntervalTrigger(
-            minutes=config.DATA_COLLECTION_INTERVAL_MINUTES
+            minutes=usage_interval
         ),
         id='collect_usage',
         name='Collect usage data',
         replace_existing=True
     )
 
+    # Track cell changes across the fleet
+    scheduler.add_job(
+        enqueue_connectivity_job if dispatch else collect_connectivity_job,
+        trigger=IntervalTrigger(
+            minutes=config.CONNECTIVITY_INTERVAL_MINUTES
+        ),
+        id='collect_connectivity',
+        name='Collect connectivity',
+        replace_existing=True
+    )
+
+    # Pull new SIM events from each SIM's cursor
+    scheduler.add_job(
+        enqueue_events_job if dispatch else collect_events_job,
+        trigger=IntervalTrigger(
+            minutes=config.EVENTS_INTERVAL_MINUTES
+        ),
+        id='collect_events',
+        name='Collect SIM events',
+        replace_existing=True
+    )
+
+    # Keep quotas current between full syncs
+    scheduler.add_job(
+        enqueue_quota_job if dispatch else collect_quota_job,
+        trigger=IntervalTrigger(
+            minutes=config.QUOTA_INTERVAL_MINUTES
+        ),
+        id='collect_quota',
+        name='Collect SIM quotas',
+        replace_existing=True
+    )
+
     # Full sync once per day at 2 AM
     scheduler.add_job(
-        full_sync_job,
+        enqueue_full_sync_job if dispatch else full_sync_job,
         trigger='cron',
         hour=2,
         minute=0,
@@ -59,8 +259,22 @@ def main():
         replace_existing=True
     )
 
-    logger.info("Starting scheduler...")
-    logger.info(f"Usage collection interval: {config.DATA_COLLECTION_INTERVAL_MINUTES} minutes")
+    # Finished tasks are kept for TASK_RETENTION_DAYS for inspection
+    scheduler.add_job(
+        purge_tasks_job,
+        trigger='cron',
+        hour=3,
+        minute=0,
+        id='purge_tasks',
+        name='Purge finished tasks',
+        replace_existing=True
+    )
+
+    logger.info(f"Starting scheduler ({args.mode} mode)...")
+    logger.info(
+        f"Usage collection interval: {usage_interval} minutes"
+        + (" (adaptive polling)" if config.ADAPTIVE_POLLING else "")
+    )
 
     try:
         scheduler.start()
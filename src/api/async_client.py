@@ -0,0 +1,433 @@
+import asyncio
+import httpx
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Iterable, Iterator, AsyncIterator, Tuple, Callable, Awaitable
+import logging
+
+from src.api.cache import get_response_cache
+from src.api.auth_manager import OnceAuthManager, get_auth_manager
+from src.api.metrics import get_api_metrics
+from src.api.rate_limiter import get_rate_limiter
+from src.api.resilience import RequestRetry, get_circuit_breaker
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+BatchResult = Tuple[str, Dict[str, Any]]
+
+_DONE = object()
+
+
+class AsyncOnceAPIClient:
+    """Asynchronous 1NCE API client with bounded concurrency for bulk calls"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        auth_manager: Optional[OnceAuthManager] = None
+    ):
+        self.auth_manager = auth_manager or get_auth_manager()
+        self.base_url = config.ONENCE_API_BASE_URL
+        self.max_concurrency = max_concurrency or config.API_MAX_CONCURRENCY
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.rate_limiter = get_rate_limiter()
+        self.circuit_breaker = get_circuit_breaker()
+        self.cache = get_response_cache() if config.API_CACHE_ENABLED else None
+        self.metrics = get_api_metrics()
+        self.session = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+        )
+
+    async def __aenter__(self) -> "AsyncOnceAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying HTTP connection pool"""
+        await self.session.aclose()
+
+    async def _timed_request(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        **kwargs
+    ) -> httpx.Response:
+        """Send one HTTP request and record its latency and size"""
+        started = time.perf_counter()
+        try:
+            response = await self.session.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.metrics.record_request(key, None, time.perf_counter() - started)
+            raise
+
+        self.metrics.record_request(
+            key,
+            response.status_code,
+            time.perf_counter() - started,
+            bytes_sent=len(response.request.content),
+            bytes_received=len(response.content)
+        )
+        return response
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Make authenticated request, retrying auth failures, throttling and transient errors"""
+        url = f"{self.base_url}{endpoint}"
+        # Token refresh uses blocking requests, keep it off the event loop
+        headers = await asyncio.to_thread(self.auth_manager.get_auth_headers)
+
+        if 'headers' in kwargs:
+            headers.update(kwargs.pop('headers'))
+
+        retry = RequestRetry(method, endpoint, self.circuit_breaker, self.rate_limiter, self.metrics)
+
+        async with self._semaphore:
+            try:
+                while True:
+                    trial = self.circuit_breaker.before_request()
+                    delay = None
+                    try:
+                        await self.rate_limiter.acquire_async()
+                        retry.start_attempt()
+                        try:
+                            response = await self._timed_request(retry.key, method, url, headers, **kwargs)
+
+                            # Handle 401 Unauthorized
+                            if response.status_code == 401:
+                                retry.unauthorized(self.auth_manager)
+                                headers = await asyncio.to_thread(self.auth_manager.get_auth_headers)
+                                response = await self._timed_request(retry.key, method, url, headers, **kwargs)
+                        except (httpx.TimeoutException, httpx.NetworkError) as e:
+                            delay = retry.transport_error(e, isinstance(e, httpx.TimeoutException))
+                            if delay is None:
+                                raise
+                        finally:
+                            self.rate_limiter.release()
+                    except BaseException:
+                        # A trial that ended without an outcome must not wedge the breaker
+                        self.circuit_breaker.release_trial(trial)
+                        raise
+
+                    if delay is None:
+                        delay = retry.response(response.status_code, response.headers.get('Retry-After'))
+                        if delay is None:
+                            break
+
+                    # Back off without holding a rate limiter slot
+                    await asyncio.sleep(delay)
+
+                response.raise_for_status()
+                return response.json() if response.text else {}
+
+            except httpx.HTTPStatusError as e:
+                logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
+                raise
+            except httpx.HTTPError as e:
+                logger.error(f"Request failed: {e}")
+                raise
+
+    # ===== SIM Read Methods =====
+
+    async def get_sim(self, iccid: str) -> Dict[str, Any]:
+        """Get single SIM details"""
+        return await self._make_request('GET', f'/v1/sims/{iccid}')
+
+    async def get_sim_status(self, iccid: str) -> Dict[str, Any]:
+        """Get SIM status"""
+        return await self._make_request('GET', f'/v1/sims/{iccid}/status')
+
+    async def get_sim_usage(
+        self,
+        iccid: str,
+        start_date: str,
+        end_date: str
+    ) -> Dict[str, Any]:
+        """Get SIM usage for date range (YYYY-MM-DD)"""
+        params = {'start_dt': start_date, 'end_dt': end_date}
+        return await self._make_request('GET', f'/v1/sims/{iccid}/usage', params=params)
+
+    async def get_sim_connectivity(
+        self,
+        iccid: str,
+        subscriber: bool = True,
+        ussd: bool = False
+    ) -> Dict[str, Any]:
+        """Get SIM connectivity information"""
+        # httpx serialises bools as "True"/"False", send them like requests does
+        params = {'subscriber': str(subscriber).lower(), 'ussd': str(ussd).lower()}
+        return await self._make_request(
+            'GET',
+            f'/v1/sims/{iccid}/connectivity_info',
+            params=params
+        )
+
+    async def get_sim_data_quota(self, iccid: str) -> Dict[str, Any]:
+        """Get SIM data quota"""
+        return await self._make_request('GET', f'/v1/sims/{iccid}/quota/data')
+
+    async def get_sim_sms_quota(self, iccid: str) -> Dict[str, Any]:
+        """Get SIM SMS quota"""
+        return await self._make_request('GET', f'/v1/sims/{iccid}/quota/sms')
+
+    async def get_sim_quotas(self, iccid: str) -> Dict[str, Any]:
+        """Get SIM data and SMS quota concurrently"""
+        data, sms = await asyncio.gather(
+            self.get_sim_data_quota(iccid),
+            self.get_sim_sms_quota(iccid)
+        )
+        return {'data': data, 'sms': sms}
+
+    async def get_sim_events(self, iccid: str) -> Dict[str, Any]:
+        """Get SIM events"""
+        return await self._make_request('GET', f'/v1/sims/{iccid}/events')
+
+    async def get_sim_events_page(
+        self,
+        iccid: str,
+        page: int = 1,
+        page_size: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get one page of SIM events, newest first"""
+        params = {'page': page, 'pageSize': page_size}
+        return await self._make_request('GET', f'/v1/sims/{iccid}/events', params=params)
+
+    async def get_sim_events_since(
+        self,
+        iccid: str,
+        since_by_iccid: Dict[str, Optional[datetime]],
+        page_size: int = 100,
+        max_pages: int = 10,
+        start_page_by_iccid: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get the SIM's events at or after its cursor in `since_by_iccid`
+        (naive UTC, None for the whole history), paging newest first from
+        its page in `start_page_by_iccid` (1 by default) until the cursor is
+        reached or `max_pages` pages were read. A truncated result reports
+        the page to continue from in `next_page`.
+        """
+        since = since_by_iccid.get(iccid)
+        start_page = (start_page_by_iccid or {}).get(iccid) or 1
+        events = []
+        next_page = None
+
+        for page in range(start_page, start_page + max_pages):
+            batch = await self.get_sim_events_page(iccid, page, page_size)
+            newer = [
+                event for event in batch
+                if since is None or _event_time(event) >= since
+            ]
+            events.extend(newer)
+
+            if len(batch) < page_size or len(newer) < len(batch):
+                break
+        else:
+            # Newer events only push older ones further back, so resuming
+            # here can overlap what was read but never skips anything
+            next_page = start_page + max_pages
+
+        return {'events': events, 'truncated': next_page is not None, 'next_page': next_page}
+
+    # ===== SIM Management Operations =====
+
+    async def _mutate(self, iccid: str, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Run a mutation and drop the SIM's cached responses"""
+        try:
+            return await self._make_request(method, endpoint, **kwargs)
+        finally:
+            if self.cache:
+                self.cache.invalidate_sim(iccid)
+
+    async def update_sim_label(self, iccid: str, label: str) -> Dict[str, Any]:
+        """Update SIM card label"""
+        return await self._mutate(iccid, 'PATCH', f'/v1/sims/{iccid}', json={"label": label})
+
+    async def enable_sim(self, iccid: str) -> Dict[str, Any]:
+        """Enable SIM card"""
+        return await self._mutate(iccid, 'POST', f'/v1/sims/{iccid}/enable')
+
+    async def disable_sim(self, iccid: str) -> Dict[str, Any]:
+        """Disable SIM card"""
+        return await self._mutate(iccid, 'POST', f'/v1/sims/{iccid}/disable')
+
+    async def set_imei_lock(self, iccid: str, imei: str) -> Dict[str, Any]:
+        """Set IMEI lock for SIM"""
+        return await self._mutate(iccid, 'POST', f'/v1/sims/{iccid}/imei_lock', json={"imei": imei})
+
+    async def remove_imei_lock(self, iccid: str) -> Dict[str, Any]:
+        """Remove IMEI lock from SIM"""
+        return await self._mutate(iccid, 'DELETE', f'/v1/sims/{iccid}/imei_lock')
+
+    # ===== Batch API =====
+
+    async def fan_out(
+        self,
+        call: Callable[..., Awaitable[Dict[str, Any]]],
+        iccids: Iterable[str],
+        *args,
+        latencies: Optional[List[float]] = None,
+        **kwargs
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Run `call(iccid, *args, **kwargs)` for every ICCID with bounded
+        concurrency and yield (iccid, result) pairs in completion order.
+
+        Failed calls yield {"error": "..."} instead of raising, so one bad
+        SIM never aborts the batch. With `latencies`, the duration of every
+        call (including retries and rate-limit waits) is appended to it.
+        """
+        pending = iter(iccids)
+        # Bounded so workers wait for the caller instead of fetching ahead
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency)
+
+        async def worker():
+            # The shared iterator is only advanced from the event loop thread
+            for iccid in pending:
+                started = time.monotonic()
+                try:
+                    result = await call(iccid, *args, **kwargs)
+                except Exception as e:
+                    logger.error(f"Batch call {call.__name__} failed for {iccid}: {e}")
+                    result = {"error": str(e)}
+                if latencies is not None:
+                    latencies.append(time.monotonic() - started)
+                await results.put((iccid, result))
+            await results.put(_DONE)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        running = len(workers)
+
+        try:
+            while running:
+                item = await results.get()
+                if item is _DONE:
+                    running -= 1
+                    continue
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def iter_usage(
+        self,
+        iccids: Iterable[str],
+        start_date: str,
+        end_date: str
+    ) -> AsyncIterator[BatchResult]:
+        """Fetch usage for many SIMs, yielding results as they complete"""
+        return self.fan_out(self.get_sim_usage, iccids, start_date, end_date)
+
+    def iter_status(self, iccids: Iterable[str]) -> AsyncIterator[BatchResult]:
+        """Fetch status for many SIMs, yielding results as they complete"""
+        return self.fan_out(self.get_sim_status, iccids)
+
+    def iter_quota(
+        self,
+        iccids: Iterable[str],
+        quota_type: str = 'data'
+    ) -> AsyncIterator[BatchResult]:
+        """Fetch data or SMS quota for many SIMs, yielding results as they complete"""
+        call = self.get_sim_sms_quota if quota_type == 'sms' else self.get_sim_data_quota
+        return self.fan_out(call, iccids)
+
+    def iter_connectivity(self, iccids: Iterable[str]) -> AsyncIterator[BatchResult]:
+        """Fetch connectivity info for many SIMs, yielding results as they complete"""
+        return self.fan_out(self.get_sim_connectivity, iccids)
+
+
+def _event_time(event: Dict[str, Any]) -> datetime:
+    """Event timestamp as naive UTC"""
+    occurred = datetime.fromisoformat(event['timestamp'].replace('Z', '+00:00'))
+    if occurred.tzinfo is not None:
+        occurred = occurred.astimezone(timezone.utc).replace(tzinfo=None)
+    return occurred
+
+
+def run_batch(
+    method: str,
+    iccids: Iterable[str],
+    *args,
+    max_concurrency: Optional[int] = None,
+    auth_manager: Optional[OnceAuthManager] = None,
+    latencies: Optional[List[float]] = None,
+    **kwargs
+) -> Iterator[BatchResult]:
+    """
+    Run an AsyncOnceAPIClient call for many ICCIDs from synchronous code.
+
+    The event loop runs in a background thread and results are yielded as
+    each call completes, so callers can write to the database while the
+    rest of the batch is still in flight.
+
+    Usage:
+        for iccid, usage in run_batch('get_sim_usage', iccids, start, end):
+            ...
+    """
+    # Bounded so a slow consumer holds back the fetches instead of
+    # buffering the whole batch in memory
+    results: queue.Queue = queue.Queue(
+        maxsize=2 * (max_concurrency or config.API_MAX_CONCURRENCY)
+    )
+    stop = threading.Event()
+
+    async def produce():
+        async with AsyncOnceAPIClient(max_concurrency, auth_manager) as client:
+            call = getattr(client, method)
+            async for item in client.fan_out(call, iccids, *args, latencies=latencies, **kwargs):
+                # Wait for room without blocking the event loop, giving up
+                # once the consumer has gone away
+                while True:
+                    if stop.is_set():
+                        return
+                    try:
+                        results.put_nowait(item)
+                        break
+                    except queue.Full:
+                        await asyncio.sleep(0.05)
+
+    def hand_off(item) -> None:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def runner():
+        try:
+            asyncio.run(produce())
+        except BaseException as e:
+            hand_off(e)
+        finally:
+            hand_off(_DONE)
+
+    thread = threading.Thread(target=runner, name=f"batch-{method}", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -2,8 +2,12 @@ import requests
 import base64
 from datetime import datetime, timedelta
 from typing import Optional
-from threading import Lock
+from threading import RLock, Thread
 import logging
+import time
+
+from src.api.token_store import StoredToken, TokenStore, create_token_store
+from src.config import config
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +15,13 @@ logger = logging.getLogger(__name__)
 class OnceAuthManager:
     """Manages authentication for 1NCE API with automatic token refresh"""
 
-    def __init__(self, username: str, password: str, base_url: str):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        base_url: str,
+        token_store: Optional[TokenStore] = None
+    ):
         self.username = username
         self.password = password
         self.base_url = base_url
@@ -19,11 +29,19 @@ class OnceAuthManager:
         # Token management
         self._access_token: Optional[str] = None
         self._token_expires_at: Optional[datetime] = None
-        self._lock = Lock()
+        self._lock = RLock()
+        self._refresher: Optional[Thread] = None
+        self.token_wait_seconds = 0.0
+
+        # Shared with other processes so only one of them fetches tokens
+        self.token_store = token_store or create_token_store(username)
 
         # Buffer time before expiry to refresh token (5 minutes)
         self.refresh_buffer = timedelta(minutes=5)
 
+        # How much earlier the background thread refreshes (1 minute)
+        self.refresh_lead = timedelta(minutes=1)
+
     def _get_basic_auth_header(self) -> str:
         """Create Basic Authentication header"""
         credentials = f"{self.username}:{self.password}"
@@ -68,22 +86,80 @@ class OnceAuthManager:
 
         return datetime.now() < (self._token_expires_at - self.refresh_buffer)
 
-    def get_token(self) -> str:
-        """Get valid access token, refreshing if necessary"""
-        with self._lock:
-            if self._is_token_valid():
-                return self._access_token
+    def _load_stored_token(self, min_remaining: timedelta) -> Optional[StoredToken]:
+        """Get the shared token if it has more than `min_remaining` left"""
+        stored = self.token_store.load()
+        if stored and datetime.now() < stored[1] - min_remaining:
+            return stored
+        return None
+
+    def _fetch_shared_token(self, min_remaining: timedelta) -> StoredToken:
+        """Obtain a new token unless another process already refreshed it"""
+        with self.token_store.refresh_lock():
+            # Another process may have refreshed while we waited for the lock
+            stored = self._load_stored_token(min_remaining)
+            if stored:
+                logger.debug("Using token refreshed by another process")
+                return stored
 
-            logger.info("Token expired or missing, obtaining new token...")
             token_data = self._obtain_token()
 
-            self._access_token = token_data['access_token']
+            access_token = token_data['access_token']
             expires_in = token_data.get('expires_in', 3600)
-            self._token_expires_at = datetime.now() + timedelta(seconds=expires_in)
+            expires_at = datetime.now() + timedelta(seconds=expires_in)
+            self.token_store.save(access_token, expires_at)
+
+            logger.info(f"New token obtained, expires at {expires_at}")
+            return access_token, expires_at
 
-            logger.info(f"New token obtained, expires at {self._token_expires_at}")
+    def get_token(self) -> str:
+        """Get valid access token, refreshing if necessary"""
+        started = time.monotonic()
+        with self._lock:
+            if not self._is_token_valid():
+                stored = self._load_stored_token(self.refresh_buffer)
+                if not stored:
+                    logger.info("Token expired or missing, obtaining new token...")
+                    stored = self._fetch_shared_token(self.refresh_buffer)
+
+                self._access_token, self._token_expires_at = stored
+
+            # Time requests spent blocked on the lock or a refresh
+            self.token_wait_seconds += time.monotonic() - started
             return self._access_token
 
+    def start_background_refresh(self):
+        """Refresh the token in a daemon thread before it enters refresh_buffer"""
+        with self._lock:
+            if self._refresher and self._refresher.is_alive():
+                return
+            self._refresher = Thread(
+                target=self._background_refresh_loop,
+                name="onence-token-refresh",
+                daemon=True
+            )
+            self._refresher.start()
+
+    def _background_refresh_loop(self):
+        """Keep the token fresh so no request pays token latency"""
+        # Refresh this long before the token would be considered expired
+        lead = self.refresh_buffer + self.refresh_lead
+
+        while True:
+            try:
+                stored = self._load_stored_token(lead) or self._fetch_shared_token(lead)
+
+                # Swap the token in without holding the lock during the fetch
+                with self._lock:
+                    if not self._token_expires_at or stored[1] > self._token_expires_at:
+                        self._access_token, self._token_expires_at = stored
+
+                wait = max(1.0, (stored[1] - lead - datetime.now()).total_seconds())
+            except Exception as e:
+                logger.error(f"Background token refresh failed: {e}")
+                wait = 30.0
+            time.sleep(wait)
+
     def get_auth_headers(self) -> dict:
         """Get headers with valid Bearer token"""
         token = self.get_token()
@@ -96,6 +172,26 @@ class OnceAuthManager:
     def invalidate_token(self):
         """Force token refresh on next request"""
         with self._lock:
+            if self._access_token:
+                self.token_store.clear(self._access_token)
             self._access_token = None
             self._token_expires_at = None
             logger.info("Token invalidated")
+
+
+_auth_manager: Optional[OnceAuthManager] = None
+_auth_manager_lock = RLock()
+
+
+def get_auth_manager() -> OnceAuthManager:
+    """Get the process-wide auth manager"""
+    global _auth_manager
+
+    with _auth_manager_lock:
+        if _auth_manager is None:
+            _auth_manager = OnceAuthManager(
+                username=config.ONENCE_USERNAME,
+                password=config.ONENCE_PASSWORD,
+                base_url=config.ONENCE_API_BASE_URL
+            )
+        return _auth_manager
@@ -0,0 +1,123 @@
+import copy
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+from typing import Optional, Dict, Any, Callable, Hashable, Tuple
+import logging
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """An upstream call other threads can wait on"""
+
+    def __init__(self):
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """
+    Thread-safe read-through cache with per-entry TTL, LRU eviction and
+    single-flight coalescing: concurrent misses for the same key share one
+    upstream call instead of each issuing their own.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._generation = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_fetch(self, key: Hashable, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, calling `fetch` at most once on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fetch()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                # Don't cache a response that raced with an invalidation
+                if flight.error is None and generation == self._generation:
+                    self._entries[key] = (time.monotonic() + ttl, flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+
+        return copy.deepcopy(flight.result)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches `predicate`"""
+        with self._lock:
+            self._generation += 1
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def invalidate_sim(self, iccid: str) -> int:
+        """Drop every cached response for one SIM"""
+        prefix = f'/v1/sims/{iccid}'
+        return self.invalidate(
+            lambda key: key[0] == prefix or key[0].startswith(prefix + '/')
+        )
+
+    def clear(self):
+        """Drop every entry"""
+        self.invalidate(lambda key: True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache shared by every API client"""
+    global _response_cache
+
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(max_entries=config.API_CACHE_MAX_ENTRIES)
+        return _response_cache
@@ -1,9 +1,17 @@
 import requests
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 import logging
+import time
 from datetime import datetime, timedelta
 
-from src.api.auth_manager import OnceAuthManager
+from src.api.async_client import run_batch
+from src.api.auth_manager import get_auth_manager
+from src.api.cache import get_response_cache
+from src.api.endpoints import endpoint_template
+from src.api.metrics import get_api_metrics
+from src.api.rate_limiter import get_rate_limiter
+from src.api.resilience import RequestRetry, get_circuit_breaker
 from src.config import config
 
 logger = logging.getLogger(__name__)
@@ -12,44 +20,95 @@ logger = logging.getLogger(__name__)
 class OnceAPIClient:
     """Complete 1NCE API client with automatic authentication"""
 
-    def __init__(self):
-        self.auth_manager = OnceAuthManager(
-            username=config.ONENCE_USERNAME,
-            password=config.ONENCE_PASSWORD,
-            base_url=config.ONENCE_API_BASE_URL
-        )
+    def __init__(self, use_cache: bool = True):
+        # Shared by every client in the process
+        self.auth_manager = get_auth_manager()
         self.base_url = config.ONENCE_API_BASE_URL
         self.session = requests.Session()
+        self.rate_limiter = get_rate_limiter()
+        self.circuit_breaker = get_circuit_breaker()
+        self.cache = get_response_cache() if use_cache and config.API_CACHE_ENABLED else None
+        self.metrics = get_api_metrics()
 
-    def _make_request(
+    def _timed_request(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        **kwargs
+    ) -> requests.Response:
+        """Send one HTTP request and record its latency and size"""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, headers=headers, timeout=30, **kwargs
+            )
+        except requests.exceptions.RequestException:
+            self.metrics.record_request(key, None, time.perf_counter() - started)
+            raise
+
+        body = response.request.body or b''
+        self.metrics.record_request(
+            key,
+            response.status_code,
+            time.perf_counter() - started,
+            bytes_sent=len(body),
+            bytes_received=len(response.content)
+        )
+        return response
+
+    def _send(
         self,
         method: str,
         endpoint: str,
         **kwargs
-    ) -> Dict[str, Any]:
-        """Make authenticated request with automatic retry on auth failure"""
+    ) -> requests.Response:
+        """Send authenticated request, retrying auth failures, throttling and transient errors"""
         url = f"{self.base_url}{endpoint}"
         headers = self.auth_manager.get_auth_headers()
 
         if 'headers' in kwargs:
             headers.update(kwargs.pop('headers'))
 
+        retry = RequestRetry(method, endpoint, self.circuit_breaker, self.rate_limiter, self.metrics)
+
         try:
-            response = self.session.request(
-                method, url, headers=headers, timeout=30, **kwargs
-            )
+            while True:
+                trial = self.circuit_breaker.before_request()
+                delay = None
+                try:
+                    self.rate_limiter.acquire()
+                    retry.start_attempt()
+                    try:
+                        response = self._timed_request(retry.key, method, url, headers, **kwargs)
 
-            # Handle 401 Unauthorized
-            if response.status_code == 401:
-                logger.warning("Received 401, invalidating token and retrying...")
-                self.auth_manager.invalidate_token()
-                headers = self.auth_manager.get_auth_headers()
-                response = self.session.request(
-                    method, url, headers=headers, timeout=30, **kwargs
-                )
+                        # Handle 401 Unauthorized
+                        if response.status_code == 401:
+                            retry.unauthorized(self.auth_manager)
+                            headers = self.auth_manager.get_auth_headers()
+                            response = self._timed_request(retry.key, method, url, headers, **kwargs)
+                    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                        delay = retry.transport_error(e, isinstance(e, requests.exceptions.Timeout))
+                        if delay is None:
+                            raise
+                    finally:
+                        self.rate_limiter.release()
+                except BaseException:
+                    # A trial that ended without an outcome must not wedge the breaker
+                    self.circuit_breaker.release_trial(trial)
+                    raise
+
+                if delay is None:
+                    delay = retry.response(response.status_code, response.headers.get('Retry-After'))
+                    if delay is None:
+                        break
+
+                # Back off without holding a rate limiter slot
+                time.sleep(delay)
 
             response.raise_for_status()
-            return response.json() if response.text else {}
+            return response
 
         except requests.exceptions.HTTPError as e:
             logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
@@ -58,12 +117,98 @@ class OnceAPIClient:
             logger.error(f"Request failed: {e}")
             raise
 
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Make authenticated request and return the decoded JSON body"""
+        ttl = config.API_CACHE_TTL_SECONDS.get(endpoint_template(endpoint))
+
+        if self.cache and method == 'GET' and ttl:
+            params = kwargs.get('params') or {}
+            key = (endpoint, tuple(sorted(params.items())))
+            return self.cache.get_or_fetch(
+                key, ttl, lambda: self._decode(self._send(method, endpoint, **kwargs))
+            )
+
+        return self._decode(self._send(method, endpoint, **kwargs))
+
+    @staticmethod
+    def _decode(response: requests.Response) -> Dict[str, Any]:
+        return response.json() if response.text else {}
+
+    def invalidate_sim_cache(self, iccid: str):
+        """Drop cached responses for a SIM; called after every mutation"""
+        if self.cache:
+            self.cache.invalidate_sim(iccid)
+
     # ===== SIM Management Methods =====
 
     def get_all_sims(self) -> Dict[str, Any]:
         """Get all SIMs"""
         return self._make_request('GET', '/v1/sims')
 
+    def get_sims_page(
+        self,
+        page: int,
+        page_size: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Get one page of SIMs and the total page count (if reported)"""
+        response = self._send(
+            'GET', '/v1/sims', params={'page': page, 'pageSize': page_size}
+        )
+        sims = response.json() if response.text else []
+        total_pages = response.headers.get('X-Total-Pages')
+        return sims, int(total_pages) if total_pages else None
+
+    def iter_sim_pages(
+        self,
+        page_size: Optional[int] = None,
+        prefetch: bool = True,
+        start_page: int = 1
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over /v1/sims one page at a time.
+
+        With prefetch enabled the next page is downloaded in the background
+        while the caller processes the current one.
+        """
+        page_size = page_size or config.SIM_SYNC_PAGE_SIZE
+        page = start_page
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.get_sims_page, page, page_size)
+
+            while future is not None:
+                sims, total_pages = future.result()
+
+                if total_pages is not None:
+                    has_more = page < total_pages
+                else:
+                    has_more = len(sims) >= page_size
+
+                future = None
+                if has_more and prefetch:
+                    future = executor.submit(self.get_sims_page, page + 1, page_size)
+
+                if sims:
+                    yield sims
+
+                if has_more and not prefetch:
+                    future = executor.submit(self.get_sims_page, page + 1, page_size)
+                page += 1
+
+    def iter_sims(
+        self,
+        page_size: Optional[int] = None,
+        prefetch: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over all SIMs, fetching /v1/sims page by page"""
+        for sims in self.iter_sim_pages(page_size=page_size, prefetch=prefetch):
+            yield from sims
+
     def get_sim(self, iccid: str) -> Dict[str, Any]:
         """Get single SIM details"""
         return self._make_request('GET', f'/v1/sims/{iccid}')
@@ -109,6 +254,29 @@ class OnceAPIClient:
         return self._make_request('GET', f'/v1/sims/{iccid}/events')
 
     # Bulk operations
+    def iter_batch(
+        self,
+        method: str,
+        iccids: Iterable[str],
+        *args,
+        max_concurrency: Optional[int] = None,
+        latencies: Optional[List[float]] = None,
+        **kwargs
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Call an AsyncOnceAPIClient method for many ICCIDs concurrently,
+        yielding (iccid, result) pairs as each call completes
+        """
+        return run_batch(
+            method,
+            iccids,
+            *args,
+            max_concurrency=max_concurrency,
+            auth_manager=self.auth_manager,
+            latencies=latencies,
+            **kwargs
+        )
+
     def get_usage_for_multiple_sims(
         self,
         iccids: list,
@@ -116,34 +284,42 @@ class OnceAPIClient:
         end_date: str
     ) -> Dict[str, Dict[str, Any]]:
         """Get usage for multiple SIMs"""
-        results = {}
-        for iccid in iccids:
-            try:
-                results[iccid] = self.get_sim_usage(iccid, start_date, end_date)
-            except Exception as e:
-                logger.error(f"Failed to get usage for {iccid}: {e}")
-                results[iccid] = {"error": str(e)}
-        return results
+        return dict(self.iter_batch('get_sim_usage', iccids, start_date, end_date))
 
     # SIM Management Operations
     def update_sim_label(self, iccid: str, label: str) -> Dict[str, Any]:
         """Update SIM card label"""
         payload = {"label": label}
-        return self._make_request('PATCH', f'/v1/sims/{iccid}', json=payload)
+        try:
+            return self._make_request('PATCH', f'/v1/sims/{iccid}', json=payload)
+        finally:
+            self.invalidate_sim_cache(iccid)
 
     def enable_sim(self, iccid: str) -> Dict[str, Any]:
         """Enable SIM card"""
-        return self._make_request('POST', f'/v1/sims/{iccid}/enable')
+        try:
+            return self._make_request('POST', f'/v1/sims/{iccid}/enable')
+        finally:
+            self.invalidate_sim_cache(iccid)
 
     def disable_sim(self, iccid: str) -> Dict[str, Any]:
         """Disable SIM card"""
-        return self._make_request('POST', f'/v1/sims/{iccid}/disable')
+        try:
+            return self._make_request('POST', f'/v1/sims/{iccid}/disable')
+        finally:
+            self.invalidate_sim_cache(iccid)
 
     def set_imei_lock(self, iccid: str, imei: str) -> Dict[str, Any]:
         """Set IMEI lock for SIM"""
         payload = {"imei": imei}
-        return self._make_request('POST', f'/v1/sims/{iccid}/imei_lock', json=payload)
+        try:
+            return self._make_request('POST', f'/v1/sims/{iccid}/imei_lock', json=payload)
+        finally:
+            self.invalidate_sim_cache(iccid)
 
     def remove_imei_lock(self, iccid: str) -> Dict[str, Any]:
         """Remove IMEI lock from SIM"""
-        return self._make_request('DELETE', f'/v1/sims/{iccid}/imei_lock')
+        try:
+            return self._make_request('DELETE', f'/v1/sims/{iccid}/imei_lock')
+        finally:
+            self.invalidate_sim_cache(iccid)
@@ -0,0 +1,15 @@
+import re
+
+# ICCIDs are 19-20 digits (optionally with a trailing Luhn digit)
+_ICCID_SEGMENT = re.compile(r'/v1/sims/[0-9]{18,22}(?=/|$)')
+
+
+def endpoint_template(endpoint: str) -> str:
+    """
+    Collapse a concrete endpoint path into its template
+
+    Example:
+        /v1/sims/8988228066612345678/usage -> /v1/sims/{iccid}/usage
+    """
+    path = endpoint.split('?', 1)[0]
+    return _ICCID_SEGMENT.sub('/v1/sims/{iccid}', path)
@@ -0,0 +1,206 @@
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Optional, Dict, Any, List, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class EndpointStats:
+    """Counters and latency histogram for one endpoint template"""
+
+    requests: int = 0
+    retries: int = 0
+    auth_refreshes: int = 0
+    throttled: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency_sum: float = 0.0
+    latency_max: float = 0.0
+    # One count per bucket plus the +Inf overflow
+    latency_buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate latency quantile (upper bound of the matching bucket)"""
+        if not self.requests:
+            return None
+        target = q * self.requests
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.latency_max
+
+
+class APIMetrics:
+    """Per-endpoint request, retry, error and latency metrics for the 1NCE API"""
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._lock = Lock()
+
+    def _stats(self, key: str) -> EndpointStats:
+        stats = self._endpoints.get(key)
+        if stats is None:
+            stats = self._endpoints[key] = EndpointStats()
+        return stats
+
+    def record_request(
+        self,
+        key: str,
+        status_code: Optional[int],
+        duration: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0
+    ):
+        """Record one HTTP exchange; status_code is None for transport errors"""
+        with self._lock:
+            stats = self._stats(key)
+            stats.requests += 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency_sum += duration
+            stats.latency_max = max(stats.latency_max, duration)
+
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    stats.latency_buckets[i] += 1
+                    break
+            else:
+                stats.latency_buckets[-1] += 1
+
+            if status_code == 429:
+                stats.throttled += 1
+            elif status_code is None or (status_code >= 400 and status_code != 401):
+                stats.errors += 1
+
+    def record_retry(self, key: str):
+        with self._lock:
+            self._stats(key).retries += 1
+
+    def record_auth_refresh(self, key: str):
+        with self._lock:
+            self._stats(key).auth_refreshes += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint metrics for display"""
+        with self._lock:
+            return {
+                key: {
+                    'requests': stats.requests,
+                    'retries': stats.retries,
+                    'auth_refreshes': stats.auth_refreshes,
+                    'throttled': stats.throttled,
+                    'errors': stats.errors,
+                    'bytes_sent': stats.bytes_sent,
+                    'bytes_received': stats.bytes_received,
+                    'total_seconds': round(stats.latency_sum, 3),
+                    'avg_ms': round(stats.latency_sum / stats.requests * 1000, 1) if stats.requests else None,
+                    'p50_ms': _ms(stats.quantile(0.5)),
+                    'p95_ms': _ms(stats.quantile(0.95)),
+                    'max_ms': _ms(stats.latency_max),
+                }
+                for key, stats in sorted(self._endpoints.items())
+            }
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def header(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        counters = (
+            ('requests', 'Requests sent'),
+            ('retries', 'Requests retried after a transient failure'),
+            ('auth_refreshes', 'Token refreshes after a 401'),
+            ('throttled', 'Responses with status 429'),
+            ('errors', 'Failed requests (transport errors and 4xx/5xx)'),
+            ('bytes_sent', 'Request body bytes sent'),
+            ('bytes_received', 'Response body bytes received'),
+        )
+
+        with self._lock:
+            items = sorted(self._endpoints.items())
+
+            for field_name, help_text in counters:
+                name = f"onence_api_{field_name}_total"
+                header(name, 'counter', help_text)
+                for key, stats in items:
+                    lines.append(f'{name}{{{_labels(key)}}} {getattr(stats, field_name)}')
+
+            name = 'onence_api_request_duration_seconds'
+            header(name, 'histogram', 'Request latency')
+            for key, stats in items:
+                labels = _labels(key)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.requests}')
+                lines.append(f'{name}_sum{{{labels}}} {stats.latency_sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {stats.requests}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _labels(key: str) -> str:
+    method, endpoint = key.split(' ', 1)
+    return f'method="{method}",endpoint="{endpoint}"'
+
+
+_api_metrics = APIMetrics()
+
+
+def get_api_metrics() -> APIMetrics:
+    """Get the process-wide API metrics registry"""
+    return _api_metrics
+
+
+def start_metrics_server(port: int, extra: Optional[Callable[[], str]] = None) -> ThreadingHTTPServer:
+    """
+    Serve /metrics in the Prometheus text format from a daemon thread.
+    `extra` may return additional exposition lines (e.g. gauges).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            body = _api_metrics.render_prometheus()
+            if extra:
+                body += extra()
+            payload = body.encode()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving API metrics on :{port}/metrics")
+    return server
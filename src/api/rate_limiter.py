@@ -0,0 +1,212 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Optional, Dict, Any
+import logging
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate and concurrency are adjusted with AIMD.
+
+    Every successful response additively raises the request rate and the
+    concurrency limit; a 429 halves both and blocks all callers until the
+    provider's Retry-After has passed. Further 429s within
+    `decrease_cooldown` seconds (responses to requests that were already in
+    flight) do not decrease the rate again. The limiter is thread-safe and can be
+    awaited from asyncio code, so sync and async clients share one budget.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        max_concurrency: int,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 2.0
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+
+        self._rate = min(max(rate, min_rate), max_rate)
+        self._concurrency_limit = float(max_concurrency)
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._decrease_until = 0.0
+        self._throttle_count = 0
+        self._last_retry_after: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current allowed requests per second"""
+        return self._rate
+
+    def _refill(self, now: float):
+        """Add tokens accrued since the last refill (burst capped at one second)"""
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(max(self._rate, 1.0), self._tokens + elapsed * self._rate)
+
+    def _try_acquire(self) -> float:
+        """Take a token and a concurrency slot, or return how long to wait"""
+        with self._lock:
+            now = time.monotonic()
+
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            self._refill(now)
+
+            if self._in_flight >= int(self._concurrency_limit):
+                return 0.01
+
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self._in_flight += 1
+                return 0.0
+
+            return (1.0 - self._tokens) / self._rate
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be sent"""
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def cap(self, max_rate: float):
+        """
+        Lower the rate ceiling, e.g. to leave API budget for other clients.
+        A cap below min_rate lowers the floor with it.
+        """
+        if max_rate <= 0:
+            raise ValueError(f"Rate cap must be positive, got {max_rate}")
+        with self._lock:
+            self.max_rate = min(self.max_rate, max_rate)
+            self.min_rate = min(self.min_rate, self.max_rate)
+            self._rate = min(self._rate, self.max_rate)
+
+    def release(self):
+        """Return the concurrency slot taken by acquire()"""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def record_success(self):
+        """Additive increase after a response that was not throttled"""
+        with self._lock:
+            # Roughly +increase_step per second of traffic at the current rate
+            self._rate = min(
+                self.max_rate,
+                self._rate + self.increase_step / max(self._rate, 1.0)
+            )
+            self._concurrency_limit = min(
+                float(self.max_concurrency),
+                self._concurrency_limit + 1.0 / max(self._concurrency_limit, 1.0)
+            )
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease after a 429, honoring Retry-After"""
+        with self._lock:
+            now = time.monotonic()
+            self._throttle_count += 1
+            self._last_retry_after = retry_after
+
+            # 429s from requests already in flight when the first one arrived
+            # count once, even when the back-off itself is shorter than their
+            # round trip (no Retry-After)
+            if now >= self._decrease_until:
+                self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+                self._concurrency_limit = max(
+                    1.0, self._concurrency_limit * self.decrease_factor
+                )
+
+            backoff = retry_after if retry_after is not None else 1.0 / self._rate
+            self._blocked_until = max(self._blocked_until, now + backoff)
+            self._decrease_until = max(
+                self._decrease_until, now + max(backoff, self.decrease_cooldown)
+            )
+            self._tokens = 0.0
+
+            logger.warning(
+                f"Rate limited by 1NCE API, backing off {backoff:.1f}s "
+                f"(rate now {self._rate:.2f} req/s, concurrency {int(self._concurrency_limit)})"
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current rate and back-off state"""
+        with self._lock:
+            backoff_remaining = max(0.0, self._blocked_until - time.monotonic())
+            return {
+                'rate_per_second': round(self._rate, 3),
+                'max_rate_per_second': self.max_rate,
+                'concurrency_limit': int(self._concurrency_limit),
+                'in_flight': self._in_flight,
+                'backing_off': backoff_remaining > 0,
+                'backoff_remaining_seconds': round(backoff_remaining, 3),
+                'throttle_count': self._throttle_count,
+                'last_retry_after': self._last_retry_after,
+            }
+
+
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_rate_limiter_lock = Lock()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Get the process-wide rate limiter shared by every API client"""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter(
+                rate=config.API_RATE_LIMIT_PER_SECOND,
+                min_rate=config.API_RATE_LIMIT_MIN_PER_SECOND,
+                max_rate=config.API_RATE_LIMIT_MAX_PER_SECOND,
+                max_concurrency=config.API_MAX_CONCURRENCY,
+                decrease_cooldown=config.API_THROTTLE_COOLDOWN_SECONDS
+            )
+        return _rate_limiter
@@ -0,0 +1,273 @@
+import random
+import time
+from dataclasses import dataclass, field, replace
+from threading import Lock
+from typing import Optional, Dict, Any, FrozenSet
+import logging
+
+from src.api.endpoints import endpoint_template
+from src.api.metrics import APIMetrics
+from src.api.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+# Statuses where the request most likely never reached the application,
+# so even non-idempotent mutations are safe to resend
+GATEWAY_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised when the 1NCE API circuit breaker is open and calls fail fast"""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry policy with exponential backoff and full jitter"""
+
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    retry_statuses: FrozenSet[int] = RETRYABLE_STATUS_CODES
+    retry_on_timeout: bool = True
+
+    def should_retry_status(self, status_code: int, attempt: int) -> bool:
+        """Whether a response with this status should be retried after `attempt` tries"""
+        return attempt < self.max_attempts and status_code in self.retry_statuses
+
+    def should_retry_error(self, timed_out: bool, attempt: int) -> bool:
+        """Whether a transport error should be retried after `attempt` tries"""
+        if attempt >= self.max_attempts:
+            return False
+        return self.retry_on_timeout or not timed_out
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before the next attempt (full jitter)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+def _default_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=config.API_RETRY_MAX_ATTEMPTS,
+        base_delay=config.API_RETRY_BASE_DELAY_SECONDS,
+        max_delay=config.API_RETRY_MAX_DELAY_SECONDS
+    )
+
+
+def get_retry_policy(method: str, endpoint: str) -> RetryPolicy:
+    """
+    Get the retry policy for a request.
+
+    Reads are retried on 5xx and timeouts. Mutations are only retried when
+    the request most likely never reached the API (connection errors and
+    gateway statuses). Attempts can be overridden per endpoint with
+    API_RETRY_ENDPOINT_ATTEMPTS, keyed like "GET /v1/sims/{iccid}/usage".
+    """
+    method = method.upper()
+    key = f"{method} {endpoint_template(endpoint)}"
+    policy = _default_policy()
+
+    if method != 'GET':
+        policy = replace(
+            policy,
+            retry_statuses=GATEWAY_STATUS_CODES,
+            retry_on_timeout=False
+        )
+
+    if key in config.API_RETRY_ENDPOINT_ATTEMPTS:
+        policy = replace(policy, max_attempts=config.API_RETRY_ENDPOINT_ATTEMPTS[key])
+
+    return policy
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Circuit breaker for the 1NCE API.
+
+    After `failure_threshold` consecutive failures (5xx, timeouts,
+    connection errors) the circuit opens and every call fails fast with
+    CircuitOpenError. After `reset_timeout` seconds a single trial call is
+    let through; its outcome closes or re-opens the circuit.
+    """
+
+    failure_threshold: int
+    reset_timeout: float
+    state: str = 'closed'
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None
+    trial_in_flight: bool = False
+    open_count: int = 0
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def before_request(self) -> Optional[int]:
+        """
+        Raise CircuitOpenError unless a request may be sent now. Returns a
+        trial token when this request is the half-open trial, which must be
+        passed to release_trial() once the request is over.
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return None
+
+            now = time.monotonic()
+            if self.state == 'open' and now - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.trial_in_flight = False
+                logger.info("1NCE API circuit half-open, sending trial request")
+
+            if self.state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return self.open_count
+
+            retry_in = max(0.0, self.reset_timeout - (now - self.opened_at))
+            raise CircuitOpenError(
+                f"1NCE API circuit is open, failing fast (retry in {retry_in:.0f}s)"
+            )
+
+    def release_trial(self, trial: Optional[int]):
+        """
+        End a half-open trial that finished without recording an outcome
+        (auth errors, cancellation, ...) so the next call can be the trial
+        """
+        if trial is None:
+            return
+        with self._lock:
+            if self.state == 'half_open' and self.trial_in_flight and self.open_count == trial:
+                self.trial_in_flight = False
+
+    def record_success(self):
+        """Close the circuit after a call the API answered properly"""
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("1NCE API circuit closed")
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit when the threshold is hit"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+
+            if self.state == 'half_open' or (
+                self.state == 'closed'
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self.open_count += 1
+                logger.error(
+                    f"1NCE API circuit opened after {self.consecutive_failures} "
+                    f"consecutive failures, failing fast for {self.reset_timeout:.0f}s"
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current breaker state"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'open_count': self.open_count,
+            }
+
+
+class RequestRetry:
+    """
+    Retry decisions for one API request, shared by the sync and async
+    clients.
+
+    Feeds every outcome to the circuit breaker, rate limiter and metrics
+    and says how long to wait before the next attempt (None: stop
+    retrying). The clients only send, sleep and resend, and must release
+    their rate limiter slot before sleeping.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        endpoint: str,
+        circuit_breaker: CircuitBreaker,
+        rate_limiter: AdaptiveRateLimiter,
+        metrics: APIMetrics
+    ):
+        self.method = method
+        self.endpoint = endpoint
+        self.key = f"{method} {endpoint_template(endpoint)}"
+        self.policy = get_retry_policy(method, endpoint)
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.attempt = 0
+        self.throttled = 0
+
+    def start_attempt(self):
+        """Count a request about to be sent"""
+        self.attempt += 1
+
+    def unauthorized(self, auth_manager):
+        """Drop the rejected token; the caller resends once with fresh headers"""
+        logger.warning("Received 401, invalidating token and retrying...")
+        self.metrics.record_auth_refresh(self.key)
+        auth_manager.invalidate_token()
+
+    def transport_error(self, error: Exception, timed_out: bool) -> Optional[float]:
+        """Record a timeout or connection error; seconds to back off, or None to give up"""
+        self.circuit_breaker.record_failure()
+        if not self.policy.should_retry_error(timed_out, self.attempt):
+            return None
+
+        delay = self.policy.delay(self.attempt)
+        logger.warning(f"{self.method} {self.endpoint} failed ({error!r}), retrying in {delay:.1f}s")
+        self.metrics.record_retry(self.key)
+        return delay
+
+    def response(self, status_code: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """Record an answered request; seconds to wait before retrying, or None if it is final"""
+        # Throttling is a healthy answer; the rate limiter does the waiting
+        # and throttled retries don't use up attempts
+        if status_code == 429:
+            self.circuit_breaker.record_success()
+            self.rate_limiter.record_throttle(parse_retry_after(retry_after))
+            if self.throttled >= config.API_THROTTLE_MAX_RETRIES:
+                return None
+            self.metrics.record_retry(self.key)
+            self.throttled += 1
+            self.attempt -= 1
+            return 0.0
+
+        if status_code >= 500:
+            self.circuit_breaker.record_failure()
+            if not self.policy.should_retry_status(status_code, self.attempt):
+                return None
+            delay = self.policy.delay(self.attempt)
+            logger.warning(
+                f"{self.method} {self.endpoint} returned {status_code}, retrying in {delay:.1f}s"
+            )
+            self.metrics.record_retry(self.key)
+            return delay
+
+        self.circuit_breaker.record_success()
+        self.rate_limiter.record_success()
+        return None
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+_circuit_breaker_lock = Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the process-wide circuit breaker shared by every API client"""
+    global _circuit_breaker
+
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker(
+                failure_threshold=config.API_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=config.API_CIRCUIT_RESET_SECONDS
+            )
+        return _circuit_breaker
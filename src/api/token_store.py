@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Tuple, Iterator
+import logging
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+StoredToken = Tuple[str, datetime]
+
+
+class TokenStore:
+    """In-process token store; base class for the shared stores"""
+
+    def __init__(self):
+        self._token: Optional[StoredToken] = None
+        self._lock = Lock()
+
+    def load(self) -> Optional[StoredToken]:
+        """Get the stored (access_token, expires_at), if any"""
+        return self._token
+
+    def save(self, access_token: str, expires_at: datetime):
+        """Store a freshly obtained token"""
+        self._token = (access_token, expires_at)
+
+    def clear(self, access_token: Optional[str] = None):
+        """Remove the stored token (only if it is still `access_token`, when given)"""
+        if access_token is None or (self._token and self._token[0] == access_token):
+            self._token = None
+
+    @contextmanager
+    def refresh_lock(self) -> Iterator[None]:
+        """Hold the lock that serialises token refreshes"""
+        with self._lock:
+            yield
+
+
+class RedisTokenStore(TokenStore):
+    """Token store shared by every process through Redis"""
+
+    def __init__(self, redis_url: str, key: str):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=2)
+        self._redis.ping()
+        self.key = key
+
+    def load(self) -> Optional[StoredToken]:
+        raw = self._redis.get(self.key)
+        if not raw:
+            return None
+        data = json.loads(raw)
+        return data['access_token'], datetime.fromtimestamp(data['expires_at'])
+
+    def save(self, access_token: str, expires_at: datetime):
+        ttl = max(1, int(expires_at.timestamp() - time.time()))
+        payload = json.dumps({
+            'access_token': access_token,
+            'expires_at': expires_at.timestamp()
+        })
+        self._redis.set(self.key, payload, ex=ttl)
+
+    def clear(self, access_token: Optional[str] = None):
+        stored = self.load()
+        if stored and (access_token is None or stored[0] == access_token):
+            self._redis.delete(self.key)
+
+    @contextmanager
+    def refresh_lock(self) -> Iterator[None]:
+        from redis.exceptions import LockError
+
+        lock = self._redis.lock(f"{self.key}:lock", timeout=30, blocking_timeout=15)
+        acquired = lock.acquire()
+        if not acquired:
+            logger.warning("Timed out waiting for token refresh lock, refreshing anyway")
+        try:
+            yield
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except LockError:
+                    pass
+
+
+class FileTokenStore(TokenStore):
+    """Token store shared by processes on one host through a locked file"""
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = path
+        self.lock_path = path.with_suffix(path.suffix + '.lock')
+
+    def load(self) -> Optional[StoredToken]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return data['access_token'], datetime.fromtimestamp(data['expires_at'])
+
+    def save(self, access_token: str, expires_at: datetime):
+        payload = json.dumps({
+            'access_token': access_token,
+            'expires_at': expires_at.timestamp()
+        })
+        # Write atomically and keep the token readable by this user only
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix='.token-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+    def clear(self, access_token: Optional[str] = None):
+        stored = self.load()
+        if stored and (access_token is None or stored[0] == access_token):
+            self.path.unlink(missing_ok=True)
+
+    @contextmanager
+    def refresh_lock(self) -> Iterator[None]:
+        import fcntl
+
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def create_token_store(username: str) -> TokenStore:
+    """
+    Create the token store configured by TOKEN_STORE_BACKEND
+    ('redis', 'file' or 'memory'). Falls back to the file store when
+    Redis is unreachable.
+    """
+    backend = config.TOKEN_STORE_BACKEND.lower()
+    account = hashlib.sha256(username.encode()).hexdigest()[:16]
+
+    if backend == 'redis':
+        try:
+            return RedisTokenStore(config.REDIS_URL, f"onence:token:{account}")
+        except Exception as e:
+            logger.warning(f"Redis token store unavailable ({e}), using file store")
+            backend = 'file'
+
+    if backend == 'file':
+        directory = Path(config.TOKEN_STORE_DIR or tempfile.gettempdir())
+        directory.mkdir(parents=True, exist_ok=True)
+        return FileTokenStore(directory / f"onence_token_{account}.json")
+
+    return TokenStore()
@@ -8,7 +8,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database.connection import get_db
-from src.database.models import SIMCard, UsageRecord
+from src.database.queries import (
+    count_low_quota_sims, count_sims, recently_updated_sims, total_data_usage
+)
 from src.utils.logger import setup_logging
 
 # Setup
@@ -52,10 +54,8 @@ def main():
 
         try:
             with get_db() as db:
-                total_sims = db.query(SIMCard).count()
-                active_sims = db.query(SIMCard).filter(
-                    SIMCard.status == 'Enabled'
-                ).count()
+                total_sims = count_sims(db)
+                active_sims = count_sims(db, 'Enabled')
 
                 st.metric("Total SIMs", total_sims)
                 st.metric("Active SIMs", active_sims)
@@ -69,31 +69,23 @@ def main():
         with get_db() as db:
             # Total SIMs
             with col1:
-                total = db.query(SIMCard).count()
+                total = count_sims(db)
                 st.metric("Total SIMs", f"{total:,}")
 
             # Active SIMs
             with col2:
-                active = db.query(SIMCard).filter(
-                    SIMCard.status == 'Enabled'
-                ).count()
+                active = count_sims(db, 'Enabled')
                 st.metric("Active SIMs", f"{active:,}")
 
             # Today's data usage
             with col3:
                 today = datetime.now().date()
-                usage_today = db.query(
-                    db.func.sum(UsageRecord.data_volume_mb)
-                ).filter(
-                    UsageRecord.date >= today
-                ).scalar() or 0
+                usage_today = total_data_usage(db, today)
                 st.metric("Today's Data Usage", f"{usage_today:.1f} MB")
 
             # Quota alerts
             with col4:
-                alerts = db.query(SIMCard).filter(
-                    SIMCard.quota_status_id.in_([1, 2])
-                ).count()
+                alerts = count_low_quota_sims(db)
                 st.metric("Quota Alerts", alerts)
 
     except Exception as e:
@@ -106,9 +98,7 @@ def main():
 
     try:
         with get_db() as db:
-            recent_sims = db.query(SIMCard).order_by(
-                SIMCard.updated_at.desc()
-            ).limit(10).all()
+            recent_sims = recently_updated_sims(db)
 
             if recent_sims:
                 df = pd.DataFrame([
@@ -134,32 +124,48 @@ def main():
 
     with col1:
         if st.button("🔄 Sync All SIMs", use_container_width=True):
-            with st.spinner("Syncing SIM data..."):
-                try:
-                    from src.services.data_collector import DataCollector
-                    collector = DataCollector()
-                    result = collector.sync_all_sims()
-                    st.success(f"✅ Synced {result['processed']} SIMs")
-                    if result['errors'] > 0:
-                        st.warning(f"⚠️ {result['errors']} SIMs had errors")
-                except Exception as e:
-                    st.error(f"❌ Sync failed: {str(e)}")
+            try:
+                from src.services.dispatcher import Dispatcher
+                if Dispatcher().dispatch_full_sync():
+                    st.success("✅ Full sync queued for the collection workers")
+                else:
+                    st.info("ℹ️ A full sync is already queued or running")
+            except Exception as e:
+                st.error(f"❌ Could not queue sync: {str(e)}")
 
     with col2:
         if st.button("📊 Collect Usage Data", use_container_width=True):
-            with st.spinner("Collecting usage data..."):
+            with st.spinner("Queueing usage collection..."):
                 try:
-                    from src.services.data_collector import DataCollector
-                    collector = DataCollector()
-                    collector.collect_all_usage_data(days_back=7)
-                    st.success("✅ Usage data collected successfully")
+                    from src.services.dispatcher import Dispatcher
+                    result = Dispatcher().dispatch_usage(days_back=7)
+                    st.success(
+                        f"✅ Queued {result['queued']} tasks for {result['sims']} SIMs"
+                    )
+                    if result['in_flight'] > 0:
+                        st.info(f"ℹ️ {result['in_flight']} SIM batches are already being collected")
                 except Exception as e:
-                    st.error(f"❌ Collection failed: {str(e)}")
+                    st.error(f"❌ Could not queue collection: {str(e)}")
 
     with col3:
         if st.button("📈 View Reports", use_container_width=True):
             st.info("Navigate to Reports page in the sidebar")
 
+    # API client metrics for this dashboard process
+    with st.expander("📡 1NCE API Metrics"):
+        from src.api.metrics import get_api_metrics
+        from src.api.rate_limiter import get_rate_limiter
+
+        api_metrics = get_api_metrics().snapshot()
+        if api_metrics:
+            st.dataframe(
+                pd.DataFrame.from_dict(api_metrics, orient='index'),
+                use_container_width=True
+            )
+        else:
+            st.info("No API calls made from this dashboard process yet")
+        st.json(get_rate_limiter().snapshot())
+
     # Footer
     st.markdown("---")
     st.markdown(
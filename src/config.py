@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Optional, Dict
 
 
 class Settings(BaseSettings):
@@ -15,6 +15,28 @@ class Settings(BaseSettings):
     ONENCE_USERNAME: str
     ONENCE_PASSWORD: str
     ONENCE_API_BASE_URL: str = "https://api.1nce.com/management-api"
+    API_MAX_CONCURRENCY: int = 20
+    API_RATE_LIMIT_PER_SECOND: float = 10.0
+    API_RATE_LIMIT_MIN_PER_SECOND: float = 0.5
+    API_RATE_LIMIT_MAX_PER_SECOND: float = 50.0
+    API_THROTTLE_MAX_RETRIES: int = 5
+    API_THROTTLE_COOLDOWN_SECONDS: float = 2.0  # 429s within this window decrease the rate once
+    API_RETRY_MAX_ATTEMPTS: int = 4
+    API_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    API_RETRY_MAX_DELAY_SECONDS: float = 10.0
+    API_RETRY_ENDPOINT_ATTEMPTS: Dict[str, int] = {}
+    API_CIRCUIT_FAILURE_THRESHOLD: int = 10
+    API_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Read-through cache for GET endpoints (TTL in seconds per endpoint template)
+    API_CACHE_ENABLED: bool = True
+    API_CACHE_MAX_ENTRIES: int = 5000
+    API_CACHE_TTL_SECONDS: Dict[str, float] = {
+        '/v1/sims/{iccid}': 60,
+        '/v1/sims/{iccid}/status': 30,
+        '/v1/sims/{iccid}/quota/data': 60,
+        '/v1/sims/{iccid}/quota/sms': 60,
+    }
 
     # Database
     DATABASE_URL: str
@@ -22,14 +44,68 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # Token sharing between processes: redis, file or memory
+    TOKEN_STORE_BACKEND: str = "redis"
+    TOKEN_STORE_DIR: Optional[str] = None
+    # Refresh the token in a background thread; only worker processes start it
+    AUTH_BACKGROUND_REFRESH: bool = False
+
     # Application
     ENVIRONMENT: str = "development"
     LOG_LEVEL: str = "INFO"
     SECRET_KEY: str = "change-me-in-production"
 
+    # Worker Prometheus scrape endpoint (0 disables it)
+    METRICS_PORT: int = 9108
+
+    # Profiler reports written by `worker.py --profile`
+    PROFILE_DIR: str = "profiles"
+
     # Data Collection
     DATA_COLLECTION_INTERVAL_MINUTES: int = 60
+    SIM_SYNC_PAGE_SIZE: int = 100
+    FULL_SYNC_STALE_MINUTES: int = 10
+    FULL_SYNC_RESUME_HOURS: int = 6  # Older interrupted syncs start over
+    USAGE_WRITE_BATCH_SIZE: int = 2000
+    USAGE_COPY_BATCH_SIZE: int = 50000
     USAGE_RETENTION_DAYS: int = 180
+    USAGE_RECHECK_DAYS: int = 2
+    USAGE_IDLE_DAYS: int = 30
+    USAGE_COLLECTION_WORKERS: int = 4
+    USAGE_WORKER_BATCH_SIZE: int = 1000
+    BACKFILL_CHUNK_DAYS: int = 30
+    CONNECTIVITY_INTERVAL_MINUTES: int = 60
+    CONNECTIVITY_WRITE_BATCH_SIZE: int = 500
+    EVENTS_INTERVAL_MINUTES: int = 60
+    EVENTS_PAGE_SIZE: int = 100
+    EVENTS_MAX_PAGES: int = 10
+    EVENTS_WRITE_BATCH_SIZE: int = 2000
+    QUOTA_INTERVAL_MINUTES: int = 60
+    QUOTA_WRITE_BATCH_SIZE: int = 1000
+    # How far back to look for a SIM's latest quota snapshot when comparing readings
+    QUOTA_SNAPSHOT_LOOKBACK_DAYS: int = 7
+
+    # Adaptive per-SIM usage polling
+    ADAPTIVE_POLLING: bool = True
+    POLL_TICK_MINUTES: int = 5
+    API_CALL_BUDGET_PER_HOUR: int = 20000
+    # Share of the budget the fleet-wide connectivity, quota and event polls may use
+    BACKGROUND_BUDGET_SHARE: float = 0.5
+    POLL_INTERVAL_HOT_MINUTES: int = 10
+    POLL_INTERVAL_ACTIVE_MINUTES: int = 60
+    POLL_INTERVAL_IDLE_MINUTES: int = 360
+    POLL_INTERVAL_DORMANT_MINUTES: int = 1440
+    POLL_HOT_MB_PER_DAY: float = 100.0
+    POLL_VELOCITY_DAYS: int = 3
+    POLL_CLAIM_LEASE_MINUTES: int = 30  # Claimed SIMs not collected by then are due again
+
+    # Collection task queue: redis or postgres
+    TASK_QUEUE_BACKEND: str = "redis"
+    TASK_LEASE_SECONDS: int = 300
+    TASK_MAX_ATTEMPTS: int = 5
+    TASK_RETRY_BASE_SECONDS: float = 30.0
+    TASK_POLL_INTERVAL_SECONDS: float = 2.0
+    TASK_RETENTION_DAYS: int = 7
 
     # Alerts
     ENABLE_EMAIL_ALERTS: bool = False
@@ -22,6 +22,103 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Idempotent upgrades for databases created by older versions
+# (create_all only creates missing tables, it never alters existing ones)
+SCHEMA_UPGRADES = [
+    # usage_records: primary key must include the hypertable partition column
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = 'usage_records'::regclass AND i.indisprimary AND a.attname = 'date'
+        ) THEN
+            ALTER TABLE usage_records DROP CONSTRAINT IF EXISTS usage_records_pkey;
+            ALTER TABLE usage_records ADD PRIMARY KEY (id, date);
+        END IF;
+    END $$;
+    """,
+    # usage_records: one row per SIM and day (keep the newest duplicate)
+    """
+    DELETE FROM usage_records a USING usage_records b
+    WHERE a.sim_card_id = b.sim_card_id AND a.date = b.date AND a.id < b.id
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_indexes WHERE indexname = 'uq_usage_records_sim_date'
+      );
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_usage_records_sim_date ON usage_records (sim_card_id, date);",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS rows_inserted INTEGER DEFAULT 0;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS rows_updated INTEGER DEFAULT 0;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS rows_per_second DOUBLE PRECISION;",
+    # data_collection_logs: run profiling
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS sims_per_second DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS api_wait_seconds DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS auth_wait_seconds DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS parse_seconds DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS db_write_seconds DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS commit_seconds DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS latency_p50_ms DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS latency_p95_ms DOUBLE PRECISION;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS latency_max_ms DOUBLE PRECISION;",
+    # Unlogged staging table for COPY-based usage ingestion (see src/database/ingest.py)
+    """
+    CREATE UNLOGGED TABLE IF NOT EXISTS usage_records_staging (
+        seq BIGSERIAL,
+        batch_id TEXT NOT NULL,
+        sim_card_id INTEGER NOT NULL,
+        date TIMESTAMP NOT NULL,
+        data_volume_mb DOUBLE PRECISION,
+        data_volume_rx_mb DOUBLE PRECISION,
+        data_volume_tx_mb DOUBLE PRECISION,
+        sms_volume INTEGER,
+        sms_volume_mo INTEGER,
+        sms_volume_mt INTEGER,
+        created_at TIMESTAMP
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_usage_records_staging_batch ON usage_records_staging (batch_id);",
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS usage_collected_through TIMESTAMP;",
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS last_usage_at TIMESTAMP;",
+    # Change detection for SIM sync
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS payload_hash VARCHAR(64);",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS details JSON;",
+    "ALTER TABLE data_collection_logs ADD COLUMN IF NOT EXISTS checkpoint JSON;",
+    # Adaptive polling
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS poll_priority VARCHAR(10);",
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS next_poll_at TIMESTAMP;",
+    "CREATE INDEX IF NOT EXISTS ix_sim_cards_next_poll_at ON sim_cards (next_poll_at);",
+    # sim_events: natural key and a primary key that includes the hypertable partition column
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = 'sim_events'::regclass AND i.indisprimary AND a.attname = 'occurred_at'
+        ) THEN
+            ALTER TABLE sim_events DROP CONSTRAINT IF EXISTS sim_events_pkey;
+            ALTER TABLE sim_events ADD PRIMARY KEY (id, occurred_at);
+        END IF;
+    END $$;
+    """,
+    "ALTER TABLE sim_events ADD COLUMN IF NOT EXISTS event_key VARCHAR(64);",
+    "UPDATE sim_events SET event_key = 'legacy:' || id WHERE event_key IS NULL;",
+    "ALTER TABLE sim_events ALTER COLUMN event_key SET NOT NULL;",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_sim_events_natural_key ON sim_events (sim_card_id, occurred_at, event_key);",
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS events_cursor_at TIMESTAMP;",
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS events_backlog_page INTEGER;",
+    "ALTER TABLE sim_cards ADD COLUMN IF NOT EXISTS events_backlog_cursor TIMESTAMP;",
+]
+
+# Time-series tables and their partitioning column
+HYPERTABLES = {
+    'usage_records': 'date',
+    'sim_events': 'occurred_at',
+    'quota_snapshots': 'recorded_at',
+}
+
+
 def init_db():
     """Initialize database tables"""
     try:
@@ -32,25 +129,30 @@ def init_db():
             # Enable TimescaleDB
             conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE;"))
 
-            # Check if hypertable already exists
-            result = conn.execute(text("""
-                SELECT EXISTS (
-                    SELECT FROM timescaledb_information.hypertables
-                    WHERE hypertable_name = 'usage_records'
-                );
-            """))
-            hypertable_exists = result.scalar()
-
-            if not hypertable_exists:
-                # Create hypertable for usage_records
-                conn.execute(text("""
-                    SELECT create_hypertable(
-                        'usage_records',
-                        'date',
-                        if_not_exists => TRUE
+            # Bring existing tables up to date
+            for statement in SCHEMA_UPGRADES:
+                conn.execute(text(statement))
+
+            for table, time_column in HYPERTABLES.items():
+                # Check if hypertable already exists
+                result = conn.execute(text("""
+                    SELECT EXISTS (
+                        SELECT FROM timescaledb_information.hypertables
+                        WHERE hypertable_name = :table
                     );
-                """))
-                logger.info("Created TimescaleDB hypertable for usage_records")
+                """), {'table': table})
+                hypertable_exists = result.scalar()
+
+                if not hypertable_exists:
+                    conn.execute(text("""
+                        SELECT create_hypertable(
+                            :table,
+                            :time_column,
+                            if_not_exists => TRUE,
+                            migrate_data => TRUE
+                        );
+                    """), {'table': table, 'time_column': time_column})
+                    logger.info(f"Created TimescaleDB hypertable for {table}")
 
             conn.commit()
 
@@ -0,0 +1,431 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import List, Dict, Any, Tuple, Iterable
+from uuid import uuid4
+import logging
+
+from sqlalchemy import bindparam, case, func, literal_column, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.database.models import (
+    ConnectivityInterval, QuotaSnapshot, SIMCard, SIMEvent, SIMLocation, UsageRecord
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns kept when the API payload omits them instead of being nulled
+SIM_CARD_KEEP_EXISTING = ('activation_date', 'quota_status_id', 'quota_sms_status_id')
+
+
+def upsert_sim_cards(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert or update a batch of SIM cards in one statement
+
+    Every row must carry the same keys and `iccid` must be unique within
+    the batch (PostgreSQL cannot update one row twice per statement).
+    When rows carry `payload_hash`, SIMs whose stored hash already matches
+    are left untouched.
+    """
+    if not rows:
+        return 0
+
+    stmt = insert(SIMCard).values(rows)
+    excluded = stmt.excluded
+
+    updates = {}
+    for column in rows[0]:
+        if column in ('iccid', 'created_at'):
+            continue
+        if column in SIM_CARD_KEEP_EXISTING:
+            updates[column] = func.coalesce(excluded[column], SIMCard.__table__.c[column])
+        else:
+            updates[column] = excluded[column]
+
+    where = None
+    if 'payload_hash' in rows[0]:
+        where = SIMCard.__table__.c.payload_hash.is_distinct_from(excluded.payload_hash)
+
+    stmt = stmt.on_conflict_do_update(index_elements=['iccid'], set_=updates, where=where)
+    return db.execute(stmt).rowcount
+
+
+def set_sim_payload_hashes(db: Session, hashes: List[Dict[str, Any]]):
+    """
+    Store payload hashes for SIMs whose columns are already current
+
+    Each item has `iccid` and `payload_hash`. Used to backfill hashes
+    without bumping `updated_at`.
+    """
+    table = SIMCard.__table__
+    stmt = update(table).where(table.c.iccid == bindparam('sim_iccid')).values(
+        payload_hash=bindparam('hash'),
+        updated_at=table.c.updated_at
+    )
+    db.execute(stmt, [{'sim_iccid': h['iccid'], 'hash': h['payload_hash']} for h in hashes])
+
+
+USAGE_VALUE_COLUMNS = (
+    'data_volume_mb', 'data_volume_rx_mb', 'data_volume_tx_mb',
+    'sms_volume', 'sms_volume_mo', 'sms_volume_mt',
+)
+
+
+def upsert_usage_records(db: Session, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Insert or update a batch of daily usage rows keyed on (sim_card_id, date)
+
+    Returns (inserted, updated); rows whose values did not change are
+    left untouched and counted in neither. Duplicate keys within the batch
+    are collapsed, keeping the last occurrence.
+    """
+    unique_rows = list({(row['sim_card_id'], row['date']): row for row in rows}.values())
+    if not unique_rows:
+        return 0, 0
+
+    stmt = insert(UsageRecord).values(unique_rows)
+    table = UsageRecord.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['sim_card_id', 'date'],
+        set_={column: stmt.excluded[column] for column in USAGE_VALUE_COLUMNS},
+        # Re-collected days that didn't change are not rewritten
+        where=tuple_(*(table.c[column] for column in USAGE_VALUE_COLUMNS)).is_distinct_from(
+            tuple_(*(stmt.excluded[column] for column in USAGE_VALUE_COLUMNS))
+        )
+    ).returning(
+        # xmax is 0 for freshly inserted tuples
+        literal_column('(xmax = 0)').label('inserted')
+    )
+
+    results = db.execute(stmt).all()
+    inserted = sum(1 for row in results if row.inserted)
+    return inserted, len(results) - inserted
+
+
+USAGE_STAGING_TABLE = 'usage_records_staging'
+
+_STAGING_COLUMNS = ('batch_id', 'sim_card_id', 'date') + USAGE_VALUE_COLUMNS + ('created_at',)
+
+_MERGE_STAGED_USAGE = text(f"""
+    WITH merged AS (
+        INSERT INTO usage_records (sim_card_id, date, {', '.join(USAGE_VALUE_COLUMNS)}, created_at)
+        SELECT DISTINCT ON (sim_card_id, date)
+            sim_card_id, date, {', '.join(USAGE_VALUE_COLUMNS)}, created_at
+        FROM {USAGE_STAGING_TABLE}
+        WHERE batch_id = :batch_id
+        ORDER BY sim_card_id, date, seq DESC
+        ON CONFLICT (sim_card_id, date) DO UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in USAGE_VALUE_COLUMNS)}
+        WHERE ({', '.join(f'usage_records.{c}' for c in USAGE_VALUE_COLUMNS)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in USAGE_VALUE_COLUMNS)})
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT
+        count(*) FILTER (WHERE inserted) AS inserted,
+        count(*) FILTER (WHERE NOT inserted) AS updated
+    FROM merged
+""")
+
+
+def copy_usage_records(db: Session, rows: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Bulk-load daily usage rows with COPY for high-volume backfills
+
+    Rows are streamed in chunks through COPY into the unlogged staging
+    table, then merged into usage_records with one set-based
+    INSERT ... SELECT ... ON CONFLICT. Returns (inserted, updated).
+    """
+    batch_id = uuid4().hex
+    raw_connection = db.connection().connection
+    copy_sql = (
+        f"COPY {USAGE_STAGING_TABLE} ({', '.join(_STAGING_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+
+    rows = iter(rows)
+    staged = 0
+    with raw_connection.cursor() as cursor:
+        while True:
+            # Rows per COPY round trip; bounds client memory during large backfills
+            chunk = list(islice(rows, config.USAGE_COPY_BATCH_SIZE))
+            if not chunk:
+                break
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in chunk:
+                writer.writerow(
+                    [batch_id] + [row.get(column) for column in _STAGING_COLUMNS[1:]]
+                )
+            buffer.seek(0)
+
+            cursor.copy_expert(copy_sql, buffer)
+            staged += len(chunk)
+
+    if not staged:
+        return 0, 0
+
+    result = db.execute(_MERGE_STAGED_USAGE, {'batch_id': batch_id}).one()
+    db.execute(
+        text(f"DELETE FROM {USAGE_STAGING_TABLE} WHERE batch_id = :batch_id"),
+        {'batch_id': batch_id}
+    )
+
+    logger.debug(f"Merged {staged} staged usage rows: {result.inserted} inserted, {result.updated} updated")
+    return result.inserted, result.updated
+
+
+def advance_usage_watermarks(db: Session, watermarks: List[Dict[str, Any]]):
+    """
+    Move SIM usage watermarks forward in one executemany UPDATE
+
+    Each item has `sim_id`, `through` (last finalized day collected) and
+    `last_usage` (latest day with traffic, or None). Neither value ever
+    moves backwards.
+    """
+    table = SIMCard.__table__
+    stmt = update(table).where(table.c.id == bindparam('sim_id')).values(
+        usage_collected_through=func.greatest(
+            table.c.usage_collected_through, bindparam('through')
+        ),
+        last_usage_at=func.greatest(table.c.last_usage_at, bindparam('last_usage')),
+        # Collection bookkeeping is not a change to the SIM itself
+        updated_at=table.c.updated_at
+    )
+    db.execute(stmt, watermarks)
+
+
+CELL_COLUMNS = ('mcc', 'mnc', 'lac', 'cid')
+
+
+def record_connectivity(db: Session, observations: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Fold connectivity observations into run-length cell intervals
+
+    Each observation has `sim_card_id`, the cell (`mcc`, `mnc`, `lac`,
+    `cid`), `observed_at` and `age_of_location_minutes`. A SIM still in the
+    cell of its open interval only moves that interval's last_seen_at; a
+    cell change opens a new interval. sim_locations always holds the
+    latest cell. Returns (transitions, extended).
+    """
+    latest = {observation['sim_card_id']: observation for observation in observations}
+    if not latest:
+        return 0, 0
+
+    locations = SIMLocation.__table__
+    intervals = ConnectivityInterval.__table__
+
+    current = {
+        row.sim_card_id: row
+        for row in db.execute(
+            select(locations).where(locations.c.sim_card_id.in_(list(latest))).with_for_update()
+        )
+    }
+
+    extended = []
+    transitions = []
+    for sim_id, observation in latest.items():
+        location = current.get(sim_id)
+        same_cell = location is not None and location.interval_id is not None and all(
+            getattr(location, column) == observation[column] for column in CELL_COLUMNS
+        )
+        if same_cell:
+            extended.append({'interval_id': location.interval_id, 'seen': observation['observed_at']})
+        else:
+            transitions.append(observation)
+
+    if extended:
+        db.execute(
+            update(intervals).where(intervals.c.id == bindparam('interval_id')).values(
+                last_seen_at=func.greatest(intervals.c.last_seen_at, bindparam('seen')),
+                samples=intervals.c.samples + 1
+            ),
+            extended
+        )
+
+    opened = {}
+    if transitions:
+        stmt = insert(ConnectivityInterval).values([
+            {
+                'sim_card_id': observation['sim_card_id'],
+                **{column: observation[column] for column in CELL_COLUMNS},
+                'first_seen_at': observation['observed_at'],
+                'last_seen_at': observation['observed_at'],
+                'samples': 1,
+            }
+            for observation in transitions
+        ]).returning(intervals.c.id, intervals.c.sim_card_id)
+        opened = {row.sim_card_id: row.id for row in db.execute(stmt)}
+
+    stmt = insert(SIMLocation).values([
+        {
+            'sim_card_id': sim_id,
+            'interval_id': opened.get(sim_id),
+            **{column: observation[column] for column in CELL_COLUMNS},
+            'age_of_location_minutes': observation.get('age_of_location_minutes'),
+            'first_seen_at': observation['observed_at'],
+            'last_seen_at': observation['observed_at'],
+            'updated_at': datetime.utcnow(),
+        }
+        for sim_id, observation in latest.items()
+    ])
+    excluded = stmt.excluded
+    # Rows without a new interval stay in their cell: keep interval and first_seen_at
+    moved = excluded.interval_id.isnot(None)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['sim_card_id'],
+        set_={
+            **{column: excluded[column] for column in CELL_COLUMNS},
+            'age_of_location_minutes': excluded.age_of_location_minutes,
+            'interval_id': func.coalesce(excluded.interval_id, locations.c.interval_id),
+            'first_seen_at': case((moved, excluded.first_seen_at), else_=locations.c.first_seen_at),
+            'last_seen_at': func.greatest(locations.c.last_seen_at, excluded.last_seen_at),
+            'updated_at': excluded.updated_at,
+        }
+    )
+    db.execute(stmt)
+
+    return len(transitions), len(extended)
+
+
+def insert_sim_events(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert a batch of SIM events, skipping ones already stored
+
+    Events are deduplicated on (sim_card_id, occurred_at, event_key), so
+    the overlap re-read at each SIM's cursor is dropped. Returns the number
+    of new events.
+    """
+    unique_rows = list({
+        (row['sim_card_id'], row['occurred_at'], row['event_key']): row for row in rows
+    }.values())
+    if not unique_rows:
+        return 0
+
+    stmt = insert(SIMEvent).values(unique_rows).on_conflict_do_nothing(
+        index_elements=['sim_card_id', 'occurred_at', 'event_key']
+    ).returning(SIMEvent.__table__.c.id)
+    return len(db.execute(stmt).all())
+
+
+def advance_event_cursors(db: Session, cursors: List[Dict[str, Any]]):
+    """
+    Update SIM event cursors in one executemany UPDATE
+
+    Each item has `sim_id`, `cursor` (time of the newest event with nothing
+    missing before it, None to keep the current one), `backlog_page` and
+    `backlog_cursor` (the SIM's undrained backlog, both None once it is
+    drained). Cursors never move backwards.
+    """
+    table = SIMCard.__table__
+    stmt = update(table).where(table.c.id == bindparam('sim_id')).values(
+        events_cursor_at=func.greatest(table.c.events_cursor_at, bindparam('cursor')),
+        events_backlog_page=bindparam('backlog_page'),
+        events_backlog_cursor=bindparam('backlog_cursor'),
+        # Collection bookkeeping is not a change to the SIM itself
+        updated_at=table.c.updated_at
+    )
+    db.execute(stmt, cursors)
+
+
+QUOTA_VALUE_COLUMNS = (
+    'volume', 'total_volume', 'quota_status_id', 'threshold_date', 'exceeded_date', 'expiry_date',
+)
+
+# sim_cards columns mirroring each quota: volume, status, threshold and exceeded dates
+QUOTA_SIM_COLUMNS = {
+    'data': ('current_quota_mb', 'quota_status_id', 'quota_threshold_date', 'quota_exceeded_date'),
+    'sms': ('current_quota_sms', 'quota_sms_status_id', 'quota_sms_threshold_date', 'quota_sms_exceeded_date'),
+}
+
+
+def record_quota_snapshots(db: Session, snapshots: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Store quota readings that differ from each SIM's latest snapshot
+
+    Each snapshot has `sim_card_id`, `quota_type` ('data' or 'sms'),
+    `recorded_at` and the QUOTA_VALUE_COLUMNS. Unchanged readings are
+    dropped, and the sim_cards quota columns are brought up to date.
+    Only the last QUOTA_SNAPSHOT_LOOKBACK_DAYS of snapshots are searched, so
+    a reading unchanged for longer is stored again once per lookback.
+    Returns (recorded, unchanged).
+    """
+    latest = {(row['sim_card_id'], row['quota_type']): row for row in snapshots}
+    if not latest:
+        return 0, 0
+
+    table = QuotaSnapshot.__table__
+    since = min(row['recorded_at'] for row in latest.values()) - timedelta(
+        days=config.QUOTA_SNAPSHOT_LOOKBACK_DAYS
+    )
+    previous = {
+        (row.sim_card_id, row.quota_type): row
+        for row in db.execute(
+            select(table).where(
+                table.c.sim_card_id.in_({sim_id for sim_id, _ in latest}),
+                # Lets the hypertable skip older chunks
+                table.c.recorded_at >= since
+            ).distinct(
+                table.c.sim_card_id, table.c.quota_type
+            ).order_by(
+                table.c.sim_card_id, table.c.quota_type, table.c.recorded_at.desc()
+            )
+        )
+    }
+
+    changed = [
+        row for key, row in latest.items()
+        if key not in previous
+        or any(getattr(previous[key], column) != row[column] for column in QUOTA_VALUE_COLUMNS)
+    ]
+    if changed:
+        db.execute(insert(QuotaSnapshot).values([
+            {
+                'sim_card_id': row['sim_card_id'],
+                'quota_type': row['quota_type'],
+                'recorded_at': row['recorded_at'],
+                **{column: row[column] for column in QUOTA_VALUE_COLUMNS},
+            }
+            for row in changed
+        ]))
+
+    sims = SIMCard.__table__
+    for quota_type, (volume, status, threshold, exceeded) in QUOTA_SIM_COLUMNS.items():
+        params = [
+            {
+                'sim_id': row['sim_card_id'],
+                'q_volume': row['volume'],
+                'q_status': row['quota_status_id'],
+                'q_threshold': row['threshold_date'],
+                'q_exceeded': row['exceeded_date'],
+            }
+            for row in latest.values() if row['quota_type'] == quota_type
+        ]
+        if not params:
+            continue
+
+        values = {
+            volume: bindparam('q_volume'),
+            status: func.coalesce(bindparam('q_status'), sims.c[status]),
+            threshold: func.coalesce(bindparam('q_threshold'), sims.c[threshold]),
+            exceeded: func.coalesce(bindparam('q_exceeded'), sims.c[exceeded]),
+        }
+        db.execute(
+            update(sims).where(
+                sims.c.id == bindparam('sim_id'),
+                # Only rows where any mirrored column would change
+                tuple_(*(sims.c[column] for column in values)).is_distinct_from(
+                    tuple_(*values.values())
+                )
+            ).values({
+                **values,
+                # The row no longer matches the last synced payload
+                'payload_hash': None,
+            }),
+            params
+        )
+
+    return len(changed), len(latest) - len(changed)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import text
 from datetime import datetime
 
 Base = declarative_base()
@@ -38,21 +39,42 @@ class SIMCard(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    last_synced_at = Column(DateTime)
+    last_synced_at = Column(DateTime)  # Last time a sync wrote this row
+    payload_hash = Column(String(64))  # sha256 of the normalized API payload
+
+    # Incremental usage collection
+    usage_collected_through = Column(DateTime)  # Last finalized day collected
+    last_usage_at = Column(DateTime)  # Last day with data or SMS traffic
+
+    # Incremental event collection
+    events_cursor_at = Column(DateTime)  # Newest event with nothing missing before it
+    events_backlog_page = Column(Integer)  # Page to resume an undrained backlog from
+    events_backlog_cursor = Column(DateTime)  # Cursor to move to once the backlog is drained
+
+    # Adaptive polling
+    poll_priority = Column(String(10))  # hot, active, idle, dormant
+    next_poll_at = Column(DateTime, index=True)
 
     # Relationships
     usage_records = relationship("UsageRecord", back_populates="sim_card", cascade="all, delete-orphan")
     events = relationship("SIMEvent", back_populates="sim_card", cascade="all, delete-orphan")
     connectivity_logs = relationship("ConnectivityLog", back_populates="sim_card", cascade="all, delete-orphan")
+    connectivity_intervals = relationship("ConnectivityInterval", back_populates="sim_card", cascade="all, delete-orphan")
+    location = relationship("SIMLocation", back_populates="sim_card", uselist=False, cascade="all, delete-orphan")
+    quota_snapshots = relationship("QuotaSnapshot", back_populates="sim_card", cascade="all, delete-orphan")
 
 
 class UsageRecord(Base):
     """Daily usage records (time-series data)"""
     __tablename__ = 'usage_records'
+    __table_args__ = (
+        # Hypertable unique keys must include the partitioning column (date)
+        UniqueConstraint('sim_card_id', 'date', name='uq_usage_records_sim_date'),
+    )
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     sim_card_id = Column(Integer, ForeignKey('sim_cards.id'), nullable=False)
-    date = Column(DateTime, nullable=False, index=True)
+    date = Column(DateTime, primary_key=True, nullable=False, index=True)
 
     # Data usage
     data_volume_mb = Column(Float, default=0)
@@ -74,13 +96,20 @@ class UsageRecord(Base):
 class SIMEvent(Base):
     """SIM card events"""
     __tablename__ = 'sim_events'
+    __table_args__ = (
+        # Natural key for deduplication; its (sim_card_id, occurred_at) prefix
+        # also serves per-SIM timeline queries. Hypertable unique keys must
+        # include the partitioning column (occurred_at).
+        UniqueConstraint('sim_card_id', 'occurred_at', 'event_key', name='uq_sim_events_natural_key'),
+    )
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     sim_card_id = Column(Integer, ForeignKey('sim_cards.id'), nullable=False)
+    event_key = Column(String(64), nullable=False)  # API event id, or a hash of the event
     event_type = Column(String(50), nullable=False)
     event_description = Column(String(500))
     event_data = Column(JSON)
-    occurred_at = Column(DateTime, nullable=False, index=True)
+    occurred_at = Column(DateTime, primary_key=True, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -111,6 +140,75 @@ class ConnectivityLog(Base):
     sim_card = relationship("SIMCard", back_populates="connectivity_logs")
 
 
+class ConnectivityInterval(Base):
+    """Run-length history of the cell a SIM was seen in"""
+    __tablename__ = 'connectivity_intervals'
+    __table_args__ = (
+        Index('ix_connectivity_intervals_sim_first_seen', 'sim_card_id', 'first_seen_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    sim_card_id = Column(Integer, ForeignKey('sim_cards.id'), nullable=False)
+
+    # Cell
+    mcc = Column(String(3))
+    mnc = Column(String(3))
+    lac = Column(Integer)
+    cid = Column(Integer)
+
+    first_seen_at = Column(DateTime, nullable=False)
+    last_seen_at = Column(DateTime, nullable=False)
+    samples = Column(Integer, default=1)  # Polls that saw this cell
+
+    # Relationships
+    sim_card = relationship("SIMCard", back_populates="connectivity_intervals")
+
+
+class SIMLocation(Base):
+    """Latest known cell per SIM"""
+    __tablename__ = 'sim_locations'
+
+    sim_card_id = Column(Integer, ForeignKey('sim_cards.id'), primary_key=True)
+    interval_id = Column(Integer, ForeignKey('connectivity_intervals.id'))
+
+    # Cell
+    mcc = Column(String(3))
+    mnc = Column(String(3))
+    lac = Column(Integer)
+    cid = Column(Integer)
+    age_of_location_minutes = Column(Integer)
+
+    first_seen_at = Column(DateTime)  # Since when the SIM is in this cell
+    last_seen_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    sim_card = relationship("SIMCard", back_populates="location")
+
+
+class QuotaSnapshot(Base):
+    """Data and SMS quota history, one row per change (time-series data)"""
+    __tablename__ = 'quota_snapshots'
+    __table_args__ = (
+        Index('ix_quota_snapshots_sim_type_recorded', 'sim_card_id', 'quota_type', 'recorded_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sim_card_id = Column(Integer, ForeignKey('sim_cards.id'), nullable=False)
+    quota_type = Column(String(4), nullable=False)  # data, sms
+    recorded_at = Column(DateTime, primary_key=True, nullable=False, index=True)
+
+    volume = Column(Float)  # Remaining MB or SMS
+    total_volume = Column(Float)
+    quota_status_id = Column(Integer)
+    threshold_date = Column(DateTime)
+    exceeded_date = Column(DateTime)
+    expiry_date = Column(DateTime)
+
+    # Relationships
+    sim_card = relationship("SIMCard", back_populates="quota_snapshots")
+
+
 class Alert(Base):
     """System alerts"""
     __tablename__ = 'alerts'
@@ -137,3 +235,54 @@ class DataCollectionLog(Base):
     sims_processed = Column(Integer, default=0)
     errors_count = Column(Integer, default=0)
     error_details = Column(JSON)
+    rows_inserted = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    rows_per_second = Column(Float)
+    sims_per_second = Column(Float)
+
+    # Phase timings in seconds, summed across the run's workers
+    api_wait_seconds = Column(Float)  # Waiting for API responses
+    auth_wait_seconds = Column(Float)  # Blocked on token refresh
+    parse_seconds = Column(Float)
+    db_write_seconds = Column(Float)
+    commit_seconds = Column(Float)
+
+    # Per-SIM API latency
+    latency_p50_ms = Column(Float)
+    latency_p95_ms = Column(Float)
+    latency_max_ms = Column(Float)
+
+    details = Column(JSON)  # Run-specific summary (e.g. changed SIM fields)
+    checkpoint = Column(JSON)  # Progress of a resumable run (e.g. last synced page)
+
+
+class CollectionTask(Base):
+    """Durable work queue of collection tasks shared by all workers"""
+    __tablename__ = 'collection_tasks'
+    __table_args__ = (
+        # Workers claim the oldest due pending tasks
+        Index('ix_collection_tasks_due', 'status', 'run_after'),
+        # At most one queued or running task per dedupe key
+        Index(
+            'uq_collection_tasks_dedupe_active', 'dedupe_key', unique=True,
+            postgresql_where=text("status IN ('pending', 'running')")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_type = Column(String(50), nullable=False)  # usage, full_sync, etc.
+    payload = Column(JSON)
+    dedupe_key = Column(String(255))
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Lease held by the worker running the task
+    worker_id = Column(String(100))
+    lease_expires_at = Column(DateTime)
+
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
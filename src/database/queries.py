@@ -0,0 +1,216 @@
+from datetime import date, datetime
+from typing import List, Dict, Optional, Tuple, Union
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.database.models import Alert, SIMCard, UsageRecord
+
+# Read queries shared by the dashboard pages, AlertService and
+# scripts/benchmark_queries.py, so the benchmark times exactly what they run
+
+DateLike = Union[date, datetime]
+
+ALERT_SEVERITIES = ('critical', 'warning', 'info')
+
+# Quota status ids below the 20% (1) and 10% (2) thresholds
+LOW_QUOTA_STATUS_IDS = (1, 2)
+
+SIM_SORT_COLUMNS = {
+    'Last Updated': SIMCard.updated_at.desc(),
+    'ICCID': SIMCard.iccid,
+    'Label': SIMCard.label,
+    'Status': SIMCard.status,
+}
+
+
+def _usage_range(query, start: DateLike, end: Optional[DateLike]):
+    query = query.filter(UsageRecord.date >= start)
+    if end is not None:
+        query = query.filter(UsageRecord.date <= end)
+    return query
+
+
+# ===== SIMs =====
+
+def count_sims(db: Session, status: Optional[str] = None) -> int:
+    """Number of SIMs, optionally only those with `status`"""
+    query = db.query(SIMCard)
+    if status is not None:
+        query = query.filter(SIMCard.status == status)
+    return query.count()
+
+
+def count_low_quota_sims(db: Session) -> int:
+    """Number of SIMs below a data quota threshold"""
+    return db.query(SIMCard).filter(SIMCard.quota_status_id.in_(LOW_QUOTA_STATUS_IDS)).count()
+
+
+def low_quota_sims(db: Session, quota_type: str = 'data') -> List[SIMCard]:
+    """SIMs below a data or SMS quota threshold"""
+    status_column = SIMCard.quota_sms_status_id if quota_type == 'sms' else SIMCard.quota_status_id
+    return db.query(SIMCard).filter(status_column.in_(LOW_QUOTA_STATUS_IDS)).all()
+
+
+def recently_updated_sims(db: Session, limit: int = 10) -> List[SIMCard]:
+    """The most recently updated SIMs"""
+    return db.query(SIMCard).order_by(SIMCard.updated_at.desc()).limit(limit).all()
+
+
+def sim_status_distribution(db: Session) -> List[Tuple[str, int]]:
+    """(status, count) per SIM status"""
+    return db.query(
+        SIMCard.status,
+        func.count(SIMCard.id).label('count')
+    ).group_by(SIMCard.status).all()
+
+
+def search_sims(
+    db: Session,
+    search_term: str = '',
+    status: Optional[str] = None,
+    sort_by: str = 'Last Updated'
+) -> List[SIMCard]:
+    """SIMs whose ICCID or label contains `search_term`, optionally with `status`"""
+    query = db.query(SIMCard)
+
+    if search_term:
+        query = query.filter(
+            (SIMCard.iccid.contains(search_term)) |
+            (SIMCard.label.contains(search_term))
+        )
+    if status is not None:
+        query = query.filter(SIMCard.status == status)
+
+    return query.order_by(SIM_SORT_COLUMNS[sort_by]).all()
+
+
+# ===== Usage =====
+
+def total_data_usage(db: Session, start: DateLike, end: Optional[DateLike] = None) -> float:
+    """Data volume in MB used from `start` (through `end`)"""
+    return _usage_range(
+        db.query(func.sum(UsageRecord.data_volume_mb)), start, end
+    ).scalar() or 0
+
+
+def total_sms_usage(db: Session, start: DateLike, end: Optional[DateLike] = None) -> int:
+    """SMS sent and received from `start` (through `end`)"""
+    return _usage_range(
+        db.query(func.sum(UsageRecord.sms_volume)), start, end
+    ).scalar() or 0
+
+
+def daily_usage(
+    db: Session,
+    start: DateLike,
+    end: Optional[DateLike] = None,
+    with_sms: bool = False
+) -> List[Tuple]:
+    """(date, data_mb[, sms]) per day from `start` (through `end`)"""
+    columns = [UsageRecord.date, func.sum(UsageRecord.data_volume_mb).label('data_mb')]
+    if with_sms:
+        columns.append(func.sum(UsageRecord.sms_volume).label('sms'))
+
+    return _usage_range(db.query(*columns), start, end).group_by(
+        UsageRecord.date
+    ).order_by(UsageRecord.date).all()
+
+
+def top_data_consumers(db: Session, start: DateLike, limit: int = 10) -> List[Tuple]:
+    """(iccid, label, total_usage) of the SIMs that used the most data since `start`"""
+    return db.query(
+        SIMCard.iccid,
+        SIMCard.label,
+        func.sum(UsageRecord.data_volume_mb).label('total_usage')
+    ).join(
+        UsageRecord, SIMCard.id == UsageRecord.sim_card_id
+    ).filter(
+        UsageRecord.date >= start
+    ).group_by(
+        SIMCard.id, SIMCard.iccid, SIMCard.label
+    ).order_by(
+        func.sum(UsageRecord.data_volume_mb).desc()
+    ).limit(limit).all()
+
+
+def sim_usage_breakdown(db: Session, start: DateLike, end: DateLike) -> List[Tuple]:
+    """(iccid, label, total_data, total_sms, avg_data) per SIM, heaviest data users first"""
+    return db.query(
+        SIMCard.iccid,
+        SIMCard.label,
+        func.sum(UsageRecord.data_volume_mb).label('total_data'),
+        func.sum(UsageRecord.sms_volume).label('total_sms'),
+        func.avg(UsageRecord.data_volume_mb).label('avg_data')
+    ).join(
+        UsageRecord, SIMCard.id == UsageRecord.sim_card_id
+    ).filter(
+        UsageRecord.date >= start,
+        UsageRecord.date <= end
+    ).group_by(
+        SIMCard.id, SIMCard.iccid, SIMCard.label
+    ).order_by(
+        func.sum(UsageRecord.data_volume_mb).desc()
+    ).all()
+
+
+# ===== Alerts =====
+
+def alert_counts(db: Session) -> Dict[str, int]:
+    """Unresolved alerts in total and per severity"""
+    counts = {'total': db.query(Alert).filter(Alert.is_resolved == False).count()}
+    for severity in ALERT_SEVERITIES:
+        counts[severity] = db.query(Alert).filter(
+            Alert.severity == severity,
+            Alert.is_resolved == False
+        ).count()
+    return counts
+
+
+def active_alerts(db: Session, severity: Optional[str] = None) -> List[Alert]:
+    """Unresolved alerts, newest first, optionally only those with `severity`"""
+    query = db.query(Alert).filter(Alert.is_resolved == False)
+    if severity is not None:
+        query = query.filter(Alert.severity == severity)
+    return query.order_by(Alert.created_at.desc()).all()
+
+
+def active_alerts_with_sims(
+    db: Session,
+    severity: Optional[str] = None,
+    alert_type: Optional[str] = None
+) -> List[Tuple[Alert, Optional[SIMCard]]]:
+    """(alert, sim) for unresolved alerts, newest first; sim is None for fleet-wide alerts"""
+    query = db.query(Alert, SIMCard).join(
+        SIMCard, Alert.sim_card_id == SIMCard.id, isouter=True
+    ).filter(Alert.is_resolved == False)
+
+    if severity is not None:
+        query = query.filter(Alert.severity == severity)
+    if alert_type is not None:
+        query = query.filter(Alert.alert_type == alert_type)
+
+    return query.order_by(Alert.created_at.desc()).all()
+
+
+def open_alert(db: Session, sim_card_id: int, alert_type: str) -> Optional[Alert]:
+    """The SIM's unresolved alert of `alert_type`, if any"""
+    return db.query(Alert).filter(
+        Alert.sim_card_id == sim_card_id,
+        Alert.alert_type == alert_type,
+        Alert.is_resolved == False
+    ).first()
+
+
+def sim_alerts(db: Session, sim_card_id: int) -> List[Alert]:
+    """All alerts of a SIM, newest first"""
+    return db.query(Alert).filter(
+        Alert.sim_card_id == sim_card_id
+    ).order_by(Alert.created_at.desc()).all()
+
+
+def recently_resolved_alerts(db: Session, limit: int = 10) -> List[Alert]:
+    """The most recently resolved alerts"""
+    return db.query(Alert).filter(
+        Alert.is_resolved == True
+    ).order_by(Alert.resolved_at.desc()).limit(limit).all()
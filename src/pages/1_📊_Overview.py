@@ -9,7 +9,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.database.connection import get_db
-from src.database.models import SIMCard, UsageRecord
+from src.database.queries import (
+    count_sims, daily_usage, sim_status_distribution, top_data_consumers, total_data_usage
+)
 
 st.set_page_config(page_title="Overview", page_icon="📊", layout="wide")
 
@@ -39,15 +41,13 @@ col1, col2, col3, col4 = st.columns(4)
 try:
     with get_db() as db:
         # Total SIMs
-        total_sims = db.query(SIMCard).count()
-        active_sims = db.query(SIMCard).filter(SIMCard.status == 'Enabled').count()
+        total_sims = count_sims(db)
+        active_sims = count_sims(db, 'Enabled')
         inactive_sims = total_sims - active_sims
 
         # Usage data
         start_date = datetime.now() - timedelta(days=days)
-        total_usage = db.query(
-            db.func.sum(UsageRecord.data_volume_mb)
-        ).filter(UsageRecord.date >= start_date).scalar() or 0
+        total_usage = total_data_usage(db, start_date)
 
         # Average daily usage
         avg_daily_usage = total_usage / days if days > 0 else 0
@@ -74,10 +74,7 @@ try:
         # SIM Status Distribution
         with col1:
             st.markdown("### SIM Status Distribution")
-            status_data = db.query(
-                SIMCard.status,
-                db.func.count(SIMCard.id).label('count')
-            ).group_by(SIMCard.status).all()
+            status_data = sim_status_distribution(db)
 
             if status_data:
                 df_status = pd.DataFrame(status_data, columns=['Status', 'Count'])
@@ -92,12 +89,7 @@ try:
             st.markdown("### Daily Usage Trend")
             start_date = datetime.now() - timedelta(days=days)
 
-            usage_trend = db.query(
-                UsageRecord.date,
-                db.func.sum(UsageRecord.data_volume_mb).label('total_mb')
-            ).filter(
-                UsageRecord.date >= start_date
-            ).group_by(UsageRecord.date).order_by(UsageRecord.date).all()
+            usage_trend = daily_usage(db, start_date)
 
             if usage_trend:
                 df_trend = pd.DataFrame(usage_trend, columns=['Date', 'Usage (MB)'])
@@ -120,19 +112,7 @@ try:
     with get_db() as db:
         start_date = datetime.now() - timedelta(days=days)
 
-        top_consumers = db.query(
-            SIMCard.iccid,
-            SIMCard.label,
-            db.func.sum(UsageRecord.data_volume_mb).label('total_usage')
-        ).join(
-            UsageRecord, SIMCard.id == UsageRecord.sim_card_id
-        ).filter(
-            UsageRecord.date >= start_date
-        ).group_by(
-            SIMCard.id, SIMCard.iccid, SIMCard.label
-        ).order_by(
-            db.func.sum(UsageRecord.data_volume_mb).desc()
-        ).limit(10).all()
+        top_consumers = top_data_consumers(db, start_date)
 
         if top_consumers:
             df_top = pd.DataFrame(top_consumers, columns=['ICCID', 'Label', 'Total Usage (MB)'])
@@ -8,6 +8,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.database.connection import get_db
 from src.database.models import SIMCard
+from src.database.queries import search_sims
 from src.api.client import OnceAPIClient
 
 st.set_page_config(page_title="SIM Management", page_icon="📱", layout="wide")
@@ -31,30 +32,12 @@ with col3:
 # Load SIM data
 try:
     with get_db() as db:
-        query = db.query(SIMCard)
-
-        # Apply search filter
-        if search_term:
-            query = query.filter(
-                (SIMCard.iccid.contains(search_term)) |
-                (SIMCard.label.contains(search_term))
-            )
-
-        # Apply status filter
-        if status_filter != "All":
-            query = query.filter(SIMCard.status == status_filter)
-
-        # Apply sorting
-        if sort_by == "Last Updated":
-            query = query.order_by(SIMCard.updated_at.desc())
-        elif sort_by == "ICCID":
-            query = query.order_by(SIMCard.iccid)
-        elif sort_by == "Label":
-            query = query.order_by(SIMCard.label)
-        elif sort_by == "Status":
-            query = query.order_by(SIMCard.status)
-
-        sims = query.all()
+        sims = search_sims(
+            db,
+            search_term,
+            status=None if status_filter == "All" else status_filter,
+            sort_by=sort_by
+        )
 
         st.markdown(f"### Found {len(sims)} SIM cards")
 
@@ -122,6 +105,8 @@ try:
                                     from src.services.data_collector import DataCollector
                                     collector = DataCollector()
                                     api_client = OnceAPIClient()
+                                    # A refresh must not be answered from the response cache
+                                    api_client.invalidate_sim_cache(selected_iccid)
                                     api_sim = api_client.get_sim(selected_iccid)
 
                                     with get_db() as db:
@@ -147,6 +132,7 @@ try:
                                             ).first()
                                             if sim:
                                                 sim.label = new_label
+                                                sim.payload_hash = None
                                                 db.commit()
 
                                         st.success("✅ Label updated!")
@@ -181,3 +167,52 @@ try:
 
 except Exception as e:
     st.error(f"Error loading SIM data: {str(e)}")
+
+# Bulk operations
+st.markdown("---")
+st.markdown("### Bulk Operations")
+
+with st.expander("Apply an action to many SIMs"):
+    from src.services.bulk_operations import BulkOperationService, OPERATIONS
+
+    bulk_col1, bulk_col2 = st.columns(2)
+
+    with bulk_col1:
+        bulk_iccids = st.text_area("ICCIDs (one per line or comma separated)", "")
+        bulk_label_filter = st.text_input("...and/or all SIMs whose label contains", "")
+
+    with bulk_col2:
+        bulk_operation = st.selectbox("Operation", list(OPERATIONS.keys()))
+        bulk_value = st.text_input("Value (label or IMEI, if required)", "")
+
+    if st.button("🚀 Run Bulk Operation", key="run_bulk_operation"):
+        iccid_list = bulk_iccids.replace(",", "\n").splitlines()
+        progress_bar = st.progress(0.0)
+        progress_text = st.empty()
+
+        def show_progress(report):
+            if report.total:
+                progress_bar.progress(report.done / report.total)
+            progress_text.text(
+                f"{report.done}/{report.total} done, {len(report.failed)} failed"
+            )
+
+        try:
+            service = BulkOperationService()
+            report = service.run(
+                bulk_operation,
+                iccids=iccid_list,
+                label_filter=bulk_label_filter or None,
+                value=bulk_value or None,
+                progress_callback=show_progress
+            )
+            result = report.to_dict()
+            st.success(
+                f"✅ {result['succeeded']} of {result['total']} SIMs updated "
+                f"in {result['duration_seconds']:.1f}s"
+            )
+            if result['errors']:
+                st.warning(f"⚠️ {result['failed']} SIMs failed")
+                st.dataframe(pd.DataFrame(result['errors']), use_container_width=True)
+        except Exception as e:
+            st.error(f"❌ Bulk operation failed: {str(e)}")
@@ -9,7 +9,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.database.connection import get_db
-from src.database.models import SIMCard, UsageRecord
+from src.database.queries import daily_usage, sim_usage_breakdown, total_data_usage, total_sms_usage
 
 st.set_page_config(page_title="Usage Analytics", page_icon="📈", layout="wide")
 
@@ -44,19 +44,8 @@ try:
         # Overall usage statistics
         st.markdown("### Overall Statistics")
 
-        total_usage = db.query(
-            db.func.sum(UsageRecord.data_volume_mb)
-        ).filter(
-            UsageRecord.date >= start_date,
-            UsageRecord.date <= end_date
-        ).scalar() or 0
-
-        total_sms = db.query(
-            db.func.sum(UsageRecord.sms_volume)
-        ).filter(
-            UsageRecord.date >= start_date,
-            UsageRecord.date <= end_date
-        ).scalar() or 0
+        total_usage = total_data_usage(db, start_date, end_date)
+        total_sms = total_sms_usage(db, start_date, end_date)
 
         days_diff = (end_date - start_date).days + 1
         avg_daily_data = total_usage / days_diff if days_diff > 0 else 0
@@ -77,14 +66,7 @@ try:
         # Time series chart
         st.markdown("### Usage Over Time")
 
-        usage_trend = db.query(
-            UsageRecord.date,
-            db.func.sum(UsageRecord.data_volume_mb).label('data_mb'),
-            db.func.sum(UsageRecord.sms_volume).label('sms')
-        ).filter(
-            UsageRecord.date >= start_date,
-            UsageRecord.date <= end_date
-        ).group_by(UsageRecord.date).order_by(UsageRecord.date).all()
+        usage_trend = daily_usage(db, start_date, end_date, with_sms=True)
 
         if usage_trend:
             df_trend = pd.DataFrame(
@@ -124,22 +106,7 @@ try:
         # SIM-level breakdown
         st.markdown("### SIM-Level Breakdown")
 
-        sim_usage = db.query(
-            SIMCard.iccid,
-            SIMCard.label,
-            db.func.sum(UsageRecord.data_volume_mb).label('total_data'),
-            db.func.sum(UsageRecord.sms_volume).label('total_sms'),
-            db.func.avg(UsageRecord.data_volume_mb).label('avg_data')
-        ).join(
-            UsageRecord, SIMCard.id == UsageRecord.sim_card_id
-        ).filter(
-            UsageRecord.date >= start_date,
-            UsageRecord.date <= end_date
-        ).group_by(
-            SIMCard.id, SIMCard.iccid, SIMCard.label
-        ).order_by(
-            db.func.sum(UsageRecord.data_volume_mb).desc()
-        ).all()
+        sim_usage = sim_usage_breakdown(db, start_date, end_date)
 
         if sim_usage:
             df_sims = pd.DataFrame(
@@ -7,7 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.database.connection import get_db
-from src.database.models import Alert, SIMCard
+from src.database.queries import active_alerts_with_sims, alert_counts, recently_resolved_alerts
 from src.services.alert_service import AlertService
 
 st.set_page_config(page_title="Alerts", page_icon="🔔", layout="wide")
@@ -44,19 +44,11 @@ st.markdown("---")
 # Alert statistics
 try:
     with get_db() as db:
-        total_active = db.query(Alert).filter(Alert.is_resolved == False).count()
-        critical = db.query(Alert).filter(
-            Alert.severity == 'critical',
-            Alert.is_resolved == False
-        ).count()
-        warning = db.query(Alert).filter(
-            Alert.severity == 'warning',
-            Alert.is_resolved == False
-        ).count()
-        info = db.query(Alert).filter(
-            Alert.severity == 'info',
-            Alert.is_resolved == False
-        ).count()
+        counts = alert_counts(db)
+        total_active = counts['total']
+        critical = counts['critical']
+        warning = counts['warning']
+        info = counts['info']
 
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -92,29 +84,19 @@ with col2:
 # Load and display alerts
 try:
     with get_db() as db:
-        query = db.query(Alert).join(
-            SIMCard, Alert.sim_card_id == SIMCard.id, isouter=True
-        ).filter(Alert.is_resolved == False)
-
-        # Apply filters
-        if severity_filter != "All":
-            query = query.filter(Alert.severity == severity_filter.lower())
-
         type_map = {
             "Quota Warning": "quota_warning",
             "SMS Quota Warning": "sms_quota_warning",
             "Connectivity Issue": "connectivity_issue"
         }
-        if alert_type_filter != "All":
-            query = query.filter(Alert.alert_type == type_map[alert_type_filter])
-
-        alerts = query.order_by(Alert.created_at.desc()).all()
+        alerts = active_alerts_with_sims(
+            db,
+            severity=None if severity_filter == "All" else severity_filter.lower(),
+            alert_type=type_map.get(alert_type_filter)
+        )
 
         if alerts:
-            for alert in alerts:
-                # Get SIM info
-                sim = db.query(SIMCard).filter(SIMCard.id == alert.sim_card_id).first()
-
+            for alert, sim in alerts:
                 # Create alert card
                 severity_emoji = {
                     'critical': '🔴',
@@ -155,9 +137,7 @@ st.markdown("### Recently Resolved Alerts")
 
 try:
     with get_db() as db:
-        resolved_alerts = db.query(Alert).filter(
-            Alert.is_resolved == True
-        ).order_by(Alert.resolved_at.desc()).limit(10).all()
+        resolved_alerts = recently_resolved_alerts(db)
 
         if resolved_alerts:
             df = pd.DataFrame([
@@ -3,7 +3,8 @@ from typing import List, Dict, Any
 import logging
 
 from src.database.connection import get_db
-from src.database.models import Alert, SIMCard
+from src.database.models import Alert
+from src.database.queries import active_alerts, low_quota_sims, open_alert, sim_alerts
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +19,9 @@ class AlertService:
         with get_db() as db:
             # Find SIMs with low data quota (status_id 1 or 2)
             # status_id 1: < 20%, status_id 2: < 10%
-            low_quota_sims = db.query(SIMCard).filter(
-                SIMCard.quota_status_id.in_([1, 2])
-            ).all()
-
-            for sim in low_quota_sims:
+            for sim in low_quota_sims(db, 'data'):
                 # Check if alert already exists
-                existing = db.query(Alert).filter(
-                    Alert.sim_card_id == sim.id,
-                    Alert.alert_type == 'quota_warning',
-                    Alert.is_resolved == False
-                ).first()
+                existing = open_alert(db, sim.id, 'quota_warning')
 
                 if not existing:
                     severity = 'critical' if sim.quota_status_id == 2 else 'warning'
@@ -45,16 +38,8 @@ class AlertService:
                     logger.info(f"Created quota alert for SIM {sim.iccid}")
 
             # Find SIMs with low SMS quota
-            low_sms_sims = db.query(SIMCard).filter(
-                SIMCard.quota_sms_status_id.in_([1, 2])
-            ).all()
-
-            for sim in low_sms_sims:
-                existing = db.query(Alert).filter(
-                    Alert.sim_card_id == sim.id,
-                    Alert.alert_type == 'sms_quota_warning',
-                    Alert.is_resolved == False
-                ).first()
+            for sim in low_quota_sims(db, 'sms'):
+                existing = open_alert(db, sim.id, 'sms_quota_warning')
 
                 if not existing:
                     severity = 'critical' if sim.quota_sms_status_id == 2 else 'warning'
@@ -91,24 +76,17 @@ class AlertService:
     def get_active_alerts(self) -> List[Alert]:
         """Get all active (unresolved) alerts"""
         with get_db() as db:
-            return db.query(Alert).filter(Alert.is_resolved == False).order_by(
-                Alert.created_at.desc()
-            ).all()
+            return active_alerts(db)
 
     def get_alerts_by_severity(self, severity: str) -> List[Alert]:
         """Get alerts by severity level"""
         with get_db() as db:
-            return db.query(Alert).filter(
-                Alert.severity == severity,
-                Alert.is_resolved == False
-            ).order_by(Alert.created_at.desc()).all()
+            return active_alerts(db, severity)
 
     def get_sim_alerts(self, sim_card_id: int) -> List[Alert]:
         """Get all alerts for a specific SIM"""
         with get_db() as db:
-            return db.query(Alert).filter(
-                Alert.sim_card_id == sim_card_id
-            ).order_by(Alert.created_at.desc()).all()
+            return sim_alerts(db, sim_card_id)
 
     def cleanup_old_alerts(self, days: int = 30) -> int:
         """Delete resolved alerts older than specified days"""
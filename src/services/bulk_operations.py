@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Iterable
+import logging
+
+from src.api.client import OnceAPIClient
+from src.database.connection import get_db
+from src.database.models import SIMCard, DataCollectionLog
+
+logger = logging.getLogger(__name__)
+
+# operation -> (API client method, whether it takes a value, sim_cards columns to write back)
+OPERATIONS: Dict[str, tuple] = {
+    'enable': ('enable_sim', False, lambda value: {'status': 'Enabled'}),
+    'disable': ('disable_sim', False, lambda value: {'status': 'Disabled'}),
+    'update_label': ('update_sim_label', True, lambda value: {'label': value}),
+    'set_imei_lock': ('set_imei_lock', True, lambda value: {'imei': value, 'imei_lock': True}),
+    'remove_imei_lock': ('remove_imei_lock', False, lambda value: {'imei_lock': False}),
+}
+
+
+@dataclass
+class BulkOperationReport:
+    """Per-ICCID outcome of a bulk SIM operation"""
+
+    operation: str
+    total: int
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'operation': self.operation,
+            'total': self.total,
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'errors': [
+                {'iccid': iccid, 'error': error}
+                for iccid, error in self.failed.items()
+            ],
+            'duration_seconds': (
+                (self.completed_at - self.started_at).total_seconds()
+                if self.completed_at else None
+            ),
+        }
+
+
+class BulkOperationService:
+    """Service for running SIM mutations across many SIMs at once"""
+
+    def __init__(self, write_batch_size: int = 500):
+        self.api_client = OnceAPIClient()
+        self.write_batch_size = write_batch_size
+
+    def resolve_iccids(
+        self,
+        iccids: Optional[Iterable[str]] = None,
+        label_filter: Optional[str] = None
+    ) -> List[str]:
+        """Combine explicit ICCIDs and SIMs whose label contains `label_filter`"""
+        selected = {iccid.strip() for iccid in (iccids or []) if iccid and iccid.strip()}
+
+        if label_filter:
+            with get_db() as db:
+                rows = db.query(SIMCard.iccid).filter(
+                    SIMCard.label.contains(label_filter)
+                ).all()
+                selected.update(row.iccid for row in rows)
+
+        return sorted(selected)
+
+    def run(
+        self,
+        operation: str,
+        iccids: Optional[Iterable[str]] = None,
+        label_filter: Optional[str] = None,
+        value: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        progress_callback: Optional[Callable[[BulkOperationReport], None]] = None
+    ) -> BulkOperationReport:
+        """
+        Apply `operation` to every selected SIM with bounded concurrency.
+
+        Successful changes are written back to sim_cards in batches while the
+        rest of the batch is still running. `progress_callback` is called with
+        the running report after every completed ICCID.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown bulk operation: {operation}")
+
+        method, takes_value, columns = OPERATIONS[operation]
+        if takes_value and not value:
+            raise ValueError(f"Bulk operation {operation} requires a value")
+
+        targets = self.resolve_iccids(iccids, label_filter)
+        report = BulkOperationReport(operation=operation, total=len(targets))
+        args = (value,) if takes_value else ()
+        updates = columns(value)
+        pending_writes: List[str] = []
+
+        logger.info(f"Starting bulk {operation} for {len(targets)} SIMs")
+
+        for iccid, result in self.api_client.iter_batch(
+            method, targets, *args, max_concurrency=max_concurrency
+        ):
+            if 'error' in result:
+                report.failed[iccid] = result['error']
+            else:
+                report.succeeded.append(iccid)
+                pending_writes.append(iccid)
+
+            if len(pending_writes) >= self.write_batch_size:
+                self._write_back(pending_writes, updates)
+                pending_writes = []
+
+            if progress_callback:
+                progress_callback(report)
+
+        if pending_writes:
+            self._write_back(pending_writes, updates)
+
+        report.completed_at = datetime.utcnow()
+        self._log_report(report)
+
+        logger.info(
+            f"Bulk {operation} finished: {len(report.succeeded)} succeeded, "
+            f"{len(report.failed)} failed"
+        )
+        return report
+
+    def _write_back(self, iccids: List[str], updates: Dict[str, Any]):
+        """Apply the operation's column changes to a batch of SIMs in one UPDATE"""
+        with get_db() as db:
+            db.query(SIMCard).filter(SIMCard.iccid.in_(iccids)).update(
+                # Clearing the hash makes the next sync rewrite the rows
+                {**updates, 'payload_hash': None, 'updated_at': datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+
+    def _log_report(self, report: BulkOperationReport):
+        """Record the run in data_collection_logs"""
+        errors = report.to_dict()['errors']
+
+        with get_db() as db:
+            db.add(DataCollectionLog(
+                collection_type=f'bulk_{report.operation}',
+                started_at=report.started_at,
+                completed_at=report.completed_at,
+                status='success' if not errors else ('partial' if report.succeeded else 'failed'),
+                sims_processed=len(report.succeeded),
+                errors_count=len(errors),
+                error_details=errors if errors else None
+            ))
+            db.commit()
@@ -1,16 +1,57 @@
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import hashlib
+import json
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
 import logging
 
+from sqlalchemy import cast
+from sqlalchemy.dialects.postgresql import JSONB
+
 from src.api.client import OnceAPIClient
 from src.database.connection import get_db
-from src.database.models import (
-    SIMCard, UsageRecord, ConnectivityLog,
-    SIMEvent, DataCollectionLog
+from src.config import config
+from src.database.ingest import (
+    SIM_CARD_KEEP_EXISTING, advance_event_cursors, advance_usage_watermarks, copy_usage_records,
+    insert_sim_events, record_connectivity, record_quota_snapshots, set_sim_payload_hashes,
+    upsert_sim_cards, upsert_usage_records
 )
+from src.services.poll_scheduler import PollScheduler
+from src.utils.profiling import PhaseTimer
+from src.database.models import SIMCard, DataCollectionLog
 
 logger = logging.getLogger(__name__)
 
+# sim_cards columns maintained by the sync itself rather than taken from the API
+SIM_BOOKKEEPING_COLUMNS = ('created_at', 'last_synced_at', 'updated_at', 'payload_hash')
+
+
+def _normalize_value(value: Any) -> Any:
+    """Make an API value comparable with what sim_cards stores"""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an API ISO timestamp into naive UTC"""
+    if not value:
+        return None
+    return _normalize_value(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+
+def sim_payload_hash(row: Dict[str, Any]) -> str:
+    """sha256 of the API-derived columns of a sim_cards row"""
+    payload = {
+        column: _normalize_value(value)
+        for column, value in row.items()
+        if column not in SIM_BOOKKEEPING_COLUMNS
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
 
 class DataCollector:
     """Service for collecting data from 1NCE API"""
@@ -18,35 +59,118 @@ class DataCollector:
     def __init__(self):
         self.api_client = OnceAPIClient()
 
-    def sync_all_sims(self) -> Dict[str, Any]:
-        """Sync all SIM cards from API to database"""
-        log_entry = DataCollectionLog(
-            collection_type='full_sync',
-            started_at=datetime.utcnow(),
-            status='running'
-        )
+    def _token_wait_seconds(self) -> float:
+        """Time this process has spent blocked on API token refreshes"""
+        return self.api_client.auth_manager.token_wait_seconds
+
+    def _record_timings(
+        self,
+        log_entry: DataCollectionLog,
+        timer: PhaseTimer,
+        token_wait_before: float,
+        processed: int,
+        rows: int,
+        duration: float
+    ):
+        """Store a run's throughput, phase timings and per-SIM latency on its log entry"""
+        timer.add('auth_wait', self._token_wait_seconds() - token_wait_before)
+        for column, value in timer.summary().items():
+            setattr(log_entry, column, value)
+        log_entry.sims_per_second = processed / duration if duration > 0 else None
+        log_entry.rows_per_second = rows / duration if duration > 0 else None
+
+    def sync_all_sims(self, resume: bool = False) -> Dict[str, Any]:
+        """
+        Sync all SIM cards from API to database
+
+        Progress is checkpointed on the run's log entry after every page.
+        With `resume`, a run interrupted within FULL_SYNC_RESUME_HOURS is
+        continued after its last checkpointed page instead of starting over,
+        unless the SIM list has shifted since.
+        """
+        log_entry = self._resumable_log('full_sync', ('running', 'failed')) if resume else None
+        if log_entry is not None and not self._can_resume_sync(log_entry):
+            self._abandon_log(log_entry)
+            log_entry = None
+
+        if log_entry is None:
+            log_entry = DataCollectionLog(
+                collection_type='full_sync',
+                started_at=datetime.utcnow(),
+                status='running'
+            )
+            checkpoint = {}
+        else:
+            checkpoint = dict(log_entry.checkpoint)
+            log_entry.status = 'running'
+            log_entry.completed_at = None
+            logger.info(
+                f"Resuming full sync #{log_entry.id} after page {checkpoint['page']} "
+                f"(last ICCID {checkpoint.get('last_iccid')})"
+            )
+
+        page_size = checkpoint.get('page_size') or config.SIM_SYNC_PAGE_SIZE
+        resumed_from = checkpoint.get('page', 0)
+        timer = PhaseTimer()
+        token_wait_before = self._token_wait_seconds()
+        run_started = datetime.utcnow()
 
         try:
             with get_db() as db:
                 db.add(log_entry)
                 db.commit()
 
-                # Fetch all SIMs from API
-                api_sims = self.api_client.get_all_sims()
+                processed = checkpoint.get('processed', 0)
+                errors = list(log_entry.error_details or [])
+                created_count = checkpoint.get('created', 0)
+                changed_count = checkpoint.get('changed', 0)
+                unchanged = checkpoint.get('unchanged', 0)
+                field_counts = Counter(checkpoint.get('changed_fields', {}))
+                rows_before = created_count + changed_count
+                created = []
+                changes: Dict[str, List[str]] = {}
 
-                processed = 0
-                errors = []
+                # Stream SIMs page by page so memory stays flat for large fleets
+                page_number = resumed_from
+                for api_sims in timer.timed(self.api_client.iter_sim_pages(
+                    page_size=page_size, start_page=resumed_from + 1
+                )):
+                    page_number += 1
+                    with timer.phase('db_write'):
+                        page = self._sync_sim_page(db, api_sims)
+                    processed += page['processed']
+                    errors.extend(page['errors'])
+                    created.extend(page['created'])
+                    changes.update(page['changed'])
+                    created_count += len(page['created'])
+                    changed_count += len(page['changed'])
+                    unchanged += page['unchanged']
+                    field_counts.update(
+                        field for fields in page['changed'].values() for field in fields
+                    )
 
-                for api_sim in api_sims:
-                    try:
-                        self._sync_single_sim(db, api_sim)
-                        processed += 1
-                    except Exception as e:
-                        errors.append({
-                            'iccid': api_sim.get('iccid'),
-                            'error': str(e)
-                        })
-                        logger.error(f"Failed to sync SIM {api_sim.get('iccid')}: {e}")
+                    # Checkpoint
+                    log_entry.checkpoint = {
+                        'page': page_number,
+                        'page_size': page_size,
+                        'last_iccid': api_sims[-1].get('iccid'),
+                        'updated_at': datetime.utcnow().isoformat(),
+                        'processed': processed,
+                        'created': created_count,
+                        'changed': changed_count,
+                        'unchanged': unchanged,
+                        'changed_fields': dict(field_counts),
+                    }
+                    log_entry.sims_processed = processed
+                    log_entry.errors_count = len(errors)
+                    log_entry.error_details = list(errors) if errors else None
+                    with timer.phase('commit'):
+                        db.commit()
+
+                    logger.info(
+                        f"Synced page {page_number} of {len(api_sims)} SIMs ({processed} total, "
+                        f"{len(page['created'])} new, {len(page['changed'])} changed)"
+                    )
 
                 # Update log
                 log_entry.completed_at = datetime.utcnow()
@@ -54,66 +178,296 @@ class DataCollector:
                 log_entry.sims_processed = processed
                 log_entry.errors_count = len(errors)
                 log_entry.error_details = errors if errors else None
+                log_entry.rows_inserted = created_count
+                log_entry.rows_updated = changed_count
+                log_entry.details = {
+                    'sims_created': created_count,
+                    'sims_changed': changed_count,
+                    'sims_unchanged': unchanged,
+                    'changed_fields': dict(field_counts),
+                    'resumed_from_page': resumed_from or None,
+                }
+                # Throughput of this run only, without resumed pages
+                self._record_timings(
+                    log_entry, timer, token_wait_before,
+                    processed - checkpoint.get('processed', 0),
+                    created_count + changed_count - rows_before,
+                    (datetime.utcnow() - run_started).total_seconds()
+                )
                 db.commit()
 
+                logger.info(
+                    f"Full sync done: {created_count} new, {changed_count} changed, "
+                    f"{unchanged} unchanged SIMs"
+                )
+
                 return {
                     'success': True,
                     'processed': processed,
-                    'errors': len(errors)
+                    'errors': len(errors),
+                    'created': created,
+                    'changed': changes,
+                    'unchanged': unchanged,
+                    'resumed_from_page': resumed_from or None
                 }
 
         except Exception as e:
             logger.error(f"Full sync failed: {e}")
-            log_entry.status = 'failed'
-            log_entry.completed_at = datetime.utcnow()
-            with get_db() as db:
-                db.add(log_entry)
-                db.commit()
+            self._mark_failed(log_entry)
             raise
 
-    def _sync_single_sim(self, db, api_sim: Dict[str, Any]):
-        """Sync single SIM card data"""
-        iccid = api_sim['iccid']
-
-        # Find or create SIM record
-        sim = db.query(SIMCard).filter(SIMCard.iccid == iccid).first()
-
-        if not sim:
-            sim = SIMCard(iccid=iccid)
-            db.add(sim)
-
-        # Update fields
-        sim.iccid_with_luhn = api_sim.get('iccid_with_luhn')
-        sim.imsi = api_sim.get('imsi')
-        sim.imsi_2 = api_sim.get('imsi_2')
-        sim.current_imsi = api_sim.get('current_imsi')
-        sim.msisdn = api_sim.get('msisdn')
-        sim.imei = api_sim.get('imei')
-        sim.imei_lock = api_sim.get('imei_lock', False)
-        sim.status = api_sim.get('status')
-        sim.ip_address = api_sim.get('ip_address')
-        sim.label = api_sim.get('label')
+    def _mark_failed(self, log_entry: DataCollectionLog):
+        """Record a run that raised as failed, in a fresh session"""
+        log_entry.status = 'failed'
+        log_entry.completed_at = datetime.utcnow()
+        with get_db() as db:
+            db.add(log_entry)
+            db.commit()
+
+    def _can_resume_sync(self, log_entry: DataCollectionLog) -> bool:
+        """
+        Whether an interrupted full sync is recent enough to resume and its
+        checkpointed page still ends with the same SIM (pages shift when
+        SIMs are added or removed in between)
+        """
+        checkpoint = log_entry.checkpoint
+        age = datetime.utcnow() - datetime.fromisoformat(checkpoint['updated_at'])
+        if age > timedelta(hours=config.FULL_SYNC_RESUME_HOURS):
+            logger.info(f"Full sync #{log_entry.id} was interrupted {age} ago, starting over")
+            return False
+
+        sims, _ = self.api_client.get_sims_page(
+            checkpoint['page'], checkpoint.get('page_size') or config.SIM_SYNC_PAGE_SIZE
+        )
+        if not sims or sims[-1].get('iccid') != checkpoint.get('last_iccid'):
+            logger.warning(
+                f"SIM list changed since full sync #{log_entry.id} was interrupted "
+                f"at page {checkpoint['page']}, starting over"
+            )
+            return False
+        return True
+
+    def _abandon_log(self, log_entry: DataCollectionLog):
+        """Close an interrupted run that will not be resumed"""
+        if log_entry.status == 'running':
+            log_entry.status = 'failed'
+        log_entry.completed_at = log_entry.completed_at or datetime.utcnow()
+        with get_db() as db:
+            db.add(log_entry)
+            db.commit()
+
+    def _resumable_log(
+        self,
+        collection_type: str,
+        statuses: Tuple[str, ...],
+        details: Optional[Dict[str, Any]] = None
+    ) -> Optional[DataCollectionLog]:
+        """
+        Latest interrupted run of `collection_type` with a checkpoint, if it
+        is the latest such run at all (optionally among runs whose details
+        match `details`): in one of `statuses`, or still 'running' but
+        without a checkpoint for FULL_SYNC_STALE_MINUTES (its process died)
+        """
+        with get_db() as db:
+            query = db.query(DataCollectionLog).filter(
+                DataCollectionLog.collection_type == collection_type
+            )
+            if details:
+                query = query.filter(cast(DataCollectionLog.details, JSONB).contains(details))
+            latest = query.order_by(DataCollectionLog.started_at.desc()).first()
+
+            if latest is None or not latest.checkpoint or latest.status not in statuses:
+                return None
+
+            if latest.status == 'running':
+                updated_at = datetime.fromisoformat(latest.checkpoint['updated_at'])
+                if datetime.utcnow() - updated_at < timedelta(minutes=config.FULL_SYNC_STALE_MINUTES):
+                    raise RuntimeError(f"{collection_type} #{latest.id} is still running")
+
+            db.expunge(latest)
+            return latest
+
+    def _sim_row(self, api_sim: Dict[str, Any]) -> Dict[str, Any]:
+        """Map an API SIM payload to sim_cards column values"""
+        now = datetime.utcnow()
 
         # Activation date
+        activation_date = None
         if api_sim.get('activation_date'):
-            sim.activation_date = datetime.fromisoformat(
+            activation_date = datetime.fromisoformat(
                 api_sim['activation_date'].replace('Z', '+00:00')
             )
 
-        # Quota data
-        sim.current_quota_mb = api_sim.get('current_quota')
-        if api_sim.get('quota_status'):
-            sim.quota_status_id = api_sim['quota_status'].get('id')
+        return {
+            'iccid': api_sim['iccid'],
+            'iccid_with_luhn': api_sim.get('iccid_with_luhn'),
+            'imsi': api_sim.get('imsi'),
+            'imsi_2': api_sim.get('imsi_2'),
+            'current_imsi': api_sim.get('current_imsi'),
+            'msisdn': api_sim.get('msisdn'),
+            'imei': api_sim.get('imei'),
+            'imei_lock': api_sim.get('imei_lock', False),
+            'status': api_sim.get('status'),
+            'ip_address': api_sim.get('ip_address'),
+            'label': api_sim.get('label'),
+            'activation_date': activation_date,
+
+            # Quota data
+            'current_quota_mb': api_sim.get('current_quota'),
+            'quota_status_id': (api_sim.get('quota_status') or {}).get('id'),
+            'current_quota_sms': api_sim.get('current_quota_SMS'),
+            'quota_sms_status_id': (api_sim.get('quota_status_SMS') or {}).get('id'),
+
+            'created_at': now,
+            'last_synced_at': now,
+            'updated_at': now,
+        }
+
+    def _sync_sim_page(self, db, api_sims: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write the new and changed SIMs of one page in a single upsert
 
-        sim.current_quota_sms = api_sim.get('current_quota_SMS')
-        if api_sim.get('quota_status_SMS'):
-            sim.quota_sms_status_id = api_sim['quota_status_SMS'].get('id')
+        Existing rows are loaded with one SELECT and compared by payload
+        hash, so unchanged SIMs cost no write at all. Returns `processed`,
+        `errors`, `created` (ICCIDs), `changed` (ICCID -> changed columns)
+        and the `unchanged` count.
+        """
+        rows = {}
+        errors = []
 
-        sim.last_synced_at = datetime.utcnow()
-        sim.updated_at = datetime.utcnow()
+        for api_sim in api_sims:
+            try:
+                row = self._sim_row(api_sim)
+                row['payload_hash'] = sim_payload_hash(row)
+                rows[row['iccid']] = row
+            except Exception as e:
+                errors.append({'iccid': api_sim.get('iccid'), 'error': str(e)})
+                logger.error(f"Failed to sync SIM {api_sim.get('iccid')}: {e}")
+
+        created, changed, rehash = self._diff_sim_rows(db, rows)
+        writes = {iccid: rows[iccid] for iccid in created + list(changed)}
+
+        try:
+            with db.begin_nested():
+                upsert_sim_cards(db, list(writes.values()))
+                if rehash:
+                    set_sim_payload_hashes(db, rehash)
+            processed = len(rows)
+        except Exception as e:
+            # Fall back to row-by-row to find out which SIMs are at fault
+            logger.warning(f"Batch upsert of {len(writes)} SIMs failed ({e}), retrying per SIM")
+            processed = len(rows) - len(writes)
+            for iccid, row in writes.items():
+                try:
+                    with db.begin_nested():
+                        upsert_sim_cards(db, [row])
+                    processed += 1
+                except Exception as row_error:
+                    errors.append({'iccid': iccid, 'error': str(row_error)})
+                    logger.error(f"Failed to sync SIM {iccid}: {row_error}")
+                    created = [c for c in created if c != iccid]
+                    changed.pop(iccid, None)
 
         db.commit()
 
+        for iccid, fields in changed.items():
+            logger.debug(f"SIM {iccid} changed: {', '.join(fields)}")
+
+        return {
+            'processed': processed,
+            'errors': errors,
+            'created': created,
+            'changed': changed,
+            'unchanged': len(rows) - len(writes),
+        }
+
+    def _diff_sim_rows(self, db, rows: Dict[str, Dict[str, Any]]):
+        """
+        Split a page of SIM rows by what the database already holds
+
+        Returns (created ICCIDs, {ICCID: changed columns}, hashes to store
+        for rows that match column-for-column but lack a current hash).
+        """
+        if not rows:
+            return [], {}, []
+
+        columns = [
+            column for column in next(iter(rows.values()))
+            if column not in SIM_BOOKKEEPING_COLUMNS
+        ]
+        table = SIMCard.__table__
+        existing = {
+            stored.iccid: stored
+            for stored in db.query(
+                *(table.c[column] for column in columns), table.c.payload_hash
+            ).filter(table.c.iccid.in_(list(rows)))
+        }
+
+        created = []
+        changed = {}
+        rehash = []
+        for iccid, row in rows.items():
+            stored = existing.get(iccid)
+            if stored is None:
+                created.append(iccid)
+                continue
+            if stored.payload_hash == row['payload_hash']:
+                continue
+
+            fields = [
+                column for column in columns
+                if _normalize_value(row[column]) != getattr(stored, column)
+                # Omitted values do not overwrite stored ones (see upsert_sim_cards)
+                and not (column in SIM_CARD_KEEP_EXISTING and row[column] is None)
+            ]
+            if fields:
+                changed[iccid] = fields
+            else:
+                rehash.append({'iccid': iccid, 'payload_hash': row['payload_hash']})
+
+        return created, changed, rehash
+
+    def _sync_single_sim(self, db, api_sim: Dict[str, Any]):
+        """Sync single SIM card data"""
+        result = self._sync_sim_page(db, [api_sim])
+        if result['errors']:
+            raise ValueError(result['errors'][0]['error'])
+
+        if result['unchanged']:
+            # An explicit refresh still records that the SIM was checked
+            db.query(SIMCard).filter(SIMCard.iccid == api_sim['iccid']).update(
+                {'last_synced_at': datetime.utcnow(), 'updated_at': SIMCard.updated_at},
+                synchronize_session=False
+            )
+            db.commit()
+
+    def _usage_rows(self, sim_card_id: int, usage_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Map an API usage response to usage_records rows"""
+        rows = []
+
+        for daily_stat in usage_data.get('stats', []):
+            data = daily_stat.get('data', {})
+            sms = daily_stat.get('sms', {})
+
+            rows.append({
+                'sim_card_id': sim_card_id,
+                'date': datetime.fromisoformat(daily_stat['date'].replace('Z', '+00:00')),
+
+                # Data usage
+                'data_volume_mb': float(data.get('volume', 0)),
+                'data_volume_rx_mb': float(data.get('volume_rx', 0)),
+                'data_volume_tx_mb': float(data.get('volume_tx', 0)),
+
+                # SMS usage
+                'sms_volume': int(sms.get('volume', 0)),
+                'sms_volume_mo': int(sms.get('volume_rx', 0)),
+                'sms_volume_mt': int(sms.get('volume_tx', 0)),
+
+                'created_at': datetime.utcnow(),
+            })
+
+        return rows
+
     def collect_usage_data(
         self,
         iccid: str,
@@ -129,54 +483,482 @@ class DataCollector:
             # Fetch usage from API
             usage_data = self.api_client.get_sim_usage(iccid, start_date, end_date)
 
-            for daily_stat in usage_data.get('stats', []):
-                date = datetime.fromisoformat(daily_stat['date'].replace('Z', '+00:00'))
+            upsert_usage_records(db, self._usage_rows(sim.id, usage_data))
+            db.commit()
 
-                # Check if record exists
-                existing = db.query(UsageRecord).filter(
-                    UsageRecord.sim_card_id == sim.id,
-                    UsageRecord.date == date
-                ).first()
+    def collect_all_usage_data(
+        self,
+        days_back: int = 7,
+        mode: str = 'upsert',
+        incremental: bool = True,
+        workers: Optional[int] = None,
+        due_only: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Collect usage data for all SIMs
 
-                if existing:
-                    # Update existing record
-                    usage_record = existing
-                else:
-                    # Create new record
-                    usage_record = UsageRecord(
-                        sim_card_id=sim.id,
-                        date=date
-                    )
-                    db.add(usage_record)
+        In incremental mode each SIM is only asked for the days since its
+        watermark (plus the re-check window), and idle or disabled SIMs that
+        are already finalized through yesterday are skipped. days_back only
+        applies to SIMs that have never been collected. With `due_only`,
+        only the SIMs the poll scheduler hands out this tick are collected,
+        and each SIM's next poll is scheduled once its usage is written.
+        """
+        plan, skipped, finalized_through = self.plan_usage_collection(
+            days_back, incremental, due_only
+        )
+        result = self._collect_usage(
+            self.usage_batches(plan), 'usage_update', mode,
+            finalized_through=finalized_through, workers=workers, schedule_polls=due_only
+        )
+        if incremental:
+            result['skipped'] = skipped
+        return result
+
+    def plan_usage_collection(
+        self,
+        days_back: int = 7,
+        incremental: bool = True,
+        due_only: bool = False
+    ):
+        """
+        Work out which SIMs need which date range, returning
+        (plan, skipped, finalized_through) for _collect_usage
+        """
+        today = date.today()
 
-                # Update data usage
-                data = daily_stat.get('data', {})
-                usage_record.data_volume_mb = float(data.get('volume', 0))
-                usage_record.data_volume_rx_mb = float(data.get('volume_rx', 0))
-                usage_record.data_volume_tx_mb = float(data.get('volume_tx', 0))
+        if due_only:
+            sims = PollScheduler().claim_due()
+        else:
+            with get_db() as db:
+                sims = db.query(
+                    SIMCard.id,
+                    SIMCard.iccid,
+                    SIMCard.status,
+                    SIMCard.usage_collected_through,
+                    SIMCard.last_usage_at
+                ).all()
 
-                # Update SMS usage
-                sms = daily_stat.get('sms', {})
-                usage_record.sms_volume = int(sms.get('volume', 0))
-                usage_record.sms_volume_mo = int(sms.get('volume_rx', 0))
-                usage_record.sms_volume_mt = int(sms.get('volume_tx', 0))
+        if not incremental:
+            start_date = (today - timedelta(days=days_back)).isoformat()
+            plan = {(start_date, today.isoformat()): [(sim.id, sim.iccid) for sim in sims]}
+            return plan, 0, None
 
-            db.commit()
+        plan, skipped = self._incremental_usage_plan(sims, days_back, today)
+        logger.info(f"Incremental usage collection: {len(sims) - skipped} SIMs due, {skipped} skipped")
+        return plan, skipped, today - timedelta(days=1)
 
-    def collect_all_usage_data(self, days_back: int = 7):
-        """Collect usage data for all SIMs"""
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+    def usage_batches(self, plan: Dict[Tuple[str, str], List[Tuple[int, str]]]):
+        """Cut a usage plan into (key, start_date, end_date, sims) batches of USAGE_WORKER_BATCH_SIZE"""
+        size = config.USAGE_WORKER_BATCH_SIZE
+        return [
+            (f"{start_date}:{end_date}:{i // size}", start_date, end_date, sims[i:i + size])
+            for (start_date, end_date), sims in plan.items()
+            for i in range(0, len(sims), size)
+        ]
+
+    def backfill_batches(
+        self,
+        start_date: str,
+        end_date: str,
+        sims: List[Tuple[int, str]],
+        chunk_days: int
+    ):
+        """
+        Cut a backfill into (key, start_date, end_date, sims) work units of
+        one date chunk and one window of USAGE_WORKER_BATCH_SIZE SIM ids
+
+        Windows are stable between runs, so unit keys can be checkpointed.
+        """
+        windows = defaultdict(list)
+        for sim_id, iccid in sims:
+            windows[sim_id // config.USAGE_WORKER_BATCH_SIZE].append((sim_id, iccid))
+
+        first, last = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        batches = []
+        chunk_start = first
+        while chunk_start <= last:
+            chunk_end = min(last, chunk_start + timedelta(days=chunk_days - 1))
+            for window, window_sims in sorted(windows.items()):
+                batches.append((
+                    f"{chunk_start.isoformat()}:{window}",
+                    chunk_start.isoformat(), chunk_end.isoformat(), window_sims
+                ))
+            chunk_start = chunk_end + timedelta(days=1)
+        return batches
+
+    def run_usage_task(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Collect one queued usage task (see Dispatcher.dispatch_usage)
+
+        `sims` holds [sim_id, iccid, start_date, end_date] entries;
+        `schedule_polls` marks SIMs claimed by the poll scheduler.
+        """
+        plan = defaultdict(list)
+        for sim_id, iccid, start_date, end_date in payload['sims']:
+            plan[(start_date, end_date)].append((sim_id, iccid))
+
+        finalized_through = payload.get('finalized_through')
+        result = self._collect_usage(
+            self.usage_batches(plan), 'usage_task', payload.get('mode', 'upsert'),
+            finalized_through=date.fromisoformat(finalized_through) if finalized_through else None,
+            workers=1,
+            schedule_polls=payload.get('schedule_polls', False)
+        )
+        if result['errors'] and not result['processed']:
+            raise RuntimeError(f"Usage task failed for all {result['errors']} SIMs")
+        return result
+
+    def _incremental_usage_plan(self, sims, days_back: int, today: date):
+        """Group SIMs by the date range they still need, returning (plan, skipped)"""
+        last_finalized = today - timedelta(days=1)
+        idle_cutoff = today - timedelta(days=config.USAGE_IDLE_DAYS)
+        plan = defaultdict(list)
+        skipped = 0
+
+        for sim in sims:
+            watermark = sim.usage_collected_through.date() if sim.usage_collected_through else None
+
+            if watermark is None:
+                start = today - timedelta(days=days_back)
+            elif watermark < last_finalized:
+                # New finalized days, plus the days the provider may still restate
+                start = watermark - timedelta(days=config.USAGE_RECHECK_DAYS - 1)
+            else:
+                active = (
+                    sim.status == 'Enabled'
+                    and sim.last_usage_at is not None
+                    and sim.last_usage_at.date() >= idle_cutoff
+                )
+                if not active:
+                    skipped += 1
+                    continue
+                # Finalized already, only today's running total can change
+                start = today
+
+            plan[(start.isoformat(), today.isoformat())].append((sim.id, sim.iccid))
+
+        return plan, skipped
+
+    def backfill_usage(
+        self,
+        start_date: str,
+        end_date: str,
+        mode: str = 'copy',
+        workers: Optional[int] = None,
+        chunk_days: Optional[int] = None,
+        resume: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Load historical usage for all SIMs, by default through the COPY path
+
+        The range is split into (date chunk x SIM window) units that run in
+        parallel. Finished units are checkpointed, and with `resume` an
+        interrupted backfill of the same range skips them.
+        """
+        chunk_days = max(1, chunk_days or config.BACKFILL_CHUNK_DAYS)
+        run = {'start_date': start_date, 'end_date': end_date, 'chunk_days': chunk_days}
+
+        log_entry = None
+        if resume:
+            log_entry = self._resumable_log('usage_backfill', ('running', 'failed', 'partial'), run)
+            if log_entry is not None:
+                logger.info(
+                    f"Resuming usage backfill #{log_entry.id}: "
+                    f"{len(log_entry.checkpoint.get('done', []))} units already done"
+                )
 
         with get_db() as db:
-            sims = db.query(SIMCard).all()
+            sims = db.query(SIMCard.id, SIMCard.iccid).order_by(SIMCard.id).all()
 
-            for sim in sims:
-                try:
-                    self.collect_usage_data(sim.iccid, start_date, end_date)
-                    logger.info(f"Collected usage for {sim.iccid}")
-                except Exception as e:
-                    logger.error(f"Failed to collect usage for {sim.iccid}: {e}")
+        batches = self.backfill_batches(
+            start_date, end_date, [(sim.id, sim.iccid) for sim in sims], chunk_days
+        )
+        return self._collect_usage(
+            batches, 'usage_backfill', mode, workers=workers,
+            checkpoint=True, log_entry=log_entry, details=run
+        )
+
+    def _collect_usage(
+        self,
+        batches: List[Tuple[str, str, str, List[Tuple[int, str]]]],
+        collection_type: str,
+        mode: str,
+        finalized_through: Optional[date] = None,
+        workers: Optional[int] = None,
+        checkpoint: bool = False,
+        log_entry: Optional[DataCollectionLog] = None,
+        details: Optional[Dict[str, Any]] = None,
+        schedule_polls: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Collect usage for (key, start_date, end_date, sims) batches of
+        (sim_id, iccid) pairs on a pool of `workers` threads.
+
+        Each worker fetches a batch concurrently and writes it with its own
+        session. mode 'upsert' uses batched INSERT ... ON CONFLICT, mode
+        'copy' streams rows through COPY and a staging table merge.
+        Progress and throughput are written to the run's log entry after
+        every batch.
+
+        With `finalized_through`, each successfully collected SIM's usage
+        watermark is advanced in the same transaction as its rows. With
+        `schedule_polls`, so is its next poll time (see PollScheduler).
+
+        With `checkpoint`, the keys of batches finished without errors are
+        recorded on the log entry. Passing an interrupted run's `log_entry`
+        continues that run, skipping its finished batches.
+        """
+        if mode == 'copy':
+            write_rows, write_batch_size = copy_usage_records, config.USAGE_COPY_BATCH_SIZE
+        elif mode == 'upsert':
+            write_rows, write_batch_size = upsert_usage_records, config.USAGE_WRITE_BATCH_SIZE
+        else:
+            raise ValueError(f"Unknown usage ingestion mode: {mode}")
+
+        workers = max(1, workers or config.USAGE_COLLECTION_WORKERS)
+        # Workers share the process-wide rate limiter, so split the fan-out between them
+        max_concurrency = max(1, config.API_MAX_CONCURRENCY // workers)
+
+        total_sims = sum(len(sims) for _, _, _, sims in batches)
+        stop = threading.Event()
+
+        poll_stretch = None
+        if schedule_polls:
+            with get_db() as db:
+                poll_stretch = PollScheduler().stretch_factor(db)
+
+        if log_entry is None:
+            log_entry = DataCollectionLog(
+                collection_type=collection_type,
+                started_at=datetime.utcnow(),
+                status='running'
+            )
+            previous = {}
+        else:
+            previous = dict(log_entry.checkpoint or {})
+            log_entry.status = 'running'
+            log_entry.completed_at = None
+        log_entry.details = {
+            **(details or {}),
+            'workers': workers,
+            'batches': len(batches),
+            'sims_total': total_sims,
+        }
+
+        done = set(previous.get('done', []))
+        todo = [batch for batch in batches if batch[0] not in done]
+        run_started = datetime.utcnow()
+        timer = PhaseTimer()
+        token_wait_before = self._token_wait_seconds()
+
+        try:
+            with get_db() as db:
+                db.add(log_entry)
+                db.commit()
+
+                processed = previous.get('processed', 0)
+                errors = []
+                inserted = previous.get('inserted', 0)
+                updated = previous.get('updated', 0)
+                processed_this_run = rows_this_run = 0
+                batches_done = len(batches) - len(todo)
+                rows_per_second = None
+
+                logger.info(
+                    f"Collecting usage for {total_sims} SIMs in {len(batches)} batches "
+                    f"on {workers} workers"
+                    + (f", {batches_done} batches already done" if batches_done else "")
+                )
+
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="usage-worker") as pool:
+                    futures = {
+                        pool.submit(
+                            self._collect_usage_batch, start_date, end_date, sims,
+                            write_rows, write_batch_size, finalized_through, max_concurrency, stop, timer,
+                            poll_stretch
+                        ): key
+                        for key, start_date, end_date, sims in todo
+                    }
+
+                    for future in as_completed(futures):
+                        try:
+                            batch = future.result()
+                        except Exception as e:
+                            # The batch failed before committing anything; its SIMs stay due for the next run
+                            logger.error(f"Usage batch failed: {e}")
+                            errors.append({'iccid': None, 'error': str(e)})
+                            continue
+
+                        processed += batch['processed']
+                        errors.extend(batch['errors'])
+                        inserted += batch['inserted']
+                        updated += batch['updated']
+                        processed_this_run += batch['processed']
+                        rows_this_run += batch['inserted'] + batch['updated']
+                        batches_done += 1
+
+                        # Progress
+                        duration = (datetime.utcnow() - run_started).total_seconds()
+                        rows_per_second = rows_this_run / duration if duration > 0 else None
+                        log_entry.sims_processed = processed
+                        log_entry.errors_count = len(errors)
+                        log_entry.rows_inserted = inserted
+                        log_entry.rows_updated = updated
+                        log_entry.rows_per_second = rows_per_second
+                        log_entry.sims_per_second = processed_this_run / duration if duration > 0 else None
+                        log_entry.details = {**log_entry.details, 'batches_done': batches_done}
+
+                        # Checkpoint; batches with errors or cut short are redone on resume
+                        if checkpoint:
+                            if not batch['errors'] and not stop.is_set():
+                                done.add(futures[future])
+                            log_entry.checkpoint = {
+                                'done': sorted(done),
+                                'updated_at': datetime.utcnow().isoformat(),
+                                'processed': processed,
+                                'inserted': inserted,
+                                'updated': updated,
+                            }
+                        db.commit()
+
+                if stop.is_set():
+                    logger.error("Aborted usage collection: 1NCE API circuit is open")
+
+                # Update log
+                log_entry.completed_at = datetime.utcnow()
+                if not errors and not stop.is_set():
+                    log_entry.status = 'success'
+                else:
+                    log_entry.status = 'partial' if processed else 'failed'
+                log_entry.errors_count = len(errors)
+                log_entry.error_details = errors if errors else None
+                self._record_timings(
+                    log_entry, timer, token_wait_before, processed_this_run, rows_this_run,
+                    (datetime.utcnow() - run_started).total_seconds()
+                )
+                rows_per_second = log_entry.rows_per_second
+                db.commit()
+
+                logger.info(
+                    f"Collected usage for {processed} SIMs: {inserted} rows inserted, "
+                    f"{updated} updated, {len(errors)} errors"
+                    + (f" ({rows_per_second:.0f} rows/s)" if rows_per_second else "")
+                )
+
+                return {
+                    'success': True,
+                    'processed': processed,
+                    'errors': len(errors),
+                    'rows_inserted': inserted,
+                    'rows_updated': updated,
+                    'rows_per_second': rows_per_second,
+                    'batches': len(batches),
+                    'batches_done': batches_done
+                }
+        except Exception as e:
+            logger.error(f"Usage collection failed: {e}")
+            self._mark_failed(log_entry)
+            raise
+
+    def _collect_usage_batch(
+        self,
+        start_date: str,
+        end_date: str,
+        sims: List[Tuple[int, str]],
+        write_rows,
+        write_batch_size: int,
+        finalized_through: Optional[date],
+        max_concurrency: int,
+        stop: threading.Event,
+        timer: PhaseTimer,
+        poll_stretch: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch and write usage for one batch of SIMs in a session of its own.
+        With `poll_stretch`, collected SIMs get their next poll scheduled.
+        If the batch fails part-way, the counts of the chunks it already
+        committed are returned along with the error.
+        """
+        processed = 0
+        errors = []
+        inserted = updated = 0
+
+        if stop.is_set():
+            return {'processed': 0, 'errors': [], 'inserted': 0, 'updated': 0}
+
+        sim_ids = {iccid: sim_id for sim_id, iccid in sims}
+        through = datetime.combine(
+            min(finalized_through, date.fromisoformat(end_date)), datetime.min.time()
+        ) if finalized_through else None
+
+        latencies: List[float] = []
+        try:
+            with get_db() as db:
+                pending_rows: List[Dict[str, Any]] = []
+                pending_watermarks: List[Dict[str, Any]] = []
+                poll_scheduler = PollScheduler() if poll_stretch is not None else None
+
+                def flush():
+                    nonlocal processed, inserted, updated
+                    with timer.phase('db_write'):
+                        batch_inserted, batch_updated = write_rows(db, pending_rows)
+                        if finalized_through and pending_watermarks:
+                            advance_usage_watermarks(db, pending_watermarks)
+                        if poll_scheduler:
+                            poll_scheduler.schedule_next(
+                                db, [item['sim_id'] for item in pending_watermarks], poll_stretch
+                            )
+                    with timer.phase('commit'):
+                        db.commit()
+                    # Only SIMs whose rows are committed count as processed
+                    processed += len(pending_watermarks)
+                    inserted += batch_inserted
+                    updated += batch_updated
+                    pending_rows.clear()
+                    pending_watermarks.clear()
+
+                # Usage is fetched concurrently and written in batches as it arrives
+                for iccid, usage_data in timer.timed(self.api_client.iter_batch(
+                    'get_sim_usage', list(sim_ids), start_date, end_date,
+                    max_concurrency=max_concurrency, latencies=latencies
+                )):
+                    try:
+                        if 'error' in usage_data:
+                            raise Exception(usage_data['error'])
+                        with timer.phase('parse'):
+                            rows = self._usage_rows(sim_ids[iccid], usage_data)
+                        pending_rows.extend(rows)
+                        pending_watermarks.append({
+                            'sim_id': sim_ids[iccid],
+                            'through': through,
+                            'last_usage': max(
+                                (row['date'] for row in rows
+                                 if row['data_volume_mb'] or row['sms_volume']),
+                                default=None
+                            )
+                        })
+                    except Exception as e:
+                        errors.append({'iccid': iccid, 'error': str(e)})
+                        logger.error(f"Failed to collect usage for {iccid}: {e}")
+
+                    if len(pending_rows) >= write_batch_size:
+                        flush()
+
+                    if self.api_client.circuit_breaker.state == 'open':
+                        # The API is down, don't burn through the remaining SIMs
+                        stop.set()
+                        break
+
+                if pending_rows or pending_watermarks:
+                    flush()
+        except Exception as e:
+            # Chunks committed before the failure stay written, report them with the error
+            logger.error(f"Usage batch failed: {e}")
+            errors.append({'iccid': None, 'error': str(e)})
+        timer.record_latencies(latencies)
+
+        return {'processed': processed, 'errors': errors, 'inserted': inserted, 'updated': updated}
 
     def collect_connectivity_info(self, iccid: str):
         """Collect and store connectivity information for a SIM"""
@@ -188,22 +970,401 @@ class DataCollector:
             # Fetch connectivity info from API
             conn_data = self.api_client.get_sim_connectivity(iccid)
 
-            # Create connectivity log
-            conn_log = ConnectivityLog(
-                sim_card_id=sim.id,
-                current_location_retrieved=conn_data.get('current_location_retrieved'),
-                age_of_location_minutes=conn_data.get('age_of_location_minutes'),
-                cid=conn_data.get('cid'),
-                lac=conn_data.get('lac'),
-                mcc=conn_data.get('mcc'),
-                mnc=conn_data.get('mnc'),
-                request_timestamp=datetime.fromisoformat(
-                    conn_data['request_timestamp'].replace('Z', '+00:00')
-                ) if conn_data.get('request_timestamp') else None,
-                reply_timestamp=datetime.fromisoformat(
-                    conn_data['reply_timestamp'].replace('Z', '+00:00')
-                ) if conn_data.get('reply_timestamp') else None
+            observation = self._connectivity_observation(sim.id, conn_data)
+            if observation:
+                record_connectivity(db, [observation])
+                db.commit()
+
+    def _connectivity_observation(self, sim_card_id: int, conn_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map a connectivity_info response to a cell observation, or None without a location"""
+        if not conn_data.get('current_location_retrieved') or conn_data.get('cid') is None:
+            return None
+
+        observed_at = datetime.utcnow()
+        if conn_data.get('reply_timestamp'):
+            observed_at = _normalize_value(
+                datetime.fromisoformat(conn_data['reply_timestamp'].replace('Z', '+00:00'))
             )
+        # The network reports where the SIM was `age` minutes before the reply
+        if conn_data.get('age_of_location_minutes'):
+            observed_at -= timedelta(minutes=conn_data['age_of_location_minutes'])
 
-            db.add(conn_log)
-            db.commit()
+        return {
+            'sim_card_id': sim_card_id,
+            'mcc': conn_data.get('mcc'),
+            'mnc': conn_data.get('mnc'),
+            'lac': conn_data.get('lac'),
+            'cid': conn_data.get('cid'),
+            'age_of_location_minutes': conn_data.get('age_of_location_minutes'),
+            'observed_at': observed_at,
+        }
+
+    def _collect_batched(
+        self,
+        collection_type: str,
+        fetch: Callable[[List[float]], Iterable[Tuple[str, Dict[str, Any]]]],
+        parse: Callable[[str, Dict[str, Any]], int],
+        flush: Callable[[Any], Tuple[int, int]],
+        batch_size: int,
+        details: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Shared run of the fleet-wide polls, logged as `collection_type`
+
+        `fetch(latencies)` yields (iccid, result) pairs of a concurrent batch
+        call. `parse(iccid, result)` queues one SIM's rows and returns how
+        many are pending; once `batch_size` are, `flush(db)` writes them and
+        returns (rows inserted, rows updated). `details()` is stored on the
+        log entry. Returns the processed, errors, inserted and updated
+        counts; a run that raises is marked failed.
+        """
+        log_entry = DataCollectionLog(
+            collection_type=collection_type,
+            started_at=datetime.utcnow(),
+            status='running'
+        )
+
+        try:
+            with get_db() as db:
+                db.add(log_entry)
+                db.commit()
+
+                processed = 0
+                errors = []
+                inserted = updated = 0
+                timer = PhaseTimer()
+                token_wait_before = self._token_wait_seconds()
+                latencies: List[float] = []
+
+                def write():
+                    nonlocal inserted, updated
+                    with timer.phase('db_write'):
+                        batch_inserted, batch_updated = flush(db)
+                    with timer.phase('commit'):
+                        db.commit()
+                    inserted += batch_inserted
+                    updated += batch_updated
+
+                for iccid, result in timer.timed(fetch(latencies)):
+                    if 'error' in result:
+                        errors.append({'iccid': iccid, 'error': result['error']})
+                        continue
+
+                    try:
+                        with timer.phase('parse'):
+                            pending = parse(iccid, result)
+                    except Exception as e:
+                        errors.append({'iccid': iccid, 'error': str(e)})
+                        logger.error(f"Failed to parse {collection_type} for {iccid}: {e}")
+                        continue
+
+                    processed += 1
+                    if pending >= batch_size:
+                        write()
+
+                    if self.api_client.circuit_breaker.state == 'open':
+                        logger.error(f"Aborting {collection_type} collection: 1NCE API circuit is open")
+                        break
+
+                # Whatever the last batch left pending
+                write()
+
+                # Update log
+                log_entry.completed_at = datetime.utcnow()
+                if not errors:
+                    log_entry.status = 'success'
+                else:
+                    log_entry.status = 'partial' if processed else 'failed'
+                log_entry.sims_processed = processed
+                log_entry.errors_count = len(errors)
+                log_entry.error_details = errors if errors else None
+                log_entry.rows_inserted = inserted
+                log_entry.rows_updated = updated
+                log_entry.details = details()
+                timer.record_latencies(latencies)
+                self._record_timings(
+                    log_entry, timer, token_wait_before, processed, inserted + updated,
+                    (log_entry.completed_at - log_entry.started_at).total_seconds()
+                )
+                db.commit()
+
+                return {
+                    'processed': processed,
+                    'errors': len(errors),
+                    'inserted': inserted,
+                    'updated': updated
+                }
+        except Exception as e:
+            logger.error(f"{collection_type.capitalize()} collection failed: {e}")
+            self._mark_failed(log_entry)
+            raise
+
+    def _run_sims_task(
+        self,
+        collect: Callable[[List[Tuple[int, str]]], Dict[str, Any]],
+        payload: Dict[str, Any],
+        name: str
+    ) -> Dict[str, Any]:
+        """Run `collect` on one queued batch of [sim_id, iccid] pairs, failing the task if every SIM failed"""
+        result = collect([(sim_id, iccid) for sim_id, iccid in payload['sims']])
+        if result['errors'] and not result['processed']:
+            raise RuntimeError(f"{name} task failed for all {result['errors']} SIMs")
+        return result
+
+    def collect_fleet_connectivity(self, sims: Optional[List[Tuple[int, str]]] = None) -> Dict[str, Any]:
+        """
+        Poll connectivity for many SIMs concurrently (by default the enabled
+        SIMs whose turn it is, see PollScheduler.background_sims) and fold
+        the results into cell intervals in batches
+        """
+        if sims is None:
+            with get_db() as db:
+                sims = PollScheduler().background_sims(db, 'connectivity')
+
+        sim_ids = {iccid: sim_id for sim_id, iccid in sims}
+        pending: List[Dict[str, Any]] = []
+        no_location = 0
+
+        def parse(iccid: str, conn_data: Dict[str, Any]) -> int:
+            nonlocal no_location
+            observation = self._connectivity_observation(sim_ids[iccid], conn_data)
+            if observation is None:
+                no_location += 1
+            else:
+                pending.append(observation)
+            return len(pending)
+
+        def flush(db) -> Tuple[int, int]:
+            written = record_connectivity(db, pending)
+            pending.clear()
+            return written
+
+        run = self._collect_batched(
+            'connectivity',
+            lambda latencies: self.api_client.iter_batch(
+                'get_sim_connectivity', list(sim_ids), latencies=latencies
+            ),
+            parse,
+            flush,
+            config.CONNECTIVITY_WRITE_BATCH_SIZE,
+            lambda: {'no_location': no_location}
+        )
+
+        logger.info(
+            f"Collected connectivity for {run['processed']} SIMs: {run['inserted']} cell changes, "
+            f"{run['updated']} unchanged, {no_location} without location, {run['errors']} errors"
+        )
+
+        return {
+            'success': True,
+            'processed': run['processed'],
+            'errors': run['errors'],
+            'transitions': run['inserted'],
+            'unchanged': run['updated'],
+            'no_location': no_location
+        }
+
+    def run_connectivity_task(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect connectivity for one queued batch of [sim_id, iccid] pairs"""
+        return self._run_sims_task(self.collect_fleet_connectivity, payload, 'Connectivity')
+
+    def _event_rows(self, sim_card_id: int, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Map API events to sim_events rows"""
+        rows = []
+        for event in events:
+            if event.get('id') is not None:
+                event_key = str(event['id'])
+            else:
+                event_key = hashlib.sha256(
+                    json.dumps(event, sort_keys=True, default=str).encode()
+                ).hexdigest()
+
+            rows.append({
+                'sim_card_id': sim_card_id,
+                'event_key': event_key,
+                'event_type': (event.get('event_type') or 'unknown')[:50],
+                'event_description': (event.get('description') or '')[:500] or None,
+                'event_data': event,
+                'occurred_at': _normalize_value(
+                    datetime.fromisoformat(event['timestamp'].replace('Z', '+00:00'))
+                ),
+                'created_at': datetime.utcnow(),
+            })
+        return rows
+
+    def collect_events(self, sims: Optional[List[Tuple[int, str]]] = None) -> Dict[str, Any]:
+        """
+        Collect new events for many SIMs concurrently (by default the enabled
+        SIMs whose turn it is, see PollScheduler.background_sims)
+
+        Each SIM keeps a cursor at its newest stored event; only events at
+        or after it are fetched, and the overlap is dropped on insert. A SIM
+        with more than EVENTS_MAX_PAGES pages of new events keeps its cursor
+        and records the page to continue from, so later runs drain the
+        backlog before the cursor moves past it.
+        """
+        with get_db() as db:
+            query = db.query(
+                SIMCard.id, SIMCard.iccid, SIMCard.events_cursor_at,
+                SIMCard.events_backlog_page, SIMCard.events_backlog_cursor
+            )
+            if sims is None:
+                query = query.filter(PollScheduler().background_filter(db, 'events'))
+            else:
+                query = query.filter(SIMCard.id.in_([sim_id for sim_id, _ in sims]))
+            known = query.all()
+        cursors = {sim.iccid: sim.events_cursor_at for sim in known}
+        start_pages = {sim.iccid: sim.events_backlog_page for sim in known if sim.events_backlog_page}
+        backlog_cursors = {sim.iccid: sim.events_backlog_cursor for sim in known}
+        sim_ids = {sim.iccid: sim.id for sim in known}
+
+        fetched = 0
+        truncated = 0
+        pending_rows: List[Dict[str, Any]] = []
+        pending_cursors: List[Dict[str, Any]] = []
+
+        def parse(iccid: str, result: Dict[str, Any]) -> int:
+            nonlocal fetched, truncated
+            rows = self._event_rows(sim_ids[iccid], result['events'])
+            fetched += len(rows)
+            newest = max((row['occurred_at'] for row in rows), default=None)
+            backlog_cursor = max(
+                filter(None, (backlog_cursors.get(iccid), newest)), default=None
+            )
+            if result['truncated']:
+                truncated += 1
+                logger.warning(
+                    f"SIM {iccid} has more than {config.EVENTS_MAX_PAGES} pages of new events, "
+                    f"continuing from page {result['next_page']} next run"
+                )
+                # Keep the cursor until everything before the collected events is in
+                state = {'cursor': None, 'backlog_page': result['next_page'], 'backlog_cursor': backlog_cursor}
+            else:
+                state = {'cursor': backlog_cursor, 'backlog_page': None, 'backlog_cursor': None}
+
+            pending_rows.extend(rows)
+            if rows or result['truncated'] or iccid in start_pages:
+                pending_cursors.append({'sim_id': sim_ids[iccid], **state})
+            return len(pending_rows)
+
+        def flush(db) -> Tuple[int, int]:
+            inserted = insert_sim_events(db, pending_rows)
+            if pending_cursors:
+                advance_event_cursors(db, pending_cursors)
+            pending_rows.clear()
+            pending_cursors.clear()
+            return inserted, 0
+
+        run = self._collect_batched(
+            'events',
+            lambda latencies: self.api_client.iter_batch(
+                'get_sim_events_since',
+                list(sim_ids),
+                since_by_iccid=cursors,
+                page_size=config.EVENTS_PAGE_SIZE,
+                max_pages=config.EVENTS_MAX_PAGES,
+                start_page_by_iccid=start_pages,
+                latencies=latencies
+            ),
+            parse,
+            flush,
+            config.EVENTS_WRITE_BATCH_SIZE,
+            lambda: {'fetched': fetched, 'truncated': truncated}
+        )
+
+        logger.info(
+            f"Collected events for {run['processed']} SIMs: {run['inserted']} new of {fetched} fetched, "
+            f"{truncated} truncated, {run['errors']} errors"
+        )
+
+        return {
+            'success': True,
+            'processed': run['processed'],
+            'errors': run['errors'],
+            'fetched': fetched,
+            'inserted': run['inserted'],
+            'truncated': truncated
+        }
+
+    def run_events_task(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect events for one queued batch of [sim_id, iccid] pairs"""
+        return self._run_sims_task(self.collect_events, payload, 'Event')
+
+    def _quota_snapshots(self, sim_card_id: int, quotas: Dict[str, Any], recorded_at: datetime) -> List[Dict[str, Any]]:
+        """Map data and SMS quota responses to quota_snapshots rows"""
+        snapshots = []
+        for quota_type in ('data', 'sms'):
+            quota = quotas.get(quota_type)
+            if not quota:
+                continue
+
+            status = quota.get('quota_status')
+            volume = quota.get('volume')
+            if quota_type == 'sms' and volume is not None:
+                volume = int(volume)
+
+            snapshots.append({
+                'sim_card_id': sim_card_id,
+                'quota_type': quota_type,
+                'recorded_at': recorded_at,
+                'volume': volume,
+                'total_volume': quota.get('total_volume'),
+                'quota_status_id': status.get('id') if isinstance(status, dict) else status,
+                'threshold_date': _parse_timestamp(quota.get('threshold_reached_date')),
+                'exceeded_date': _parse_timestamp(quota.get('quota_exceeded_date')),
+                'expiry_date': _parse_timestamp(quota.get('expiry_date')),
+            })
+        return snapshots
+
+    def collect_quotas(self, sims: Optional[List[Tuple[int, str]]] = None) -> Dict[str, Any]:
+        """
+        Poll data and SMS quota for many SIMs concurrently (by default the
+        enabled SIMs whose turn it is, see PollScheduler.background_sims),
+        recording changed values and refreshing sim_cards
+        """
+        if sims is None:
+            with get_db() as db:
+                sims = PollScheduler().background_sims(db, 'quota')
+
+        sim_ids = {iccid: sim_id for sim_id, iccid in sims}
+        pending: List[Dict[str, Any]] = []
+        unchanged = 0
+
+        def parse(iccid: str, quotas: Dict[str, Any]) -> int:
+            pending.extend(self._quota_snapshots(sim_ids[iccid], quotas, datetime.utcnow()))
+            return len(pending)
+
+        def flush(db) -> Tuple[int, int]:
+            nonlocal unchanged
+            recorded, batch_unchanged = record_quota_snapshots(db, pending)
+            unchanged += batch_unchanged
+            pending.clear()
+            return recorded, 0
+
+        run = self._collect_batched(
+            'quota',
+            lambda latencies: self.api_client.iter_batch(
+                'get_sim_quotas', list(sim_ids), latencies=latencies
+            ),
+            parse,
+            flush,
+            config.QUOTA_WRITE_BATCH_SIZE,
+            lambda: {'unchanged': unchanged}
+        )
+
+        logger.info(
+            f"Collected quota for {run['processed']} SIMs: {run['inserted']} changed, "
+            f"{unchanged} unchanged, {run['errors']} errors"
+        )
+
+        return {
+            'success': True,
+            'processed': run['processed'],
+            'errors': run['errors'],
+            'recorded': run['inserted'],
+            'unchanged': unchanged
+        }
+
+    def run_quota_task(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect quota for one queued batch of [sim_id, iccid] pairs"""
+        return self._run_sims_task(self.collect_quotas, payload, 'Quota')
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from typing import Dict, Any, Optional, Callable
+import logging
+
+from src.config import config
+from src.database.connection import get_db
+from src.database.models import SIMCard
+from src.services.data_collector import DataCollector
+from src.services.poll_scheduler import PollScheduler
+from src.services.work_queue import WorkQueue, get_work_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Dispatcher:
+    """
+    Turns collection runs into chunked queue tasks for the consumers.
+
+    Usage is split into one task per window of USAGE_WORKER_BATCH_SIZE SIM
+    ids. Windows are stable between full runs, so a window whose task is
+    still queued or running is skipped instead of collected twice.
+    """
+
+    def __init__(self, queue: Optional[WorkQueue] = None):
+        self.queue = queue or get_work_queue()
+        self.collector = DataCollector()
+
+    def dispatch_usage(
+        self,
+        days_back: int = 1,
+        mode: str = 'upsert',
+        incremental: bool = True,
+        due_only: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Queue usage collection for every SIM, or with `due_only` for the
+        SIMs the poll scheduler claimed this tick
+        """
+        plan, skipped, finalized_through = self.collector.plan_usage_collection(
+            days_back, incremental, due_only
+        )
+
+        windows = defaultdict(list)
+        for (start_date, end_date), sims in plan.items():
+            for sim_id, iccid in sims:
+                windows[sim_id // config.USAGE_WORKER_BATCH_SIZE].append(
+                    [sim_id, iccid, start_date, end_date]
+                )
+
+        tasks = [
+            {
+                'task_type': 'usage',
+                'payload': {
+                    'sims': sims,
+                    'finalized_through': finalized_through.isoformat() if finalized_through else None,
+                    'mode': mode,
+                    'schedule_polls': due_only,
+                },
+                # Claimed SIMs skipped here are due again when their lease runs out
+                'dedupe_key': f"usage:{window}",
+            }
+            for window, sims in sorted(windows.items())
+        ]
+        queued = self.queue.enqueue_many(tasks)
+
+        result = {
+            'tasks': len(tasks),
+            'queued': len(queued),
+            'in_flight': len(tasks) - len(queued),
+            'sims': sum(len(sims) for sims in windows.values()),
+            'skipped': skipped,
+        }
+        logger.info(
+            f"Dispatched usage collection: {result['queued']} tasks queued for "
+            f"{result['sims']} SIMs, {result['in_flight']} already in flight"
+        )
+        return result
+
+    def dispatch_backfill(self, start_date: str, end_date: str, chunk_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Queue a usage backfill as one COPY-mode task per (date chunk x SIM
+        window) unit; units already queued or running are skipped
+        """
+        chunk_days = max(1, chunk_days or config.BACKFILL_CHUNK_DAYS)
+        with get_db() as db:
+            sims = db.query(SIMCard.id, SIMCard.iccid).order_by(SIMCard.id).all()
+
+        batches = self.collector.backfill_batches(
+            start_date, end_date, [(sim.id, sim.iccid) for sim in sims], chunk_days
+        )
+        tasks = [
+            {
+                'task_type': 'usage',
+                'payload': {
+                    'sims': [[sim_id, iccid, chunk_start, chunk_end] for sim_id, iccid in unit_sims],
+                    'finalized_through': None,
+                    'mode': 'copy',
+                },
+                'dedupe_key': f"backfill:{key}",
+            }
+            for key, chunk_start, chunk_end, unit_sims in batches
+        ]
+        queued = self.queue.enqueue_many(tasks)
+
+        result = {
+            'tasks': len(tasks),
+            'queued': len(queued),
+            'in_flight': len(tasks) - len(queued),
+            'sims': len(sims),
+        }
+        logger.info(
+            f"Dispatched usage backfill {start_date}..{end_date}: {result['queued']} tasks queued "
+            f"for {result['sims']} SIMs, {result['in_flight']} already in flight"
+        )
+        return result
+
+    def _dispatch_windows(self, task_type: str, sims) -> Dict[str, Any]:
+        """Queue one `task_type` task per window of SIM ids"""
+        windows = defaultdict(list)
+        for sim_id, iccid in sims:
+            windows[sim_id // config.USAGE_WORKER_BATCH_SIZE].append([sim_id, iccid])
+
+        tasks = [
+            {
+                'task_type': task_type,
+                'payload': {'sims': window_sims},
+                'dedupe_key': f"{task_type}:{window}",
+            }
+            for window, window_sims in sorted(windows.items())
+        ]
+        queued = self.queue.enqueue_many(tasks)
+
+        result = {
+            'tasks': len(tasks),
+            'queued': len(queued),
+            'in_flight': len(tasks) - len(queued),
+            'sims': len(sims),
+        }
+        logger.info(
+            f"Dispatched {task_type} collection: {result['queued']} tasks queued for "
+            f"{result['sims']} SIMs, {result['in_flight']} already in flight"
+        )
+        return result
+
+    def dispatch_connectivity(self) -> Dict[str, Any]:
+        """Queue connectivity collection for the enabled SIMs whose turn it is"""
+        with get_db() as db:
+            sims = PollScheduler().background_sims(db, 'connectivity')
+        return self._dispatch_windows('connectivity', sims)
+
+    def dispatch_quota(self) -> Dict[str, Any]:
+        """Queue quota collection for the enabled SIMs whose turn it is"""
+        with get_db() as db:
+            sims = PollScheduler().background_sims(db, 'quota')
+        return self._dispatch_windows('quota', sims)
+
+    def dispatch_events(self) -> Dict[str, Any]:
+        """Queue event collection for the enabled SIMs whose turn it is"""
+        with get_db() as db:
+            sims = PollScheduler().background_sims(db, 'events')
+        return self._dispatch_windows('events', sims)
+
+    def dispatch_full_sync(self) -> Optional[str]:
+        """Queue a full SIM sync unless one is already queued or running"""
+        task_id = self.queue.enqueue('full_sync', dedupe_key='full_sync')
+        if task_id is None:
+            logger.info("Full sync already queued or running")
+        return task_id
+
+    def status(self) -> Dict[str, int]:
+        """Number of queued, running and finished tasks"""
+        return self.queue.stats()
+
+
+def task_handlers(collector: Optional[DataCollector] = None) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """Task type -> handler for the queue consumers"""
+    collector = collector or DataCollector()
+    return {
+        'usage': collector.run_usage_task,
+        'connectivity': collector.run_connectivity_task,
+        'events': collector.run_events_task,
+        'quota': collector.run_quota_task,
+        # A retried or redelivered sync picks up after its last checkpoint
+        'full_sync': lambda payload: collector.sync_all_sims(resume=True),
+    }
@@ -0,0 +1,271 @@
+import math
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+from sqlalchemy import and_, bindparam, case, func, or_, update
+
+from src.config import config
+from src.database.connection import get_db
+from src.database.models import SIMCard, UsageRecord
+
+logger = logging.getLogger(__name__)
+
+# Poll tiers in the order they are served when the budget is short
+PRIORITY_RANK = {'hot': 0, 'active': 1, 'idle': 2, 'dormant': 3}
+
+# quota_status ids meaning less than 20% left or exhausted
+LOW_QUOTA_STATUS_IDS = (1, 2)
+
+
+def poll_intervals() -> Dict[str, timedelta]:
+    """Base polling interval per tier"""
+    return {
+        'hot': timedelta(minutes=config.POLL_INTERVAL_HOT_MINUTES),
+        'active': timedelta(minutes=config.POLL_INTERVAL_ACTIVE_MINUTES),
+        'idle': timedelta(minutes=config.POLL_INTERVAL_IDLE_MINUTES),
+        'dormant': timedelta(minutes=config.POLL_INTERVAL_DORMANT_MINUTES),
+    }
+
+
+def background_polls() -> Dict[str, Tuple[int, int]]:
+    """Fleet-wide polls besides usage: API calls per SIM and interval in minutes"""
+    return {
+        'connectivity': (1, config.CONNECTIVITY_INTERVAL_MINUTES),
+        'quota': (2, config.QUOTA_INTERVAL_MINUTES),
+        'events': (1, config.EVENTS_INTERVAL_MINUTES),
+    }
+
+
+class PollScheduler:
+    """
+    Decides which SIMs to poll for usage on each scheduler tick.
+
+    Every SIM carries a poll tier and a next_poll_at time:
+    - hot: enabled, with low quota or high recent data velocity
+    - active: enabled, with traffic within USAGE_IDLE_DAYS
+    - idle: enabled, without recent traffic
+    - dormant: not enabled
+
+    Each tick claims due SIMs, hottest first, up to its share of
+    API_CALL_BUDGET_PER_HOUR, and leases them for POLL_CLAIM_LEASE_MINUTES.
+    The next poll is only scheduled once a SIM's usage was collected
+    (schedule_next), so a failed or lost task retries after the lease. When
+    the fleet's steady-state demand exceeds the budget, all intervals are
+    stretched to fit it.
+
+    The hourly connectivity, quota and event polls of all enabled SIMs are
+    taken off the budget first. When they would use more than
+    BACKGROUND_BUDGET_SHARE of it, each run only covers a rotating slice of
+    the fleet (background_sims).
+    """
+
+    def __init__(self, budget_per_hour: Optional[int] = None, tick_minutes: Optional[int] = None):
+        self.budget_per_hour = budget_per_hour or config.API_CALL_BUDGET_PER_HOUR
+        self.tick_minutes = tick_minutes or config.POLL_TICK_MINUTES
+        self.intervals = poll_intervals()
+
+    def tick_budget(self, budget_per_hour: float) -> int:
+        """SIMs that may be polled per tick"""
+        return max(1, int(budget_per_hour * self.tick_minutes / 60))
+
+    def classify(self, sim, velocity_mb_per_day: float, today: date) -> str:
+        """Poll tier of one SIM"""
+        if sim.status != 'Enabled':
+            return 'dormant'
+
+        if (
+            sim.quota_status_id in LOW_QUOTA_STATUS_IDS
+            or sim.quota_sms_status_id in LOW_QUOTA_STATUS_IDS
+            or velocity_mb_per_day >= config.POLL_HOT_MB_PER_DAY
+        ):
+            return 'hot'
+
+        idle_cutoff = today - timedelta(days=config.USAGE_IDLE_DAYS)
+        if sim.last_usage_at is not None and sim.last_usage_at.date() >= idle_cutoff:
+            return 'active'
+        return 'idle'
+
+    def _enabled_sims(self, db) -> int:
+        return db.query(func.count(SIMCard.id)).filter(SIMCard.status == 'Enabled').scalar() or 0
+
+    def background_demand(self, enabled_sims: int) -> float:
+        """API calls per hour of the background polls at their configured intervals"""
+        return sum(
+            enabled_sims * calls * 60 / minutes for calls, minutes in background_polls().values()
+        )
+
+    def background_slots(self, enabled_sims: int) -> int:
+        """Slices the fleet is split into so background polls fit their budget share"""
+        share = self.budget_per_hour * config.BACKGROUND_BUDGET_SHARE
+        if share <= 0:
+            return 1
+        return max(1, math.ceil(self.background_demand(enabled_sims) / share))
+
+    def usage_budget(self, db) -> float:
+        """API calls per hour left for usage polling after the background polls"""
+        enabled = self._enabled_sims(db)
+        background = self.background_demand(enabled) / self.background_slots(enabled)
+        return max(1.0, self.budget_per_hour - background)
+
+    def background_filter(self, db, poll: str, now: Optional[datetime] = None):
+        """
+        Condition selecting the enabled SIMs to cover in this run of a
+        background `poll`. With more than one slice, runs take turns: each
+        SIM is polled every `slices` intervals.
+        """
+        enabled = SIMCard.status == 'Enabled'
+        slots = self.background_slots(self._enabled_sims(db))
+        if slots == 1:
+            return enabled
+
+        interval = timedelta(minutes=background_polls()[poll][1])
+        slot = int((now or datetime.utcnow()).timestamp() // interval.total_seconds()) % slots
+        logger.info(
+            f"Background {poll} polls exceed their budget share, "
+            f"covering slice {slot + 1}/{slots} of the fleet"
+        )
+        return and_(enabled, SIMCard.id % slots == slot)
+
+    def background_sims(self, db, poll: str, now: Optional[datetime] = None) -> List[Tuple[int, str]]:
+        """(sim_id, iccid) of the SIMs to cover in this run of a background `poll`"""
+        query = db.query(SIMCard.id, SIMCard.iccid).filter(self.background_filter(db, poll, now))
+        return [(sim.id, sim.iccid) for sim in query.order_by(SIMCard.id)]
+
+    def stretch_factor(self, db, budget_per_hour: Optional[float] = None) -> float:
+        """How much to lengthen every interval so fleet demand fits the hourly usage budget"""
+        budget_per_hour = budget_per_hour or self.usage_budget(db)
+        counts = db.query(SIMCard.poll_priority, func.count()).group_by(SIMCard.poll_priority).all()
+        demand = sum(
+            count * timedelta(hours=1) / self.intervals.get(tier or 'active', self.intervals['active'])
+            for tier, count in counts
+        )
+        return max(1.0, demand / budget_per_hour)
+
+    def _velocities(self, db, sim_ids: List[int], today: date) -> Dict[int, float]:
+        """Average daily data volume over the last POLL_VELOCITY_DAYS per SIM"""
+        if not sim_ids:
+            return {}
+
+        since = datetime.combine(today - timedelta(days=config.POLL_VELOCITY_DAYS), datetime.min.time())
+        rows = db.query(
+            UsageRecord.sim_card_id,
+            func.sum(UsageRecord.data_volume_mb)
+        ).filter(
+            UsageRecord.sim_card_id.in_(sim_ids),
+            UsageRecord.date >= since
+        ).group_by(UsageRecord.sim_card_id).all()
+
+        return {sim_id: (total or 0.0) / config.POLL_VELOCITY_DAYS for sim_id, total in rows}
+
+    def claim_due(self, now: Optional[datetime] = None) -> List[Any]:
+        """
+        Claim the SIMs to poll this tick, leasing them until collected
+
+        Rows are locked with SKIP LOCKED, so concurrent dispatchers never
+        claim the same SIM. SIMs that newly hit a low quota are due at once.
+        SIMs the incremental usage plan would skip (finalized through
+        yesterday and not active) are not claimed, so they don't use up the
+        tick budget.
+        """
+        now = now or datetime.utcnow()
+        today = now.date()
+        rank = case(
+            {tier: position for tier, position in PRIORITY_RANK.items()},
+            value=SIMCard.poll_priority,
+            else_=PRIORITY_RANK['active']
+        )
+        low_quota = or_(
+            SIMCard.quota_status_id.in_(LOW_QUOTA_STATUS_IDS),
+            SIMCard.quota_sms_status_id.in_(LOW_QUOTA_STATUS_IDS)
+        )
+        # Mirrors DataCollector._incremental_usage_plan
+        yesterday = datetime.combine(today - timedelta(days=1), datetime.min.time())
+        idle_cutoff = datetime.combine(today - timedelta(days=config.USAGE_IDLE_DAYS), datetime.min.time())
+        needs_poll = or_(
+            SIMCard.usage_collected_through.is_(None),
+            SIMCard.usage_collected_through < yesterday,
+            and_(SIMCard.status == 'Enabled', SIMCard.last_usage_at >= idle_cutoff)
+        )
+        lease_until = now + timedelta(minutes=config.POLL_CLAIM_LEASE_MINUTES)
+
+        with get_db() as db:
+            budget = self.usage_budget(db)
+            stretch = self.stretch_factor(db, budget)
+
+            sims = db.query(
+                SIMCard.id,
+                SIMCard.iccid,
+                SIMCard.status,
+                SIMCard.usage_collected_through,
+                SIMCard.last_usage_at,
+                SIMCard.quota_status_id,
+                SIMCard.quota_sms_status_id
+            ).filter(needs_poll, or_(
+                SIMCard.next_poll_at.is_(None),
+                SIMCard.next_poll_at <= now,
+                and_(
+                    SIMCard.status == 'Enabled',
+                    low_quota,
+                    SIMCard.poll_priority.is_distinct_from('hot')
+                )
+            )).order_by(
+                rank, SIMCard.next_poll_at.asc().nullsfirst()
+            ).limit(self.tick_budget(budget)).with_for_update(skip_locked=True).all()
+
+            velocities = self._velocities(db, [sim.id for sim in sims], today)
+            schedule = []
+            tiers: Dict[str, int] = {}
+            for sim in sims:
+                tier = self.classify(sim, velocities.get(sim.id, 0.0), today)
+                tiers[tier] = tiers.get(tier, 0) + 1
+                schedule.append({
+                    'sim_id': sim.id,
+                    'tier': tier,
+                    'next_poll': lease_until,
+                })
+
+            if schedule:
+                table = SIMCard.__table__
+                db.execute(
+                    update(table).where(table.c.id == bindparam('sim_id')).values(
+                        poll_priority=bindparam('tier'),
+                        next_poll_at=bindparam('next_poll'),
+                        # Scheduling bookkeeping is not a change to the SIM itself
+                        updated_at=table.c.updated_at
+                    ),
+                    schedule
+                )
+            db.commit()
+
+        if stretch > 1.0:
+            logger.warning(
+                f"Poll demand exceeds {budget:.0f} usage calls/hour, "
+                f"stretching intervals x{stretch:.2f}"
+            )
+        breakdown = ", ".join(f"{count} {tier}" for tier, count in sorted(tiers.items()))
+        logger.info(
+            f"Claimed {len(sims)} SIMs for polling (budget {self.tick_budget(budget)}/tick)"
+            + (f": {breakdown}" if breakdown else "")
+        )
+        return sims
+
+    def schedule_next(self, db, sim_ids: List[int], stretch: float, now: Optional[datetime] = None):
+        """Schedule the next poll of SIMs whose usage was just collected, by their tier"""
+        if not sim_ids:
+            return
+
+        now = now or datetime.utcnow()
+        table = SIMCard.__table__
+        next_poll = case(
+            {tier: now + interval * stretch for tier, interval in self.intervals.items()},
+            value=table.c.poll_priority,
+            else_=now + self.intervals['active'] * stretch
+        )
+        db.execute(
+            update(table).where(table.c.id.in_(sim_ids)).values(
+                next_poll_at=next_poll,
+                # Scheduling bookkeeping is not a change to the SIM itself
+                updated_at=table.c.updated_at
+            )
+        )
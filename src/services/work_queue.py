@@ -0,0 +1,613 @@
+import json
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Dict, Any, Optional, Callable, Iterable
+import logging
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import text
+
+from src.config import config
+from src.database.connection import get_db
+from src.database.models import CollectionTask
+
+logger = logging.getLogger(__name__)
+
+# Longest delay between retries of a failing task
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def default_worker_id() -> str:
+    """Identify this process in task leases"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _db_now():
+    # All queue timestamps come from the database clock so workers on
+    # different hosts agree on lease expiry
+    return func.timezone('utc', func.now())
+
+
+@dataclass
+class QueuedTask:
+    """A task claimed by a worker"""
+
+    id: str
+    task_type: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+class WorkQueue(ABC):
+    """
+    Interface shared by the collection task queues.
+
+    Tasks are leased to the worker that claims them; complete() or fail()
+    must be called by that worker while it still holds the lease.
+    """
+
+    worker_id: str
+    lease: timedelta
+
+    def enqueue(
+        self,
+        task_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        dedupe_key: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> Optional[str]:
+        """Queue one task; returns its id, or None if `dedupe_key` is already queued or running"""
+        ids = self.enqueue_many([{
+            'task_type': task_type,
+            'payload': payload,
+            'dedupe_key': dedupe_key,
+            'max_attempts': max_attempts,
+        }])
+        return ids[0] if ids else None
+
+    @abstractmethod
+    def enqueue_many(self, tasks: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Queue several tasks at once
+
+        Each item has `task_type` and optionally `payload`, `dedupe_key`
+        and `max_attempts`. Returns the ids of the tasks actually queued.
+        """
+
+    @abstractmethod
+    def claim(self, limit: int = 1) -> List[QueuedTask]:
+        """Lease up to `limit` due tasks to this worker"""
+
+    @abstractmethod
+    def extend_lease(self, task: QueuedTask) -> bool:
+        """Keep a long-running task leased to this worker"""
+
+    @abstractmethod
+    def complete(self, task: QueuedTask) -> bool:
+        """Mark a leased task done"""
+
+    @abstractmethod
+    def fail(self, task: QueuedTask, error: str) -> bool:
+        """Schedule a retry with exponential back-off, or give up after max_attempts"""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Return tasks whose worker stopped renewing the lease to the queue"""
+
+    @abstractmethod
+    def purge_finished(self, older_than_days: Optional[int] = None) -> int:
+        """Delete done and failed tasks older than the retention period"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Number of tasks per status"""
+
+    def _retry_delay(self, task: QueuedTask, error: str) -> Optional[timedelta]:
+        """Back-off before the next attempt, or None once attempts are used up"""
+        if task.attempts >= task.max_attempts:
+            logger.error(f"Task {task.id} ({task.task_type}) failed permanently: {error}")
+            return None
+
+        delay = min(
+            MAX_RETRY_DELAY,
+            timedelta(seconds=config.TASK_RETRY_BASE_SECONDS * 2 ** (task.attempts - 1))
+        )
+        logger.warning(
+            f"Task {task.id} ({task.task_type}) failed on attempt {task.attempts}, "
+            f"retrying in {delay.total_seconds():.0f}s: {error}"
+        )
+        return delay
+
+
+class PostgresWorkQueue(WorkQueue):
+    """
+    Collection task queue in the collection_tasks table.
+
+    Workers claim due tasks with FOR UPDATE SKIP LOCKED, so any number of
+    them can poll the same table without blocking each other or running a
+    task twice. A claimed task is leased for `lease_seconds`; tasks whose
+    lease runs out (crashed or stuck worker) go back to the queue, and
+    failed tasks are retried with exponential back-off until
+    `max_attempts` is reached.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, lease_seconds: Optional[int] = None):
+        self.worker_id = worker_id or default_worker_id()
+        self.lease = timedelta(seconds=lease_seconds or config.TASK_LEASE_SECONDS)
+        self._table = CollectionTask.__table__
+
+    def enqueue_many(self, tasks: Iterable[Dict[str, Any]]) -> List[str]:
+        tasks = list(tasks)
+        if not tasks:
+            return []
+
+        rows = [
+            {
+                'task_type': task['task_type'],
+                'payload': task.get('payload') or {},
+                'dedupe_key': task.get('dedupe_key'),
+                'status': 'pending',
+                'attempts': 0,
+                'max_attempts': task.get('max_attempts') or config.TASK_MAX_ATTEMPTS,
+                'run_after': _db_now(),
+                'created_at': _db_now(),
+            }
+            for task in tasks
+        ]
+        stmt = insert(CollectionTask).values(rows).on_conflict_do_nothing(
+            index_elements=['dedupe_key'],
+            index_where=text("status IN ('pending', 'running')")
+        ).returning(self._table.c.id)
+
+        with get_db() as db:
+            ids = [str(task_id) for task_id in db.execute(stmt).scalars()]
+            db.commit()
+
+        if len(ids) < len(rows):
+            logger.debug(f"Skipped {len(rows) - len(ids)} tasks already queued or running")
+        return ids
+
+    def claim(self, limit: int = 1) -> List[QueuedTask]:
+        table = self._table
+        due = select(table.c.id).where(
+            table.c.status == 'pending',
+            table.c.run_after <= _db_now()
+        ).order_by(table.c.run_after, table.c.id).limit(limit).with_for_update(skip_locked=True)
+
+        stmt = update(table).where(table.c.id.in_(due.scalar_subquery())).values(
+            status='running',
+            worker_id=self.worker_id,
+            attempts=table.c.attempts + 1,
+            started_at=_db_now(),
+            lease_expires_at=_db_now() + self.lease
+        ).returning(
+            table.c.id, table.c.task_type, table.c.payload,
+            table.c.attempts, table.c.max_attempts
+        )
+
+        with get_db() as db:
+            claimed = db.execute(stmt).all()
+            db.commit()
+
+        return [
+            QueuedTask(
+                id=str(row.id),
+                task_type=row.task_type,
+                payload=row.payload or {},
+                attempts=row.attempts,
+                max_attempts=row.max_attempts
+            )
+            for row in claimed
+        ]
+
+    def _update_own(self, task: QueuedTask, **values) -> bool:
+        """Update a task only while this worker still holds its lease"""
+        table = self._table
+        stmt = update(table).where(
+            table.c.id == int(task.id),
+            table.c.status == 'running',
+            table.c.worker_id == self.worker_id
+        ).values(**values)
+
+        with get_db() as db:
+            updated = db.execute(stmt).rowcount
+            db.commit()
+
+        if not updated:
+            logger.warning(f"Lost the lease on task {task.id} ({task.task_type})")
+        return bool(updated)
+
+    def extend_lease(self, task: QueuedTask) -> bool:
+        return self._update_own(task, lease_expires_at=_db_now() + self.lease)
+
+    def complete(self, task: QueuedTask) -> bool:
+        return self._update_own(
+            task, status='done', completed_at=_db_now(), lease_expires_at=None
+        )
+
+    def fail(self, task: QueuedTask, error: str) -> bool:
+        delay = self._retry_delay(task, error)
+        if delay is None:
+            return self._update_own(
+                task, status='failed', last_error=error,
+                completed_at=_db_now(), lease_expires_at=None
+            )
+
+        return self._update_own(
+            task, status='pending', last_error=error, worker_id=None,
+            run_after=_db_now() + delay, lease_expires_at=None
+        )
+
+    def requeue_expired(self) -> int:
+        table = self._table
+        used_up = table.c.attempts >= table.c.max_attempts
+        stmt = update(table).where(
+            table.c.status == 'running',
+            table.c.lease_expires_at < _db_now()
+        ).values(
+            status=case((used_up, 'failed'), else_='pending'),
+            # Failed tasks are purged TASK_RETENTION_DAYS after completion
+            completed_at=case((used_up, _db_now()), else_=table.c.completed_at),
+            last_error=func.concat('Lease expired on worker ', table.c.worker_id),
+            worker_id=None,
+            lease_expires_at=None,
+            run_after=_db_now()
+        )
+
+        with get_db() as db:
+            requeued = db.execute(stmt).rowcount
+            db.commit()
+
+        if requeued:
+            logger.warning(f"Requeued {requeued} tasks with expired leases")
+        return requeued
+
+    def purge_finished(self, older_than_days: Optional[int] = None) -> int:
+        days = older_than_days if older_than_days is not None else config.TASK_RETENTION_DAYS
+        table = self._table
+        stmt = delete(table).where(
+            table.c.status.in_(['done', 'failed']),
+            table.c.completed_at < _db_now() - timedelta(days=days)
+        )
+
+        with get_db() as db:
+            deleted = db.execute(stmt).rowcount
+            db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        table = self._table
+        with get_db() as db:
+            rows = db.execute(
+                select(table.c.status, func.count()).group_by(table.c.status)
+            ).all()
+        return {status: count for status, count in rows}
+
+
+# Current Redis server time in seconds, so every worker agrees on lease expiry
+_LUA_NOW = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+"""
+
+# KEYS: seq, pending, dedupe  ARGV: task key prefix, task_type, payload, dedupe_key, max_attempts
+_ENQUEUE_SCRIPT = _LUA_NOW + """
+local dedupe = ARGV[4]
+if dedupe ~= '' and redis.call('HEXISTS', KEYS[3], dedupe) == 1 then
+    return false
+end
+local id = redis.call('INCR', KEYS[1])
+redis.call('HSET', ARGV[1] .. id,
+    'task_type', ARGV[2], 'payload', ARGV[3], 'dedupe_key', dedupe,
+    'status', 'pending', 'attempts', 0, 'max_attempts', ARGV[5], 'created_at', now)
+redis.call('ZADD', KEYS[2], now, id)
+if dedupe ~= '' then
+    redis.call('HSET', KEYS[3], dedupe, id)
+end
+return id
+"""
+
+# KEYS: pending, leases  ARGV: task key prefix, limit, lease seconds, worker_id
+_CLAIM_SCRIPT = _LUA_NOW + """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[2]))
+local claimed = {}
+for _, id in ipairs(ids) do
+    local key = ARGV[1] .. id
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[3]), id)
+    local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+    redis.call('HSET', key, 'status', 'running', 'worker_id', ARGV[4], 'started_at', now)
+    local task = redis.call('HMGET', key, 'task_type', 'payload', 'max_attempts')
+    table.insert(claimed, {id, task[1], task[2], attempts, task[3]})
+end
+return claimed
+"""
+
+# KEYS: leases, pending, dedupe, done, failed
+# ARGV: task key, id, worker_id, action (extend/retry/done/failed), seconds, error
+_UPDATE_OWN_SCRIPT = """
+local key = ARGV[1]
+local id = ARGV[2]
+if redis.call('HGET', key, 'status') ~= 'running' or redis.call('HGET', key, 'worker_id') ~= ARGV[3] then
+    return 0
+end
+""" + _LUA_NOW + """
+local action = ARGV[4]
+if action == 'extend' then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[5]), id)
+    return 1
+end
+redis.call('ZREM', KEYS[1], id)
+if action == 'retry' then
+    redis.call('HSET', key, 'status', 'pending', 'worker_id', '', 'last_error', ARGV[6])
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[5]), id)
+    return 1
+end
+local dedupe = redis.call('HGET', key, 'dedupe_key')
+if dedupe and dedupe ~= '' then
+    redis.call('HDEL', KEYS[3], dedupe)
+end
+redis.call('HSET', key, 'status', action, 'last_error', ARGV[6], 'completed_at', now)
+if action == 'done' then
+    redis.call('ZADD', KEYS[4], now, id)
+else
+    redis.call('ZADD', KEYS[5], now, id)
+end
+return 1
+"""
+
+# KEYS: leases, pending, dedupe, failed  ARGV: task key prefix
+_REQUEUE_EXPIRED_SCRIPT = _LUA_NOW + """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)
+for _, id in ipairs(ids) do
+    local key = ARGV[1] .. id
+    redis.call('ZREM', KEYS[1], id)
+    local task = redis.call('HMGET', key, 'attempts', 'max_attempts', 'worker_id', 'dedupe_key')
+    if task[1] then
+        local reason = 'Lease expired on worker ' .. (task[3] or '')
+        if tonumber(task[1]) >= tonumber(task[2]) then
+            redis.call('HSET', key, 'status', 'failed', 'worker_id', '', 'last_error', reason, 'completed_at', now)
+            if task[4] and task[4] ~= '' then
+                redis.call('HDEL', KEYS[3], task[4])
+            end
+            redis.call('ZADD', KEYS[4], now, id)
+        else
+            redis.call('HSET', key, 'status', 'pending', 'worker_id', '', 'last_error', reason)
+            redis.call('ZADD', KEYS[2], now, id)
+        end
+    end
+end
+return #ids
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Collection task queue in Redis.
+
+    Each task is a hash; sorted sets index pending tasks by due time,
+    running tasks by lease expiry and finished tasks by completion time,
+    and a hash maps dedupe keys to queued or running tasks. Every state
+    change is a Lua script, so claims are atomic across any number of
+    consumers. Durability follows the Redis persistence settings.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+        prefix: str = "onence:tasks"
+    ):
+        import redis
+
+        self.worker_id = worker_id or default_worker_id()
+        self.lease = timedelta(seconds=lease_seconds or config.TASK_LEASE_SECONDS)
+        self._redis = redis.Redis.from_url(redis_url or config.REDIS_URL, decode_responses=True)
+
+        self._task_prefix = f"{prefix}:task:"
+        self._seq = f"{prefix}:seq"
+        self._pending = f"{prefix}:pending"
+        self._leases = f"{prefix}:leases"
+        self._dedupe = f"{prefix}:dedupe"
+        self._done = f"{prefix}:done"
+        self._failed = f"{prefix}:failed"
+
+        self._enqueue_script = self._redis.register_script(_ENQUEUE_SCRIPT)
+        self._claim_script = self._redis.register_script(_CLAIM_SCRIPT)
+        self._update_own_script = self._redis.register_script(_UPDATE_OWN_SCRIPT)
+        self._requeue_script = self._redis.register_script(_REQUEUE_EXPIRED_SCRIPT)
+
+    def enqueue_many(self, tasks: Iterable[Dict[str, Any]]) -> List[str]:
+        tasks = list(tasks)
+        if not tasks:
+            return []
+
+        pipe = self._redis.pipeline(transaction=False)
+        for task in tasks:
+            self._enqueue_script(
+                keys=[self._seq, self._pending, self._dedupe],
+                args=[
+                    self._task_prefix,
+                    task['task_type'],
+                    json.dumps(task.get('payload') or {}),
+                    task.get('dedupe_key') or '',
+                    task.get('max_attempts') or config.TASK_MAX_ATTEMPTS,
+                ],
+                client=pipe
+            )
+        ids = [str(task_id) for task_id in pipe.execute() if task_id]
+
+        if len(ids) < len(tasks):
+            logger.debug(f"Skipped {len(tasks) - len(ids)} tasks already queued or running")
+        return ids
+
+    def claim(self, limit: int = 1) -> List[QueuedTask]:
+        claimed = self._claim_script(
+            keys=[self._pending, self._leases],
+            args=[self._task_prefix, limit, self.lease.total_seconds(), self.worker_id]
+        )
+        return [
+            QueuedTask(
+                id=str(task_id),
+                task_type=task_type,
+                payload=json.loads(payload) if payload else {},
+                attempts=int(attempts),
+                max_attempts=int(max_attempts)
+            )
+            for task_id, task_type, payload, attempts, max_attempts in claimed
+        ]
+
+    def _update_own(self, task: QueuedTask, action: str, seconds: float = 0, error: str = '') -> bool:
+        """Change a task's state only while this worker still holds its lease"""
+        updated = self._update_own_script(
+            keys=[self._leases, self._pending, self._dedupe, self._done, self._failed],
+            args=[self._task_prefix + task.id, task.id, self.worker_id, action, seconds, error]
+        )
+        if not updated:
+            logger.warning(f"Lost the lease on task {task.id} ({task.task_type})")
+        return bool(updated)
+
+    def extend_lease(self, task: QueuedTask) -> bool:
+        return self._update_own(task, 'extend', self.lease.total_seconds())
+
+    def complete(self, task: QueuedTask) -> bool:
+        return self._update_own(task, 'done')
+
+    def fail(self, task: QueuedTask, error: str) -> bool:
+        delay = self._retry_delay(task, error)
+        if delay is None:
+            return self._update_own(task, 'failed', error=error)
+        return self._update_own(task, 'retry', delay.total_seconds(), error)
+
+    def requeue_expired(self) -> int:
+        requeued = self._requeue_script(
+            keys=[self._leases, self._pending, self._dedupe, self._failed],
+            args=[self._task_prefix]
+        )
+        if requeued:
+            logger.warning(f"Requeued {requeued} tasks with expired leases")
+        return requeued
+
+    def purge_finished(self, older_than_days: Optional[int] = None) -> int:
+        days = older_than_days if older_than_days is not None else config.TASK_RETENTION_DAYS
+        seconds, microseconds = self._redis.time()
+        cutoff = seconds + microseconds / 1e6 - days * 86400
+
+        deleted = 0
+        for finished in (self._done, self._failed):
+            ids = self._redis.zrangebyscore(finished, '-inf', cutoff)
+            if not ids:
+                continue
+            pipe = self._redis.pipeline()
+            pipe.delete(*(self._task_prefix + task_id for task_id in ids))
+            pipe.zrem(finished, *ids)
+            pipe.execute()
+            deleted += len(ids)
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        pipe = self._redis.pipeline(transaction=False)
+        for key in (self._pending, self._leases, self._done, self._failed):
+            pipe.zcard(key)
+        pending, running, done, failed = pipe.execute()
+        return {'pending': pending, 'running': running, 'done': done, 'failed': failed}
+
+
+def get_work_queue(worker_id: Optional[str] = None) -> WorkQueue:
+    """Create the task queue configured by TASK_QUEUE_BACKEND ('redis' or 'postgres')"""
+    backend = config.TASK_QUEUE_BACKEND.lower()
+    if backend == 'redis':
+        return RedisWorkQueue(worker_id=worker_id)
+    if backend == 'postgres':
+        return PostgresWorkQueue(worker_id=worker_id)
+    raise ValueError(f"Unknown task queue backend: {backend}")
+
+
+class TaskConsumer:
+    """Claims tasks from a work queue and runs them with the registered handlers"""
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+        poll_interval: Optional[float] = None
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.poll_interval = poll_interval or config.TASK_POLL_INTERVAL_SECONDS
+
+    def run(self, stop: Optional[threading.Event] = None):
+        """Process tasks until `stop` is set"""
+        stop = stop or threading.Event()
+        logger.info(f"Task consumer {self.queue.worker_id} started")
+
+        while not stop.is_set():
+            try:
+                tasks = self.queue.claim()
+            except Exception as e:
+                logger.error(f"Failed to claim tasks: {e}")
+                tasks = []
+
+            if not tasks:
+                try:
+                    self.queue.requeue_expired()
+                except Exception as e:
+                    logger.error(f"Failed to requeue expired tasks: {e}")
+                stop.wait(self.poll_interval)
+                continue
+
+            for task in tasks:
+                # A queue error while reporting the outcome leaves the task
+                # to lease expiry, it must not stop the consumer
+                try:
+                    self.execute(task)
+                except Exception as e:
+                    logger.error(f"Failed to run task {task.id} ({task.task_type}): {e}")
+
+        logger.info(f"Task consumer {self.queue.worker_id} stopped")
+
+    def execute(self, task: QueuedTask):
+        """Run one claimed task, renewing its lease while it runs"""
+        handler = self.handlers.get(task.task_type)
+        if handler is None:
+            self.queue.fail(task, f"No handler for task type {task.task_type}")
+            return
+
+        done = threading.Event()
+        renew_every = self.queue.lease.total_seconds() / 3
+
+        def keep_leased():
+            while not done.wait(renew_every):
+                try:
+                    self.queue.extend_lease(task)
+                except Exception as e:
+                    logger.warning(f"Failed to extend lease on task {task.id}: {e}")
+
+        heartbeat = threading.Thread(target=keep_leased, name=f"lease-{task.id}", daemon=True)
+        heartbeat.start()
+
+        started = time.monotonic()
+        logger.info(f"Running task {task.id} ({task.task_type}, attempt {task.attempts})")
+        error = None
+        try:
+            handler(task.payload)
+        except Exception as e:
+            error = str(e)
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if error is not None:
+            self.queue.fail(task, error)
+            return
+
+        self.queue.complete(task)
+        logger.info(f"Task {task.id} ({task.task_type}) done in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,133 @@
+import cProfile
+import io
+import math
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Dict, List, Iterable, Iterator, TypeVar
+import logging
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Phases of a collection run, in the order they happen
+PHASES = ('api_wait', 'auth_wait', 'parse', 'db_write', 'commit')
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (q in 0..1)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class PhaseTimer:
+    """
+    Accumulates time spent per phase of a collection run and per-SIM API
+    latencies. Thread-safe, so the workers of one run can share a timer;
+    phase times are then summed across workers.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.latencies: List[float] = []
+        self._lock = Lock()
+
+    def add(self, phase: str, seconds: float):
+        """Add `seconds` to a phase"""
+        with self._lock:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed(self, iterable: Iterable[T], phase: str = 'api_wait') -> Iterator[T]:
+        """Yield from `iterable`, timing how long each item is waited for"""
+        iterator = iter(iterable)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.add(phase, time.perf_counter() - started)
+                yield item
+        finally:
+            # Let batch producers stop their work when the caller breaks out
+            close = getattr(iterator, 'close', None)
+            if close:
+                close()
+
+    def record_latencies(self, latencies: Iterable[float]):
+        """Add per-SIM API latencies in seconds"""
+        with self._lock:
+            self.latencies.extend(latencies)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Phase seconds and p50/p95/max per-SIM latency in milliseconds"""
+        with self._lock:
+            latencies = list(self.latencies)
+            result = {f"{phase}_seconds": round(seconds, 3) for phase, seconds in self.seconds.items()}
+
+        for label, q in (('p50', 0.5), ('p95', 0.95), ('max', 1.0)):
+            value = percentile(latencies, q)
+            result[f"latency_{label}_ms"] = round(value * 1000, 1) if value is not None else None
+        return result
+
+
+@contextmanager
+def profile_run(label: str, output_dir: Optional[str] = None):
+    """
+    Profile the enclosed block and write a report to `output_dir`
+    (PROFILE_DIR by default): an HTML report with pyinstrument when it is
+    installed, otherwise a cProfile .prof dump plus a text summary
+    """
+    directory = Path(output_dir or config.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = directory / f"{label}_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}"
+
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path = stem.with_suffix('.html')
+            path.write_text(profiler.output_html())
+            logger.info(f"Wrote pyinstrument profile of {label} to {path}")
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = stem.with_suffix('.prof')
+        profiler.dump_stats(str(path))
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+        stem.with_suffix('.txt').write_text(summary.getvalue())
+        logger.info(f"Wrote cProfile profile of {label} to {path}")
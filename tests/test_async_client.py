@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.api import async_client
+from src.api.async_client import AsyncOnceAPIClient, run_batch
+from src.api.cache import ResponseCache
+from src.api.resilience import CircuitBreaker
+from src.config import config
+
+ICCIDS = [f"89882280666000000{i:02d}" for i in range(20)]
+
+
+def _fan_out(call, iccids, max_concurrency):
+    async def collect():
+        # No request is sent, the auth manager is never asked for a token
+        async with AsyncOnceAPIClient(max_concurrency, auth_manager=object()) as client:
+            return [item async for item in client.fan_out(call, iccids)]
+
+    return asyncio.run(collect())
+
+
+# ===== fan_out =====
+
+def test_fan_out_bounds_concurrency_and_yields_every_result():
+    running = 0
+    peak = 0
+
+    async def call(iccid):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {'iccid': iccid}
+
+    results = _fan_out(call, ICCIDS, max_concurrency=4)
+
+    assert sorted(iccid for iccid, _ in results) == ICCIDS
+    assert all(result == {'iccid': iccid} for iccid, result in results)
+    assert peak == 4
+
+
+def test_fan_out_yields_in_completion_order():
+    async def call(iccid):
+        await asyncio.sleep(0.05 if iccid == 'slow' else 0)
+        return {}
+
+    results = _fan_out(call, ['slow', 'fast'], max_concurrency=2)
+
+    assert [iccid for iccid, _ in results] == ['fast', 'slow']
+
+
+def test_fan_out_reports_failures_per_iccid():
+    async def call(iccid):
+        if iccid == 'bad':
+            raise ValueError('boom')
+        return {'ok': True}
+
+    results = dict(_fan_out(call, ['good', 'bad'], max_concurrency=2))
+
+    assert results == {'good': {'ok': True}, 'bad': {'error': 'boom'}}
+
+
+# ===== _make_request =====
+
+class SlotCountingLimiter:
+    """Rate limiter stand-in that tracks how many slots are held"""
+
+    def __init__(self):
+        self.held = 0
+
+    async def acquire_async(self):
+        self.held += 1
+
+    def release(self):
+        self.held -= 1
+
+    def record_success(self):
+        pass
+
+
+def test_transport_error_backs_off_after_releasing_the_slot(monkeypatch):
+    outcomes = [httpx.ConnectError('reset'), None]
+    held_while_sleeping = []
+
+    def handle(request):
+        error = outcomes.pop(0)
+        if error:
+            raise error
+        return httpx.Response(200, json={'ok': True})
+
+    async def request():
+        client = AsyncOnceAPIClient(1, auth_manager=SimpleNamespace(get_auth_headers=lambda: {}))
+        client.session = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+        client.rate_limiter = SlotCountingLimiter()
+        client.circuit_breaker = CircuitBreaker(failure_threshold=10, reset_timeout=30.0)
+
+        async def sleep(seconds):
+            held_while_sleeping.append(client.rate_limiter.held)
+
+        monkeypatch.setattr(async_client.asyncio, 'sleep', sleep)
+        async with client:
+            return await client._make_request('GET', '/v1/sims/1/status')
+
+    assert asyncio.run(request()) == {'ok': True}
+    assert held_while_sleeping == [0]
+
+
+# ===== mutations =====
+
+def _enable_sim(monkeypatch, cache_enabled):
+    monkeypatch.setattr(config, 'API_CACHE_ENABLED', cache_enabled)
+
+    async def request():
+        client = AsyncOnceAPIClient(1, auth_manager=SimpleNamespace(get_auth_headers=lambda: {}))
+        client.session = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+        async with client:
+            return await client.enable_sim('123')
+
+    return asyncio.run(request())
+
+
+def test_mutation_drops_the_sims_cached_responses(monkeypatch):
+    response_cache = ResponseCache(max_entries=10)
+    response_cache.get_or_fetch(('/v1/sims/123', ()), 60, lambda: 'Disabled')
+    monkeypatch.setattr(async_client, 'get_response_cache', lambda: response_cache)
+
+    assert _enable_sim(monkeypatch, cache_enabled=True) == {}
+    assert response_cache.get_or_fetch(('/v1/sims/123', ()), 60, lambda: 'Enabled') == 'Enabled'
+
+
+def test_mutation_leaves_a_disabled_cache_alone(monkeypatch):
+    def get_response_cache():
+        raise AssertionError("cache used while API_CACHE_ENABLED is off")
+
+    monkeypatch.setattr(async_client, 'get_response_cache', get_response_cache)
+
+    assert _enable_sim(monkeypatch, cache_enabled=False) == {}
+
+
+# ===== run_batch =====
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replace get_sim_status with a recording stub"""
+    calls = []
+
+    async def get_sim_status(self, iccid):
+        calls.append(iccid)
+        await asyncio.sleep(0.01)
+        return {'status': 'Enabled', 'iccid': iccid}
+
+    monkeypatch.setattr(AsyncOnceAPIClient, 'get_sim_status', get_sim_status)
+    return calls
+
+
+def test_run_batch_yields_results_to_sync_callers(calls):
+    results = dict(run_batch('get_sim_status', ICCIDS, max_concurrency=4, auth_manager=object()))
+
+    assert sorted(results) == ICCIDS
+    assert all(result['iccid'] == iccid for iccid, result in results.items())
+    assert not any(thread.name == 'batch-get_sim_status' for thread in threading.enumerate())
+
+
+def test_run_batch_raises_errors_of_the_event_loop(calls):
+    with pytest.raises(AttributeError):
+        list(run_batch('no_such_call', ICCIDS, auth_manager=object()))
+
+
+def test_closing_run_batch_early_stops_the_fetches(calls):
+    batch = run_batch('get_sim_status', ICCIDS * 10, max_concurrency=2, auth_manager=object())
+
+    next(batch)
+    batch.close()
+
+    assert len(calls) < len(ICCIDS)
+    assert not any(thread.name == 'batch-get_sim_status' for thread in threading.enumerate())
+
+
+def test_slow_consumer_holds_back_the_fetches(calls):
+    batch = run_batch('get_sim_status', ICCIDS * 10, max_concurrency=2, auth_manager=object())
+
+    next(batch)
+    time.sleep(0.5)
+    fetched = len(calls)
+    batch.close()
+
+    # Only the hand-off and fan-out queues and the calls in flight run ahead
+    assert fetched <= 12
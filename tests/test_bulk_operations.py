@@ -0,0 +1,74 @@
+import pytest
+
+from src.services.bulk_operations import BulkOperationReport, BulkOperationService
+
+
+class FakeClient:
+    """Answers iter_batch like OnceAPIClient, failing the given ICCIDs"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def iter_batch(self, method, iccids, *args, max_concurrency=None):
+        self.calls.append((method, list(iccids), args))
+        for iccid in iccids:
+            if iccid in self.failing:
+                yield iccid, {'error': 'HTTP 404'}
+            else:
+                yield iccid, {}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = BulkOperationService.__new__(BulkOperationService)
+    service.api_client = FakeClient(failing={'c'})
+    service.write_batch_size = 2
+    service.writes = []
+    service.reports = []
+    monkeypatch.setattr(service, '_write_back', lambda iccids, updates: service.writes.append((list(iccids), updates)))
+    monkeypatch.setattr(service, '_log_report', service.reports.append)
+    return service
+
+
+def test_run_reports_each_iccid(service):
+    progress = []
+
+    report = service.run('disable', iccids=['a', 'b', 'c', 'd', 'e'], progress_callback=lambda r: progress.append(r.done))
+
+    assert sorted(report.succeeded) == ['a', 'b', 'd', 'e']
+    assert report.failed == {'c': 'HTTP 404'}
+    assert progress == [1, 2, 3, 4, 5]
+    assert report.completed_at is not None
+    assert service.reports == [report]
+
+
+def test_successes_are_written_back_in_batches(service):
+    service.run('update_label', iccids=['a', 'b', 'c', 'd', 'e'], value='fleet-7')
+
+    assert [iccids for iccids, _ in service.writes] == [['a', 'b'], ['d', 'e']]
+    assert all(updates == {'label': 'fleet-7'} for _, updates in service.writes)
+    assert service.api_client.calls[0][0] == 'update_sim_label'
+    assert service.api_client.calls[0][2] == ('fleet-7',)
+
+
+def test_iccids_are_deduplicated_and_sorted(service):
+    assert service.resolve_iccids([' b', 'a', 'b ', '', None]) == ['a', 'b']
+
+
+@pytest.mark.parametrize('operation, value', [('reboot', None), ('set_imei_lock', None)])
+def test_invalid_operations_are_rejected(service, operation, value):
+    with pytest.raises(ValueError):
+        service.run(operation, iccids=['a'], value=value)
+
+    assert service.api_client.calls == []
+
+
+def test_report_dict_lists_errors():
+    report = BulkOperationReport(operation='enable', total=2, succeeded=['a'], failed={'b': 'HTTP 500'})
+
+    summary = report.to_dict()
+
+    assert (summary['succeeded'], summary['failed']) == (1, 1)
+    assert summary['errors'] == [{'iccid': 'b', 'error': 'HTTP 500'}]
+    assert summary['duration_seconds'] is None
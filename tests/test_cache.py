@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from src.api import cache
+from src.api.cache import ResponseCache
+
+KEY = ('/v1/sims/8988228066600000001', ())
+
+
+@pytest.fixture
+def response_cache(monkeypatch, clock):
+    monkeypatch.setattr(cache, 'time', clock)
+    return ResponseCache(max_entries=3)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+# ===== TTL and LRU =====
+
+def test_hits_are_served_from_cache_until_expiry(response_cache, clock):
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {'status': 'Enabled'}
+
+    assert response_cache.get_or_fetch(KEY, 60, fetch) == {'status': 'Enabled'}
+    assert response_cache.get_or_fetch(KEY, 60, fetch) == {'status': 'Enabled'}
+    assert len(fetches) == 1
+
+    clock.advance(60)
+    response_cache.get_or_fetch(KEY, 60, fetch)
+
+    assert len(fetches) == 2
+    assert response_cache.stats() == {'entries': 1, 'hits': 1, 'misses': 2, 'coalesced': 0}
+
+
+def test_callers_get_copies(response_cache):
+    response_cache.get_or_fetch(KEY, 60, lambda: {'labels': []})
+
+    response_cache.get_or_fetch(KEY, 60, lambda: None)['labels'].append('changed')
+
+    assert response_cache.get_or_fetch(KEY, 60, lambda: None) == {'labels': []}
+
+
+def test_least_recently_used_entry_is_evicted(response_cache):
+    for name in ('a', 'b', 'c'):
+        response_cache.get_or_fetch((name, ()), 60, lambda: name)
+    response_cache.get_or_fetch(('a', ()), 60, lambda: 'refetched')
+
+    response_cache.get_or_fetch(('d', ()), 60, lambda: 'd')
+
+    assert response_cache.get_or_fetch(('a', ()), 60, lambda: 'refetched') == 'a'
+    assert response_cache.get_or_fetch(('b', ()), 60, lambda: 'refetched') == 'refetched'
+
+
+# ===== Single flight =====
+
+def test_concurrent_misses_share_one_fetch(response_cache):
+    release = threading.Event()
+    fetches = []
+    results = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(timeout=2)
+        return {'status': 'Enabled'}
+
+    threads = [
+        threading.Thread(target=lambda: results.append(response_cache.get_or_fetch(KEY, 60, fetch)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: response_cache.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetches) == 1
+    assert results == [{'status': 'Enabled'}] * 5
+
+
+def test_failed_fetch_raises_for_every_waiter_and_is_not_cached(response_cache):
+    release = threading.Event()
+    errors = []
+
+    def fetch():
+        release.wait(timeout=2)
+        raise RuntimeError('upstream down')
+
+    def call():
+        try:
+            response_cache.get_or_fetch(KEY, 60, fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: response_cache.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3
+    assert response_cache.get_or_fetch(KEY, 60, lambda: 'recovered') == 'recovered'
+
+
+# ===== Invalidation =====
+
+def test_invalidate_drops_matching_entries(response_cache):
+    response_cache.get_or_fetch(('a', ()), 60, lambda: 'a')
+    response_cache.get_or_fetch(('b', ()), 60, lambda: 'b')
+
+    assert response_cache.invalidate(lambda key: key[0] == 'a') == 1
+
+    assert response_cache.get_or_fetch(('a', ()), 60, lambda: 'new') == 'new'
+    assert response_cache.get_or_fetch(('b', ()), 60, lambda: 'new') == 'b'
+
+
+def test_response_racing_an_invalidation_is_not_cached(response_cache):
+    def fetch():
+        # A mutation lands while the read is in flight
+        response_cache.clear()
+        return 'before mutation'
+
+    assert response_cache.get_or_fetch(KEY, 60, fetch) == 'before mutation'
+    assert response_cache.get_or_fetch(KEY, 60, lambda: 'after mutation') == 'after mutation'
+
+
+def test_invalidate_sim_drops_only_that_sims_endpoints(response_cache):
+    for endpoint in ('/v1/sims/123', '/v1/sims/123/quota/data', '/v1/sims/1234'):
+        response_cache.get_or_fetch((endpoint, ()), 60, lambda: endpoint)
+
+    assert response_cache.invalidate_sim('123') == 2
+
+    assert response_cache.get_or_fetch(('/v1/sims/1234', ()), 60, lambda: 'new') == '/v1/sims/1234'
@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from src.api import client as client_module
+from src.api.client import OnceAPIClient
+from src.api.metrics import APIMetrics
+from src.api.resilience import CircuitBreaker
+
+
+class FakeResponse:
+    """The parts of requests.Response that get_sims_page reads"""
+
+    def __init__(self, sims, total_pages=None):
+        self._sims = sims
+        self.text = json.dumps(sims) if sims else ''
+        self.headers = {'X-Total-Pages': str(total_pages)} if total_pages is not None else {}
+
+    def json(self):
+        return self._sims
+
+
+def _client(pages, total_pages=None, on_request=None):
+    """Client serving `pages` (1-based) of /v1/sims without any HTTP"""
+    client = OnceAPIClient.__new__(OnceAPIClient)
+    client.requested = []
+
+    def send(method, endpoint, params=None, **kwargs):
+        page = params['page']
+        client.requested.append(page)
+        if on_request:
+            on_request(page)
+        sims = pages[page - 1] if page <= len(pages) else []
+        return FakeResponse(sims, total_pages)
+
+    client._send = send
+    return client
+
+
+def _sims(*ids):
+    return [{'iccid': str(i)} for i in ids]
+
+
+# ===== iter_sim_pages =====
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_total_pages_header_ends_iteration(prefetch):
+    client = _client([_sims(1, 2), _sims(3, 4), _sims(5, 6)], total_pages=3)
+
+    pages = list(client.iter_sim_pages(page_size=2, prefetch=prefetch))
+
+    assert pages == [_sims(1, 2), _sims(3, 4), _sims(5, 6)]
+    assert client.requested == [1, 2, 3]
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_short_page_ends_iteration_without_header(prefetch):
+    client = _client([_sims(1, 2), _sims(3)])
+
+    pages = list(client.iter_sim_pages(page_size=2, prefetch=prefetch))
+
+    assert pages == [_sims(1, 2), _sims(3)]
+    assert client.requested == [1, 2]
+
+
+def test_empty_last_page_is_not_yielded():
+    client = _client([_sims(1, 2), []])
+
+    assert list(client.iter_sim_pages(page_size=2)) == [_sims(1, 2)]
+    assert client.requested == [1, 2]
+
+
+def test_iteration_can_start_at_a_later_page():
+    client = _client([_sims(1, 2), _sims(3, 4), _sims(5)])
+
+    assert list(client.iter_sim_pages(page_size=2, start_page=2)) == [_sims(3, 4), _sims(5)]
+    assert client.requested == [2, 3]
+
+
+def _page_two_fetched_while_page_one_is_processed(prefetch: bool) -> bool:
+    page_two = threading.Event()
+    client = _client(
+        [_sims(1, 2), _sims(3)],
+        on_request=lambda page: page == 2 and page_two.set()
+    )
+
+    pages = client.iter_sim_pages(page_size=2, prefetch=prefetch)
+    next(pages)
+    fetched = page_two.wait(timeout=0.5 if prefetch else 0.1)
+    pages.close()
+    return fetched
+
+
+def test_prefetch_downloads_the_next_page_in_the_background():
+    assert _page_two_fetched_while_page_one_is_processed(prefetch=True)
+
+
+def test_without_prefetch_pages_are_fetched_on_demand():
+    assert not _page_two_fetched_while_page_one_is_processed(prefetch=False)
+
+
+def test_iter_sims_flattens_pages():
+    client = _client([_sims(1, 2), _sims(3)])
+
+    assert [sim['iccid'] for sim in client.iter_sims(page_size=2)] == ['1', '2', '3']
+
+
+# ===== _send =====
+
+class SlotCountingLimiter:
+    """Rate limiter stand-in that tracks how many slots are held"""
+
+    def __init__(self):
+        self.held = 0
+
+    def acquire(self):
+        self.held += 1
+
+    def release(self):
+        self.held -= 1
+
+    def record_success(self):
+        pass
+
+
+def test_transport_error_backs_off_after_releasing_the_slot(monkeypatch):
+    client = OnceAPIClient.__new__(OnceAPIClient)
+    client.base_url = 'https://api.example'
+    client.auth_manager = SimpleNamespace(get_auth_headers=lambda: {})
+    client.rate_limiter = SlotCountingLimiter()
+    client.circuit_breaker = CircuitBreaker(failure_threshold=10, reset_timeout=30.0)
+    client.metrics = APIMetrics()
+    outcomes = [requests.exceptions.ConnectionError('reset'), None]
+
+    def request(method, url, **kwargs):
+        error = outcomes.pop(0)
+        if error:
+            raise error
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b''
+        response.request = requests.Request('GET', url).prepare()
+        return response
+
+    client.session = SimpleNamespace(request=request)
+    held_while_sleeping = []
+    monkeypatch.setattr(client_module, 'time', SimpleNamespace(
+        perf_counter=time.perf_counter,
+        sleep=lambda seconds: held_while_sleeping.append(client.rate_limiter.held)
+    ))
+
+    assert client._send('GET', '/v1/sims').status_code == 200
+    assert held_while_sleeping == [0]
+    assert client.rate_limiter.held == 0
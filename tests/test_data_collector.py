@@ -0,0 +1,413 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.config import config
+from src.database.models import DataCollectionLog, SIMCard
+from src.services import data_collector
+from src.services.data_collector import DataCollector, sim_payload_hash
+
+
+# ===== sim_payload_hash =====
+
+SIM_ROW = {
+    'iccid': '8988228066612345678',
+    'status': 'Enabled',
+    'label': 'device-1',
+    'activation_date': datetime(2024, 1, 2, 3, 4, 5),
+    'current_quota_mb': 512.0,
+}
+
+
+def test_payload_hash_is_stable_sha256():
+    digest = sim_payload_hash(SIM_ROW)
+
+    assert len(digest) == 64
+    assert digest == sim_payload_hash(dict(reversed(list(SIM_ROW.items()))))
+
+
+def test_payload_hash_ignores_bookkeeping_columns():
+    row = {
+        **SIM_ROW,
+        'created_at': datetime(2020, 1, 1),
+        'updated_at': datetime.utcnow(),
+        'last_synced_at': datetime.utcnow(),
+        'payload_hash': 'abc',
+    }
+
+    assert sim_payload_hash(row) == sim_payload_hash(SIM_ROW)
+
+
+def test_payload_hash_normalizes_timezones():
+    aware = datetime(2024, 1, 2, 5, 4, 5, tzinfo=timezone(timedelta(hours=2)))
+
+    assert sim_payload_hash({**SIM_ROW, 'activation_date': aware}) == sim_payload_hash(SIM_ROW)
+
+
+def test_payload_hash_changes_with_api_columns():
+    assert sim_payload_hash({**SIM_ROW, 'label': 'device-2'}) != sim_payload_hash(SIM_ROW)
+    assert sim_payload_hash({**SIM_ROW, 'current_quota_mb': None}) != sim_payload_hash(SIM_ROW)
+
+
+# ===== Usage batches =====
+
+@pytest.fixture
+def collector(monkeypatch):
+    monkeypatch.setattr(config, 'USAGE_WORKER_BATCH_SIZE', 2)
+    # Batching needs no API client
+    return DataCollector.__new__(DataCollector)
+
+
+def test_usage_batches_split_each_range(collector):
+    sims = [(sim_id, f"iccid-{sim_id}") for sim_id in range(1, 6)]
+    plan = {
+        ('2024-01-01', '2024-01-03'): sims,
+        ('2024-01-02', '2024-01-03'): sims[:1],
+    }
+
+    batches = collector.usage_batches(plan)
+
+    assert [(key, len(batch_sims)) for key, _, _, batch_sims in batches] == [
+        ('2024-01-01:2024-01-03:0', 2),
+        ('2024-01-01:2024-01-03:1', 2),
+        ('2024-01-01:2024-01-03:2', 1),
+        ('2024-01-02:2024-01-03:0', 1),
+    ]
+    assert batches[3][1:3] == ('2024-01-02', '2024-01-03')
+
+
+def test_backfill_batches_cover_every_chunk_and_window(collector):
+    sims = [(1, 'a'), (2, 'b'), (3, 'c'), (5, 'e')]
+
+    batches = collector.backfill_batches('2024-01-01', '2024-01-05', sims, chunk_days=2)
+
+    assert [(key, start, end, [sim_id for sim_id, _ in window]) for key, start, end, window in batches] == [
+        ('2024-01-01:0', '2024-01-01', '2024-01-02', [1]),
+        ('2024-01-01:1', '2024-01-01', '2024-01-02', [2, 3]),
+        ('2024-01-01:2', '2024-01-01', '2024-01-02', [5]),
+        ('2024-01-03:0', '2024-01-03', '2024-01-04', [1]),
+        ('2024-01-03:1', '2024-01-03', '2024-01-04', [2, 3]),
+        ('2024-01-03:2', '2024-01-03', '2024-01-04', [5]),
+        ('2024-01-05:0', '2024-01-05', '2024-01-05', [1]),
+        ('2024-01-05:1', '2024-01-05', '2024-01-05', [2, 3]),
+        ('2024-01-05:2', '2024-01-05', '2024-01-05', [5]),
+    ]
+
+
+def test_backfill_batch_keys_survive_fleet_changes(collector):
+    """Checkpointed keys must still name the same SIMs after SIMs are added or removed"""
+    before = collector.backfill_batches('2024-01-01', '2024-01-02', [(1, 'a'), (2, 'b'), (3, 'c')], 2)
+    after = collector.backfill_batches('2024-01-01', '2024-01-02', [(2, 'b'), (3, 'c'), (4, 'd')], 2)
+
+    assert {key: window for key, _, _, window in before}['2024-01-01:1'] == [(2, 'b'), (3, 'c')]
+    assert {key: window for key, _, _, window in after}['2024-01-01:1'] == [(2, 'b'), (3, 'c')]
+
+
+# ===== Full sync checkpoints =====
+
+class PagedClient:
+    """API client serving fixed SIM pages, optionally failing before one of them"""
+
+    auth_manager = SimpleNamespace(token_wait_seconds=0.0)
+
+    def __init__(self, pages, fail_at_page=None):
+        self.pages = pages
+        self.fail_at_page = fail_at_page
+        self.start_pages = []
+
+    def iter_sim_pages(self, page_size=None, start_page=1):
+        self.start_pages.append(start_page)
+        for number in range(start_page, len(self.pages) + 1):
+            if number == self.fail_at_page:
+                raise ConnectionError(f"page {number} unavailable")
+            yield self.pages[number - 1]
+
+    def get_sims_page(self, page, page_size):
+        return self.pages[page - 1], len(self.pages)
+
+
+@pytest.fixture
+def logs_db(monkeypatch):
+    engine = create_engine(
+        'sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False}
+    )
+    DataCollectionLog.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+
+    @contextmanager
+    def test_db():
+        with Session() as db:
+            yield db
+
+    monkeypatch.setattr(data_collector, 'get_db', test_db)
+    return Session
+
+
+def _sync_collector(client):
+    collector = DataCollector.__new__(DataCollector)
+    collector.api_client = client
+    synced = []
+
+    def sync_page(db, api_sims):
+        synced.extend(sim['iccid'] for sim in api_sims)
+        return {
+            'processed': len(api_sims),
+            'errors': [],
+            'created': [sim['iccid'] for sim in api_sims],
+            'changed': {},
+            'unchanged': 0,
+        }
+
+    collector._sync_sim_page = sync_page
+    collector.synced = synced
+    return collector
+
+
+PAGES = [[{'iccid': f"{page}-{i}"} for i in range(2)] for page in range(1, 4)]
+
+
+def _logs(Session):
+    with Session() as db:
+        return db.query(DataCollectionLog).order_by(DataCollectionLog.id).all()
+
+
+def test_sync_checkpoints_every_page(logs_db):
+    collector = _sync_collector(PagedClient(PAGES))
+
+    result = collector.sync_all_sims()
+
+    assert result['processed'] == 6
+    [log] = _logs(logs_db)
+    assert log.status == 'success'
+    assert log.checkpoint['page'] == 3
+    assert log.checkpoint['last_iccid'] == '3-1'
+
+
+def test_resume_continues_after_the_last_checkpoint(logs_db):
+    with pytest.raises(ConnectionError):
+        _sync_collector(PagedClient(PAGES, fail_at_page=3)).sync_all_sims()
+    [failed] = _logs(logs_db)
+    assert (failed.status, failed.checkpoint['page']) == ('failed', 2)
+
+    client = PagedClient(PAGES)
+    collector = _sync_collector(client)
+    result = collector.sync_all_sims(resume=True)
+
+    assert client.start_pages == [3]
+    assert collector.synced == ['3-0', '3-1']
+    assert (result['processed'], result['resumed_from_page']) == (6, 2)
+    [log] = _logs(logs_db)
+    assert (log.id, log.status, log.sims_processed) == (failed.id, 'success', 6)
+
+
+def test_resume_starts_over_after_a_completed_sync(logs_db):
+    _sync_collector(PagedClient(PAGES)).sync_all_sims()
+
+    client = PagedClient(PAGES)
+    _sync_collector(client).sync_all_sims(resume=True)
+
+    assert client.start_pages == [1]
+    assert len(_logs(logs_db)) == 2
+
+
+def test_resume_refuses_to_run_next_to_a_live_sync(logs_db):
+    with logs_db() as db:
+        db.add(DataCollectionLog(
+            collection_type='full_sync',
+            started_at=datetime.utcnow(),
+            status='running',
+            checkpoint={'page': 1, 'updated_at': datetime.utcnow().isoformat()}
+        ))
+        db.commit()
+
+    with pytest.raises(RuntimeError, match='still running'):
+        _sync_collector(PagedClient(PAGES)).sync_all_sims(resume=True)
+
+
+def test_resume_starts_over_when_pages_shifted(logs_db):
+    with pytest.raises(ConnectionError):
+        _sync_collector(PagedClient(PAGES, fail_at_page=3)).sync_all_sims()
+
+    # A SIM was added at the front, so page 2 now ends one SIM earlier
+    shifted = [{'iccid': '0-0'}] + [sim for page in PAGES for sim in page]
+    client = PagedClient([shifted[i:i + 2] for i in range(0, len(shifted), 2)])
+    _sync_collector(client).sync_all_sims(resume=True)
+
+    assert client.start_pages == [1]
+    assert [(log.status, log.sims_processed) for log in _logs(logs_db)] == [('failed', 4), ('success', 7)]
+
+
+def test_resume_starts_over_after_an_old_interruption(logs_db, monkeypatch):
+    with pytest.raises(ConnectionError):
+        _sync_collector(PagedClient(PAGES, fail_at_page=3)).sync_all_sims()
+    monkeypatch.setattr(config, 'FULL_SYNC_RESUME_HOURS', 0)
+
+    client = PagedClient(PAGES)
+    _sync_collector(client).sync_all_sims(resume=True)
+
+    assert client.start_pages == [1]
+    assert len(_logs(logs_db)) == 2
+
+
+def test_abandoned_running_sync_is_closed(logs_db, monkeypatch):
+    stale = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    with logs_db() as db:
+        db.add(DataCollectionLog(
+            collection_type='full_sync',
+            started_at=datetime.utcnow() - timedelta(days=1),
+            status='running',
+            checkpoint={'page': 1, 'page_size': 2, 'last_iccid': '1-1', 'updated_at': stale}
+        ))
+        db.commit()
+
+    _sync_collector(PagedClient(PAGES)).sync_all_sims(resume=True)
+
+    abandoned, log = _logs(logs_db)
+    assert abandoned.status == 'failed'
+    assert abandoned.completed_at is not None
+    assert log.status == 'success'
+
+
+# ===== Fleet-wide polls =====
+
+class BatchClient:
+    """API client answering batch calls from canned per-ICCID results"""
+
+    auth_manager = SimpleNamespace(token_wait_seconds=0.0)
+    circuit_breaker = SimpleNamespace(state='closed')
+
+    def __init__(self, results):
+        self.results = results
+
+    def iter_batch(self, method, iccids, latencies=None, **kwargs):
+        for iccid in iccids:
+            yield iccid, self.results[iccid]
+
+
+def _batch_collector(results):
+    collector = DataCollector.__new__(DataCollector)
+    collector.api_client = BatchClient(results)
+    return collector
+
+
+CONNECTIVITY = {
+    'a': {'cid': 1},
+    'b': {'error': 'timeout'},
+    'c': {},
+    'd': {'cid': 2},
+    'e': {'cid': 3},
+}
+SIMS = [(sim_id, iccid) for sim_id, iccid in enumerate(CONNECTIVITY, start=1)]
+
+
+@pytest.fixture
+def recorded_connectivity(monkeypatch):
+    monkeypatch.setattr(config, 'CONNECTIVITY_WRITE_BATCH_SIZE', 2)
+    batches = []
+
+    def record_connectivity(db, observations):
+        batches.append([observation['sim_card_id'] for observation in observations])
+        return len(observations), 0
+
+    monkeypatch.setattr(data_collector, 'record_connectivity', record_connectivity)
+    monkeypatch.setattr(
+        DataCollector, '_connectivity_observation',
+        lambda self, sim_id, data: {'sim_card_id': sim_id} if data else None
+    )
+    return batches
+
+
+def test_connectivity_is_written_in_batches_and_logged(logs_db, recorded_connectivity):
+    result = _batch_collector(CONNECTIVITY).collect_fleet_connectivity(SIMS)
+
+    assert recorded_connectivity == [[1, 4], [5]]
+    assert (result['processed'], result['errors'], result['transitions'], result['no_location']) == (4, 1, 3, 1)
+    [log] = _logs(logs_db)
+    assert (log.collection_type, log.status, log.sims_processed, log.rows_inserted) == ('connectivity', 'partial', 4, 3)
+    assert log.details == {'no_location': 1}
+
+
+def test_failed_connectivity_run_is_logged_as_failed(logs_db, recorded_connectivity, monkeypatch):
+    def record_connectivity(db, observations):
+        raise RuntimeError("database gone")
+
+    monkeypatch.setattr(data_collector, 'record_connectivity', record_connectivity)
+
+    with pytest.raises(RuntimeError):
+        _batch_collector(CONNECTIVITY).collect_fleet_connectivity(SIMS)
+
+    [log] = _logs(logs_db)
+    assert log.status == 'failed'
+    assert log.completed_at is not None
+
+
+def test_connectivity_task_fails_when_every_sim_failed(logs_db, recorded_connectivity):
+    collector = _batch_collector({'b': {'error': 'timeout'}})
+
+    with pytest.raises(RuntimeError, match='failed for all 1 SIMs'):
+        collector.run_connectivity_task({'sims': [[2, 'b']]})
+
+
+def test_events_advance_cursors_and_keep_truncated_backlogs(logs_db, monkeypatch):
+    SIMCard.__table__.create(logs_db.kw['bind'])
+    with logs_db() as db:
+        db.add_all([SIMCard(id=1, iccid='a'), SIMCard(id=2, iccid='b'), SIMCard(id=3, iccid='c')])
+        db.commit()
+    written = {'events': [], 'cursors': []}
+    monkeypatch.setattr(
+        data_collector, 'insert_sim_events',
+        lambda db, rows: written['events'].extend(row['event_key'] for row in rows) or len(rows)
+    )
+    monkeypatch.setattr(
+        data_collector, 'advance_event_cursors',
+        lambda db, cursors: written['cursors'].extend(cursors)
+    )
+
+    def events(*ids):
+        return [{'id': i, 'timestamp': f"2024-01-0{i}T00:00:00Z"} for i in ids]
+
+    collector = _batch_collector({
+        'a': {'events': events(1, 2), 'truncated': False},
+        'b': {'events': events(3), 'truncated': True, 'next_page': 4},
+        'c': {'events': [], 'truncated': False},
+    })
+
+    result = collector.collect_events([(1, 'a'), (2, 'b'), (3, 'c')])
+
+    assert (result['processed'], result['fetched'], result['inserted'], result['truncated']) == (3, 3, 3, 1)
+    assert written['events'] == ['1', '2', '3']
+    assert written['cursors'] == [
+        {'sim_id': 1, 'cursor': datetime(2024, 1, 2), 'backlog_page': None, 'backlog_cursor': None},
+        {'sim_id': 2, 'cursor': None, 'backlog_page': 4, 'backlog_cursor': datetime(2024, 1, 3)},
+    ]
+    [log] = _logs(logs_db)
+    assert (log.collection_type, log.status, log.details) == ('events', 'success', {'fetched': 3, 'truncated': 1})
+
+
+def test_quotas_are_recorded_in_batches(logs_db, monkeypatch):
+    monkeypatch.setattr(config, 'QUOTA_WRITE_BATCH_SIZE', 2)
+    batches = []
+
+    def record_quota_snapshots(db, snapshots):
+        batches.append([(row['sim_card_id'], row['quota_type']) for row in snapshots])
+        return len(snapshots) - 1, 1
+
+    monkeypatch.setattr(data_collector, 'record_quota_snapshots', record_quota_snapshots)
+    quota = {'volume': 10.0, 'total_volume': 100.0, 'quota_status': {'id': 0}}
+    collector = _batch_collector({
+        'a': {'data': quota, 'sms': quota},
+        'b': {'error': 'timeout'},
+        'c': {'data': quota, 'sms': None},
+    })
+
+    result = collector.collect_quotas([(1, 'a'), (2, 'b'), (3, 'c')])
+
+    assert batches == [[(1, 'data'), (1, 'sms')], [(3, 'data')]]
+    assert (result['processed'], result['errors'], result['recorded'], result['unchanged']) == (2, 1, 1, 2)
+    [log] = _logs(logs_db)
+    assert (log.collection_type, log.status, log.rows_inserted, log.details) == ('quota', 'partial', 1, {'unchanged': 2})
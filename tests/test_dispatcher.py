@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+
+from src.config import config
+from src.services import dispatcher
+from src.services.dispatcher import Dispatcher
+
+
+class FakeQueue:
+    """Queue that accepts tasks whose dedupe key is not already taken"""
+
+    def __init__(self, in_flight=()):
+        self.in_flight = set(in_flight)
+        self.tasks = []
+
+    def enqueue(self, task_type, payload=None, dedupe_key=None, max_attempts=None):
+        ids = self.enqueue_many([{'task_type': task_type, 'payload': payload, 'dedupe_key': dedupe_key}])
+        return ids[0] if ids else None
+
+    def enqueue_many(self, tasks):
+        ids = []
+        for task in tasks:
+            if task['dedupe_key'] in self.in_flight:
+                continue
+            self.in_flight.add(task['dedupe_key'])
+            self.tasks.append(task)
+            ids.append(str(len(self.tasks)))
+        return ids
+
+
+class FakeCollector:
+    plan = {}
+    due_only = None
+
+    def plan_usage_collection(self, days_back=1, incremental=True, due_only=False):
+        FakeCollector.due_only = due_only
+        return self.plan, 3, date(2024, 1, 4)
+
+
+@pytest.fixture
+def make_dispatcher(monkeypatch):
+    monkeypatch.setattr(config, 'USAGE_WORKER_BATCH_SIZE', 10)
+    monkeypatch.setattr(dispatcher, 'DataCollector', FakeCollector)
+    return lambda queue: Dispatcher(queue)
+
+
+def test_usage_is_split_into_sim_id_windows(make_dispatcher):
+    queue = FakeQueue()
+    FakeCollector.plan = {
+        ('2024-01-01', '2024-01-05'): [(3, 'c'), (12, 'l')],
+        ('2024-01-04', '2024-01-05'): [(5, 'e'), (25, 'y')],
+    }
+
+    result = make_dispatcher(queue).dispatch_usage(mode='copy')
+
+    assert result == {'tasks': 3, 'queued': 3, 'in_flight': 0, 'sims': 4, 'skipped': 3}
+    assert [(task['dedupe_key'], task['payload']['sims']) for task in queue.tasks] == [
+        ('usage:0', [[3, 'c', '2024-01-01', '2024-01-05'], [5, 'e', '2024-01-04', '2024-01-05']]),
+        ('usage:1', [[12, 'l', '2024-01-01', '2024-01-05']]),
+        ('usage:2', [[25, 'y', '2024-01-04', '2024-01-05']]),
+    ]
+    assert {task['payload']['mode'] for task in queue.tasks} == {'copy'}
+    assert {task['payload']['finalized_through'] for task in queue.tasks} == {'2024-01-04'}
+
+
+def test_windows_in_flight_are_skipped(make_dispatcher):
+    queue = FakeQueue(in_flight={'usage:1'})
+    FakeCollector.plan = {('2024-01-01', '2024-01-05'): [(3, 'c'), (12, 'l')]}
+
+    result = make_dispatcher(queue).dispatch_usage()
+
+    assert (result['queued'], result['in_flight']) == (1, 1)
+    assert [task['dedupe_key'] for task in queue.tasks] == ['usage:0']
+
+
+def test_full_sync_is_queued_once(make_dispatcher):
+    queue = FakeQueue()
+    sync = make_dispatcher(queue)
+
+    assert sync.dispatch_full_sync() is not None
+    assert sync.dispatch_full_sync() is None
+
+
+def test_due_sims_schedule_their_next_poll(make_dispatcher):
+    queue = FakeQueue(in_flight={'usage:0'})
+    FakeCollector.plan = {('2024-01-01', '2024-01-05'): [(3, 'c'), (12, 'l')]}
+
+    result = make_dispatcher(queue).dispatch_usage(due_only=True)
+
+    assert FakeCollector.due_only is True
+    assert (result['queued'], result['in_flight']) == (1, 1)
+    assert [(task['dedupe_key'], task['payload']['schedule_polls']) for task in queue.tasks] == [
+        ('usage:1', True)
+    ]
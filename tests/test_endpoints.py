@@ -0,0 +1,16 @@
+import pytest
+
+from src.api.endpoints import endpoint_template
+
+
+@pytest.mark.parametrize('endpoint, template', [
+    ('/v1/sims/8988228066612345678', '/v1/sims/{iccid}'),
+    ('/v1/sims/8988228066612345678/usage', '/v1/sims/{iccid}/usage'),
+    ('/v1/sims/89882280666123456789/quota/data', '/v1/sims/{iccid}/quota/data'),
+    ('/v1/sims/8988228066612345678/events?page=2&pageSize=100', '/v1/sims/{iccid}/events'),
+    ('/v1/sims?page=1', '/v1/sims'),
+    ('/v1/sims/123/usage', '/v1/sims/123/usage'),
+    ('/oauth/token', '/oauth/token'),
+])
+def test_endpoint_template(endpoint, template):
+    assert endpoint_template(endpoint) == template
@@ -0,0 +1,265 @@
+"""
+Integration tests for src/database/ingest.py
+
+These run against a scratch PostgreSQL database given in TEST_DATABASE_URL
+(TimescaleDB is not required); every test runs in a transaction that is
+rolled back afterwards.
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.database.connection import SCHEMA_UPGRADES
+from src.database.ingest import (
+    USAGE_STAGING_TABLE, advance_event_cursors, advance_usage_watermarks, copy_usage_records,
+    insert_sim_events, record_connectivity, record_quota_snapshots, set_sim_payload_hashes,
+    upsert_sim_cards, upsert_usage_records
+)
+from src.database.models import (
+    Base, ConnectivityInterval, QuotaSnapshot, SIMCard, SIMEvent, SIMLocation, UsageRecord
+)
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a scratch PostgreSQL database"
+)
+
+ICCID = '8988228066600000001'
+DAY_1 = datetime(2024, 1, 1)
+DAY_2 = datetime(2024, 1, 2)
+DAY_3 = datetime(2024, 1, 3)
+
+
+@pytest.fixture(scope='module')
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode='create_savepoint')
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def sim_id(db):
+    upsert_sim_cards(db, [{'iccid': ICCID, 'status': 'Enabled'}])
+    return db.query(SIMCard.id).filter(SIMCard.iccid == ICCID).scalar()
+
+
+def _sim(db) -> SIMCard:
+    db.expire_all()
+    return db.query(SIMCard).filter(SIMCard.iccid == ICCID).one()
+
+
+def _freeze_updated_at(db) -> datetime:
+    frozen = datetime(2020, 1, 1)
+    db.execute(SIMCard.__table__.update().values(updated_at=frozen))
+    return frozen
+
+
+# ===== SIM cards =====
+
+def test_upsert_sim_cards_skips_unchanged_payloads(db):
+    row = {
+        'iccid': ICCID, 'status': 'Enabled', 'label': 'a',
+        'activation_date': DAY_1, 'payload_hash': 'hash-1',
+    }
+
+    assert upsert_sim_cards(db, [row]) == 1
+    assert upsert_sim_cards(db, [row]) == 0
+
+    assert upsert_sim_cards(db, [{**row, 'label': 'b', 'activation_date': None, 'payload_hash': 'hash-2'}]) == 1
+    sim = _sim(db)
+    assert sim.label == 'b'
+    assert sim.activation_date == DAY_1  # Kept when the API omits it
+    assert sim.payload_hash == 'hash-2'
+
+
+def test_set_sim_payload_hashes_keeps_updated_at(db, sim_id):
+    frozen = _freeze_updated_at(db)
+
+    set_sim_payload_hashes(db, [{'iccid': ICCID, 'payload_hash': 'hash-1'}])
+
+    sim = _sim(db)
+    assert sim.payload_hash == 'hash-1'
+    assert sim.updated_at == frozen
+
+
+# ===== Usage =====
+
+def _usage(sim_id, day, mb):
+    return {
+        'sim_card_id': sim_id, 'date': day,
+        'data_volume_mb': mb, 'data_volume_rx_mb': mb / 2, 'data_volume_tx_mb': mb / 2,
+        'sms_volume': 1, 'sms_volume_mo': 1, 'sms_volume_mt': 0,
+    }
+
+
+def _volumes(db, sim_id):
+    db.expire_all()
+    return {
+        row.date: row.data_volume_mb
+        for row in db.query(UsageRecord).filter(UsageRecord.sim_card_id == sim_id)
+    }
+
+
+def test_upsert_usage_records_counts_inserts_and_real_updates(db, sim_id):
+    rows = [_usage(sim_id, DAY_1, 1.0), _usage(sim_id, DAY_2, 2.0)]
+
+    assert upsert_usage_records(db, rows) == (2, 0)
+    assert upsert_usage_records(db, rows) == (0, 0)
+    assert upsert_usage_records(db, [
+        _usage(sim_id, DAY_1, 1.0), _usage(sim_id, DAY_2, 3.0), _usage(sim_id, DAY_2, 4.0)
+    ]) == (0, 1)
+    assert _volumes(db, sim_id) == {DAY_1: 1.0, DAY_2: 4.0}
+
+
+def test_copy_usage_records_merges_through_staging(db, sim_id, monkeypatch):
+    monkeypatch.setattr(config, 'USAGE_COPY_BATCH_SIZE', 2)
+    rows = [_usage(sim_id, DAY_1, 1.0), _usage(sim_id, DAY_2, 2.0), _usage(sim_id, DAY_3, 3.0)]
+
+    assert copy_usage_records(db, iter(rows)) == (3, 0)
+    assert copy_usage_records(db, rows) == (0, 0)
+    assert copy_usage_records(db, [_usage(sim_id, DAY_3, 5.0), _usage(sim_id, DAY_3, 6.0)]) == (0, 1)
+    assert _volumes(db, sim_id) == {DAY_1: 1.0, DAY_2: 2.0, DAY_3: 6.0}
+    assert db.execute(text(f"SELECT count(*) FROM {USAGE_STAGING_TABLE}")).scalar() == 0
+
+
+def test_advance_usage_watermarks_never_moves_back(db, sim_id):
+    frozen = _freeze_updated_at(db)
+
+    advance_usage_watermarks(db, [{'sim_id': sim_id, 'through': DAY_2, 'last_usage': DAY_1}])
+    advance_usage_watermarks(db, [{'sim_id': sim_id, 'through': DAY_1, 'last_usage': None}])
+
+    sim = _sim(db)
+    assert sim.usage_collected_through == DAY_2
+    assert sim.last_usage_at == DAY_1
+    assert sim.updated_at == frozen
+
+
+# ===== Connectivity =====
+
+def _observation(sim_id, cid, observed_at):
+    return {
+        'sim_card_id': sim_id, 'mcc': '262', 'mnc': '01', 'lac': 100, 'cid': cid,
+        'age_of_location_minutes': 0, 'observed_at': observed_at,
+    }
+
+
+def test_record_connectivity_folds_observations_into_intervals(db, sim_id):
+    assert record_connectivity(db, [_observation(sim_id, 1, DAY_1)]) == (1, 0)
+    assert record_connectivity(db, [_observation(sim_id, 1, DAY_2)]) == (0, 1)
+
+    db.expire_all()
+    interval = db.query(ConnectivityInterval).filter(ConnectivityInterval.sim_card_id == sim_id).one()
+    assert (interval.first_seen_at, interval.last_seen_at, interval.samples) == (DAY_1, DAY_2, 2)
+
+    assert record_connectivity(db, [_observation(sim_id, 2, DAY_3)]) == (1, 0)
+
+    db.expire_all()
+    location = db.query(SIMLocation).filter(SIMLocation.sim_card_id == sim_id).one()
+    assert db.query(ConnectivityInterval).filter(ConnectivityInterval.sim_card_id == sim_id).count() == 2
+    assert (location.cid, location.first_seen_at, location.last_seen_at) == (2, DAY_3, DAY_3)
+    assert location.interval_id != interval.id
+
+
+# ===== Events =====
+
+def _event(sim_id, key, occurred_at):
+    return {
+        'sim_card_id': sim_id, 'event_key': key, 'event_type': 'attach',
+        'event_description': 'Attached', 'event_data': {'id': key}, 'occurred_at': occurred_at,
+    }
+
+
+def test_insert_sim_events_skips_stored_events(db, sim_id):
+    rows = [_event(sim_id, 'a', DAY_1), _event(sim_id, 'b', DAY_2), _event(sim_id, 'b', DAY_2)]
+
+    assert insert_sim_events(db, rows) == 2
+    assert insert_sim_events(db, rows + [_event(sim_id, 'c', DAY_3)]) == 1
+    assert db.query(SIMEvent).filter(SIMEvent.sim_card_id == sim_id).count() == 3
+
+
+def test_advance_event_cursors_keeps_cursor_and_stores_backlog(db, sim_id):
+    frozen = _freeze_updated_at(db)
+
+    advance_event_cursors(db, [{'sim_id': sim_id, 'cursor': DAY_2, 'backlog_page': None, 'backlog_cursor': None}])
+    advance_event_cursors(db, [{'sim_id': sim_id, 'cursor': DAY_1, 'backlog_page': None, 'backlog_cursor': None}])
+    advance_event_cursors(db, [{'sim_id': sim_id, 'cursor': None, 'backlog_page': 3, 'backlog_cursor': DAY_3}])
+
+    sim = _sim(db)
+    assert sim.events_cursor_at == DAY_2
+    assert (sim.events_backlog_page, sim.events_backlog_cursor) == (3, DAY_3)
+    assert sim.updated_at == frozen
+
+
+# ===== Quota =====
+
+def _snapshot(sim_id, recorded_at, volume, status_id=0):
+    return {
+        'sim_card_id': sim_id, 'quota_type': 'data', 'recorded_at': recorded_at,
+        'volume': volume, 'total_volume': 500.0, 'quota_status_id': status_id,
+        'threshold_date': None, 'exceeded_date': None, 'expiry_date': None,
+    }
+
+
+def test_record_quota_snapshots_stores_changes_only(db, sim_id):
+    set_sim_payload_hashes(db, [{'iccid': ICCID, 'payload_hash': 'hash-1'}])
+
+    assert record_quota_snapshots(db, [_snapshot(sim_id, DAY_1, 400.0)]) == (1, 0)
+    assert record_quota_snapshots(db, [_snapshot(sim_id, DAY_2, 400.0)]) == (0, 1)
+    assert record_quota_snapshots(db, [_snapshot(sim_id, DAY_3, 80.0, status_id=1)]) == (1, 0)
+
+    sim = _sim(db)
+    assert db.query(QuotaSnapshot).filter(QuotaSnapshot.sim_card_id == sim_id).count() == 2
+    assert (sim.current_quota_mb, sim.quota_status_id) == (80.0, 1)
+    assert sim.payload_hash is None  # The next sync rewrites the row
+
+
+def test_quota_snapshots_of_many_sims_in_one_call(db, sim_id):
+    upsert_sim_cards(db, [{'iccid': '8988228066600000002', 'status': 'Enabled'}])
+    other_id = db.query(SIMCard.id).filter(SIMCard.iccid == '8988228066600000002').scalar()
+    record_quota_snapshots(db, [_snapshot(sim_id, DAY_1, 400.0)])
+
+    assert record_quota_snapshots(db, [
+        _snapshot(sim_id, DAY_2, 400.0),
+        _snapshot(other_id, DAY_2, 400.0),
+        {**_snapshot(other_id, DAY_2, 90.0), 'quota_type': 'sms'},
+    ]) == (2, 1)
+
+
+def test_record_quota_snapshots_mirrors_date_only_changes(db, sim_id):
+    record_quota_snapshots(db, [_snapshot(sim_id, DAY_1, 400.0)])
+    set_sim_payload_hashes(db, [{'iccid': ICCID, 'payload_hash': 'hash-1'}])
+
+    assert record_quota_snapshots(db, [{**_snapshot(sim_id, DAY_2, 400.0), 'threshold_date': DAY_2}]) == (1, 0)
+
+    sim = _sim(db)
+    assert sim.quota_threshold_date == DAY_2
+    assert sim.payload_hash is None
+
+
+def test_record_quota_snapshots_only_searches_the_lookback(db, sim_id, monkeypatch):
+    monkeypatch.setattr(config, 'QUOTA_SNAPSHOT_LOOKBACK_DAYS', 1)
+    record_quota_snapshots(db, [_snapshot(sim_id, DAY_1, 400.0)])
+
+    assert record_quota_snapshots(db, [_snapshot(sim_id, DAY_2, 400.0)]) == (0, 1)
+    assert record_quota_snapshots(db, [_snapshot(sim_id, DAY_3, 400.0)]) == (1, 0)
@@ -0,0 +1,137 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.database.models import SIMCard
+from src.services.poll_scheduler import PollScheduler
+
+TODAY = date(2024, 6, 15)
+
+
+def _sim(**columns):
+    return SimpleNamespace(**{
+        'status': 'Enabled',
+        'quota_status_id': None,
+        'quota_sms_status_id': None,
+        'last_usage_at': None,
+        **columns,
+    })
+
+
+# ===== classify =====
+
+@pytest.mark.parametrize('sim, velocity, tier', [
+    (_sim(status='Disabled', quota_status_id=2), 500.0, 'dormant'),
+    (_sim(quota_status_id=1), 0.0, 'hot'),
+    (_sim(quota_sms_status_id=2), 0.0, 'hot'),
+    (_sim(), config.POLL_HOT_MB_PER_DAY, 'hot'),
+    (_sim(last_usage_at=datetime(2024, 6, 14)), 1.0, 'active'),
+    (_sim(last_usage_at=datetime.combine(TODAY - timedelta(days=config.USAGE_IDLE_DAYS), datetime.min.time())), 0.0, 'active'),
+    (_sim(last_usage_at=datetime.combine(TODAY - timedelta(days=config.USAGE_IDLE_DAYS + 1), datetime.min.time())), 0.0, 'idle'),
+    (_sim(), 0.0, 'idle'),
+])
+def test_classify(sim, velocity, tier):
+    assert PollScheduler().classify(sim, velocity, TODAY) == tier
+
+
+def test_tick_budget_is_the_hourly_share_of_a_tick():
+    scheduler = PollScheduler(tick_minutes=5)
+
+    assert scheduler.tick_budget(1200) == 100
+    assert scheduler.tick_budget(1) == 1
+
+
+# ===== stretch_factor and budgets =====
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    SIMCard.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _add_sims(db, count, status='Enabled', poll_priority=None):
+    offset = db.query(SIMCard).count()
+    db.add_all([
+        SIMCard(iccid=f"{offset + i:019d}", status=status, poll_priority=poll_priority)
+        for i in range(count)
+    ])
+    db.flush()
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = PollScheduler(budget_per_hour=1000)
+    scheduler.intervals = {
+        'hot': timedelta(minutes=10),
+        'active': timedelta(minutes=60),
+        'idle': timedelta(hours=6),
+        'dormant': timedelta(hours=24),
+    }
+    return scheduler
+
+
+def test_stretch_factor_is_one_when_demand_fits(db, scheduler):
+    _add_sims(db, 10, poll_priority='hot')  # 60 calls/hour
+    _add_sims(db, 40, poll_priority='active')  # 40 calls/hour
+
+    assert scheduler.stretch_factor(db, budget_per_hour=200) == 1.0
+
+
+def test_stretch_factor_scales_intervals_to_the_budget(db, scheduler):
+    _add_sims(db, 10, poll_priority='hot')  # 60 calls/hour
+    _add_sims(db, 40, poll_priority='active')  # 40 calls/hour
+    _add_sims(db, 24, poll_priority='dormant', status='Disabled')  # 1 call/hour
+
+    assert scheduler.stretch_factor(db, budget_per_hour=50.5) == pytest.approx(2.0)
+
+
+def test_unclassified_sims_count_as_active(db, scheduler):
+    _add_sims(db, 100)
+
+    assert scheduler.stretch_factor(db, budget_per_hour=50) == pytest.approx(2.0)
+
+
+def test_background_polls_come_off_the_usage_budget(db, scheduler, monkeypatch):
+    monkeypatch.setattr(config, 'BACKGROUND_BUDGET_SHARE', 0.5)
+    _add_sims(db, 100)
+    _add_sims(db, 50, status='Disabled')
+
+    background = scheduler.background_demand(100)
+
+    assert scheduler.background_slots(100) == 1
+    assert scheduler.usage_budget(db) == pytest.approx(1000 - background)
+
+
+def test_background_polls_are_sliced_to_their_budget_share(db, scheduler, monkeypatch):
+    monkeypatch.setattr(config, 'BACKGROUND_BUDGET_SHARE', 0.5)
+    enabled = 2000
+    _add_sims(db, enabled)
+
+    slots = scheduler.background_slots(enabled)
+
+    assert slots > 1
+    assert scheduler.background_demand(enabled) / slots <= 500
+    assert scheduler.usage_budget(db) >= 500
+
+
+def test_background_slices_cover_every_enabled_sim_once(db, scheduler, monkeypatch):
+    monkeypatch.setattr(config, 'BACKGROUND_BUDGET_SHARE', 0.5)
+    _add_sims(db, 2000)
+    _add_sims(db, 10, status='Disabled')
+    slots = scheduler.background_slots(2000)
+    interval = timedelta(minutes=config.CONNECTIVITY_INTERVAL_MINUTES)
+    start = datetime(2024, 6, 15)
+
+    covered = [
+        sim_id
+        for run in range(slots)
+        for sim_id, _ in scheduler.background_sims(db, 'connectivity', start + run * interval)
+    ]
+
+    assert sorted(covered) == [sim.id for sim in db.query(SIMCard).filter(SIMCard.status == 'Enabled')]
@@ -0,0 +1,48 @@
+from src.utils.profiling import PhaseTimer, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(100, 0, -1)]
+
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile(values, 0.0) == 1.0
+
+
+def test_percentile_of_few_values():
+    assert percentile([], 0.95) is None
+    assert percentile([3.0], 0.5) == 3.0
+    assert percentile([1.0, 2.0], 0.5) == 1.0
+    assert percentile([1.0, 2.0], 0.51) == 2.0
+
+
+def test_timer_sums_phases_and_summarises_latencies():
+    timer = PhaseTimer()
+    timer.add('db_write', 1.5)
+    timer.add('db_write', 0.25)
+    timer.record_latencies([0.1, 0.2, 0.3])
+
+    summary = timer.summary()
+
+    assert summary['db_write_seconds'] == 1.75
+    assert summary['commit_seconds'] == 0.0
+    assert (summary['latency_p50_ms'], summary['latency_max_ms']) == (200.0, 300.0)
+
+
+def test_timed_closes_the_source_when_the_caller_stops():
+    closed = []
+
+    def source():
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    timer = PhaseTimer()
+    for item in timer.timed(source()):
+        if item == 2:
+            break
+
+    assert closed == [True]
+    assert timer.summary()['latency_p50_ms'] is None
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from src.api import rate_limiter
+from src.api.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    return AdaptiveRateLimiter(
+        rate=10.0, min_rate=1.0, max_rate=20.0, max_concurrency=8, decrease_cooldown=2.0
+    )
+
+
+def test_throttle_halves_rate_and_concurrency(limiter):
+    limiter.record_throttle(retry_after=5.0)
+
+    snapshot = limiter.snapshot()
+    assert limiter.rate == 5.0
+    assert snapshot['concurrency_limit'] == 4
+    assert snapshot['backing_off']
+    assert snapshot['throttle_count'] == 1
+
+
+def test_throttle_blocks_until_retry_after(limiter, clock):
+    limiter.record_throttle(retry_after=5.0)
+
+    assert limiter._try_acquire() == pytest.approx(5.0)
+    clock.advance(4.0)
+    assert limiter._try_acquire() == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert limiter._try_acquire() == 0.0
+
+
+def test_throttles_within_cooldown_decrease_once(limiter, clock):
+    limiter.record_throttle()
+    clock.advance(1.0)
+    limiter.record_throttle()
+
+    assert limiter.rate == 5.0
+    assert limiter.snapshot()['throttle_count'] == 2
+
+    clock.advance(2.0)
+    limiter.record_throttle()
+
+    assert limiter.rate == 2.5
+
+
+def test_rate_never_drops_below_minimum(limiter, clock):
+    for _ in range(10):
+        limiter.record_throttle()
+        clock.advance(10.0)
+
+    assert limiter.rate == 1.0
+    assert limiter.snapshot()['concurrency_limit'] == 1
+
+
+def test_successes_recover_rate_additively_up_to_maximum(limiter, clock):
+    limiter.record_throttle()
+    throttled = limiter.rate
+
+    limiter.record_success()
+    assert limiter.rate == pytest.approx(throttled + 1.0 / throttled)
+
+    for _ in range(1000):
+        limiter.record_success()
+    assert limiter.rate == 20.0
+    assert limiter.snapshot()['concurrency_limit'] == 8
+
+
+def test_concurrency_limit_holds_back_requests(limiter):
+    for _ in range(8):
+        limiter._tokens = 1.0
+        assert limiter._try_acquire() == 0.0
+
+    limiter._tokens = 1.0
+    assert limiter._try_acquire() > 0
+
+    limiter.release()
+    assert limiter._try_acquire() == 0.0
+
+
+def test_cap_lowers_ceiling_and_current_rate(limiter):
+    limiter.cap(4.0)
+
+    assert limiter.max_rate == 4.0
+    assert limiter.rate == 4.0
+
+
+def test_cap_below_the_floor_is_honoured(limiter):
+    limiter.cap(0.25)
+    limiter.record_throttle(retry_after=None)
+
+    assert limiter.max_rate == 0.25
+    assert limiter.rate <= 0.25
+
+
+def test_cap_must_be_positive(limiter):
+    with pytest.raises(ValueError):
+        limiter.cap(0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 60
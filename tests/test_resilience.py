@@ -0,0 +1,237 @@
+import pytest
+
+from src.api import resilience
+from src.api.metrics import APIMetrics
+from src.api.resilience import (
+    GATEWAY_STATUS_CODES, RETRYABLE_STATUS_CODES, CircuitBreaker, CircuitOpenError,
+    RequestRetry, RetryPolicy, get_retry_policy
+)
+from src.config import config
+
+
+# ===== RetryPolicy =====
+
+def test_delay_stays_within_exponential_ceiling():
+    policy = RetryPolicy(max_attempts=10, base_delay=0.5, max_delay=4.0)
+
+    for attempt, ceiling in ((1, 0.5), (2, 1.0), (3, 2.0), (4, 4.0), (5, 4.0), (9, 4.0)):
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+
+
+def test_delay_uses_full_jitter(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resilience.random, 'uniform', lambda low, high: calls.append((low, high)) or high)
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=30.0)
+
+    assert policy.delay(3) == 4.0
+    assert calls == [(0, 4.0)]
+
+
+def test_should_retry_respects_attempts_and_statuses():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.1, max_delay=1.0)
+
+    assert policy.should_retry_status(503, attempt=1)
+    assert not policy.should_retry_status(503, attempt=3)
+    assert not policy.should_retry_status(404, attempt=1)
+    assert policy.should_retry_error(timed_out=True, attempt=2)
+    assert not policy.should_retry_error(timed_out=False, attempt=3)
+
+
+def test_reads_retry_on_server_errors_and_timeouts():
+    policy = get_retry_policy('get', '/v1/sims/8988228066612345678/usage')
+
+    assert policy.max_attempts == config.API_RETRY_MAX_ATTEMPTS
+    assert policy.retry_statuses == RETRYABLE_STATUS_CODES
+    assert policy.retry_on_timeout
+
+
+def test_mutations_only_retry_when_the_request_never_arrived():
+    policy = get_retry_policy('PUT', '/v1/sims/8988228066612345678')
+
+    assert policy.retry_statuses == GATEWAY_STATUS_CODES
+    assert not policy.should_retry_status(500, attempt=1)
+    assert not policy.should_retry_error(timed_out=True, attempt=1)
+    assert policy.should_retry_error(timed_out=False, attempt=1)
+
+
+def test_attempts_can_be_overridden_per_endpoint(monkeypatch):
+    monkeypatch.setattr(config, 'API_RETRY_ENDPOINT_ATTEMPTS', {'GET /v1/sims/{iccid}/usage': 7})
+
+    assert get_retry_policy('GET', '/v1/sims/8988228066612345678/usage?page=2').max_attempts == 7
+    assert get_retry_policy('GET', '/v1/sims/8988228066612345678').max_attempts == config.API_RETRY_MAX_ATTEMPTS
+    assert get_retry_policy('POST', '/v1/sims/8988228066612345678/usage').max_attempts == config.API_RETRY_MAX_ATTEMPTS
+
+
+# ===== CircuitBreaker =====
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    monkeypatch.setattr(resilience, 'time', clock)
+    return CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+
+
+def test_breaker_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        assert breaker.before_request() is None
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+
+    breaker.record_failure()
+
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == 'closed'
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_half_open_lets_a_single_trial_through(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+
+    trial = breaker.before_request()
+
+    assert breaker.state == 'half_open'
+    assert trial == breaker.open_count
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_successful_trial_closes_the_circuit(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+    breaker.before_request()
+
+    breaker.record_success()
+
+    assert breaker.state == 'closed'
+    assert breaker.before_request() is None
+
+
+def test_failed_trial_reopens_the_circuit(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+    breaker.before_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == 'open'
+    assert breaker.open_count == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_released_trial_lets_the_next_call_try(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+    trial = breaker.before_request()
+
+    breaker.release_trial(trial)
+
+    assert breaker.before_request() == trial
+
+
+def test_stale_trial_release_is_ignored(breaker, clock):
+    _open(breaker)
+    clock.advance(30)
+    stale = breaker.before_request()
+    breaker.record_failure()
+    clock.advance(30)
+    trial = breaker.before_request()
+
+    breaker.release_trial(stale)
+
+    assert trial != stale
+    assert breaker.trial_in_flight
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+# ===== RequestRetry =====
+
+class RecordingLimiter:
+    """Rate limiter stand-in recording the outcomes it is told about"""
+
+    def __init__(self):
+        self.outcomes = []
+
+    def record_success(self):
+        self.outcomes.append('success')
+
+    def record_throttle(self, retry_after):
+        self.outcomes.append(('throttle', retry_after))
+
+
+@pytest.fixture
+def retry(monkeypatch):
+    monkeypatch.setattr(config, 'API_RETRY_MAX_ATTEMPTS', 3)
+    monkeypatch.setattr(config, 'API_THROTTLE_MAX_RETRIES', 2)
+    monkeypatch.setattr(config, 'API_RETRY_ENDPOINT_ATTEMPTS', {})
+
+    def make_retry(method='GET'):
+        return RequestRetry(
+            method, '/v1/sims/8988228066612345678/usage',
+            CircuitBreaker(failure_threshold=10, reset_timeout=30.0), RecordingLimiter(), APIMetrics()
+        )
+
+    return make_retry
+
+
+def test_transport_errors_back_off_until_attempts_run_out(retry):
+    request = retry()
+
+    delays = []
+    for _ in range(3):
+        request.start_attempt()
+        delays.append(request.transport_error(TimeoutError(), timed_out=True))
+
+    assert all(delay is not None for delay in delays[:2])
+    assert delays[2] is None
+    assert request.circuit_breaker.consecutive_failures == 3
+    assert request.metrics.snapshot()['GET /v1/sims/{iccid}/usage']['retries'] == 2
+
+
+def test_mutation_timeouts_are_not_retried(retry):
+    request = retry('PUT')
+    request.start_attempt()
+
+    assert request.transport_error(TimeoutError(), timed_out=True) is None
+
+
+def test_server_errors_retry_and_successes_are_final(retry):
+    request = retry()
+    request.start_attempt()
+
+    assert request.response(503) is not None
+    assert request.response(404) is None
+    assert request.response(200) is None
+    assert request.circuit_breaker.consecutive_failures == 0
+    assert request.rate_limiter.outcomes == ['success', 'success']
+
+
+def test_throttling_retries_without_using_up_attempts(retry):
+    request = retry()
+    request.start_attempt()
+
+    assert request.response(429, '5') == 0.0
+    assert request.attempt == 0
+    request.start_attempt()
+    assert request.response(429) == 0.0
+    request.start_attempt()
+    assert request.response(429) is None
+    assert request.rate_limiter.outcomes == [('throttle', 5.0), ('throttle', None), ('throttle', None)]
+    assert request.circuit_breaker.consecutive_failures == 0
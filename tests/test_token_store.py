@@ -0,0 +1,121 @@
+import stat
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import redis
+
+from src.api import auth_manager
+from src.api.auth_manager import OnceAuthManager, get_auth_manager
+from src.config import config
+from src.api.token_store import FileTokenStore, RedisTokenStore
+
+EXPIRES_AT = datetime(2030, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def file_store(tmp_path):
+    return FileTokenStore(tmp_path / 'token.json')
+
+
+@pytest.fixture
+def redis_store(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis, 'from_url', classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server))
+    )
+    return RedisTokenStore('redis://localhost:6379/0', 'onence:token:test')
+
+
+@pytest.fixture(params=['file', 'redis'])
+def store(request):
+    return request.getfixturevalue(f'{request.param}_store')
+
+
+# ===== Shared stores =====
+
+def test_saved_token_round_trips(store):
+    assert store.load() is None
+
+    store.save('token-1', EXPIRES_AT)
+
+    assert store.load() == ('token-1', EXPIRES_AT)
+
+
+def test_clear_only_drops_the_given_token(store):
+    store.save('token-2', EXPIRES_AT)
+
+    store.clear('token-1')
+    assert store.load() == ('token-2', EXPIRES_AT)
+
+    store.clear('token-2')
+    assert store.load() is None
+
+
+def test_file_store_is_private_and_tolerates_corruption(file_store):
+    file_store.save('token-1', EXPIRES_AT)
+
+    assert stat.S_IMODE(file_store.path.stat().st_mode) == 0o600
+
+    file_store.path.write_text('{not json')
+    assert file_store.load() is None
+
+
+def test_redis_token_expires_with_the_token(redis_store):
+    expires_at = datetime.now() + timedelta(minutes=10)
+
+    redis_store.save('token-1', expires_at)
+
+    assert 590 <= redis_store._redis.ttl(redis_store.key) <= 600
+
+
+def test_redis_refresh_lock_is_held_in_redis(redis_store):
+    with redis_store.refresh_lock():
+        assert redis_store._redis.exists(f"{redis_store.key}:lock")
+
+    assert not redis_store._redis.exists(f"{redis_store.key}:lock")
+
+
+# ===== OnceAuthManager =====
+
+def _manager(store, tokens):
+    manager = OnceAuthManager('user', 'secret', 'http://api.invalid', token_store=store)
+    manager._obtain_token = lambda: {'access_token': tokens.pop(0), 'expires_in': 3600}
+    return manager
+
+
+def test_processes_share_one_token(store):
+    tokens = ['token-1', 'token-2']
+    first = _manager(store, tokens)
+    second = _manager(store, tokens)
+
+    assert first.get_token() == 'token-1'
+    assert second.get_token() == 'token-1'
+    assert tokens == ['token-2']
+
+
+def test_token_rejected_in_two_processes_is_refreshed_once(store):
+    tokens = ['token-1', 'token-2', 'token-3']
+    first = _manager(store, tokens)
+    second = _manager(store, tokens)
+    first.get_token()
+    second.get_token()
+
+    first.invalidate_token()
+    assert first.get_token() == 'token-2'
+
+    # A 401 for the old token must not drop the one the other process fetched
+    second.invalidate_token()
+    assert second.get_token() == 'token-2'
+    assert tokens == ['token-3']
+
+
+def test_shared_manager_does_not_refresh_in_the_background(monkeypatch):
+    started = []
+    monkeypatch.setattr(config, 'TOKEN_STORE_BACKEND', 'memory')
+    monkeypatch.setattr(auth_manager, '_auth_manager', None)
+    monkeypatch.setattr(OnceAuthManager, 'start_background_refresh', lambda self: started.append(self))
+
+    # Only worker processes start the thread, see AUTH_BACKGROUND_REFRESH
+    assert get_auth_manager() is get_auth_manager()
+    assert started == []
@@ -0,0 +1,372 @@
+"""
+Tests for src/services/work_queue.py
+
+The Redis queue tests run against fakeredis; the Postgres queue tests run
+against a scratch PostgreSQL database given in TEST_DATABASE_URL and are
+skipped without one.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import redis
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.database.models import Base, CollectionTask
+from src.services import work_queue
+from src.services.work_queue import PostgresWorkQueue, QueuedTask, RedisWorkQueue, TaskConsumer
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="set TEST_DATABASE_URL to a scratch PostgreSQL database"
+)
+
+
+class RecordingQueue:
+    """In-memory stand-in for a work queue that records what the consumer reports"""
+
+    worker_id = 'test-worker'
+    lease = timedelta(seconds=30)
+
+    def __init__(self, tasks=()):
+        self.tasks = list(tasks)
+        self.completed = []
+        self.failed = []
+
+    def claim(self, limit=1):
+        claimed, self.tasks = self.tasks[:limit], self.tasks[limit:]
+        return claimed
+
+    def requeue_expired(self):
+        return 0
+
+    def extend_lease(self, task):
+        return True
+
+    def complete(self, task):
+        self.completed.append(task.id)
+        return True
+
+    def fail(self, task, error):
+        self.failed.append((task.id, error))
+        return True
+
+
+def _task(task_id='1', task_type='usage', payload=None):
+    return QueuedTask(
+        id=task_id, task_type=task_type, payload=payload or {}, attempts=1, max_attempts=3
+    )
+
+
+# ===== TaskConsumer =====
+
+def test_execute_completes_successful_tasks():
+    queue = RecordingQueue()
+    payloads = []
+
+    TaskConsumer(queue, {'usage': payloads.append}).execute(_task(payload={'sims': [1]}))
+
+    assert payloads == [{'sims': [1]}]
+    assert queue.completed == ['1']
+    assert queue.failed == []
+
+
+def test_execute_fails_tasks_whose_handler_raises():
+    queue = RecordingQueue()
+
+    def handler(payload):
+        raise RuntimeError("API down")
+
+    TaskConsumer(queue, {'usage': handler}).execute(_task())
+
+    assert queue.completed == []
+    assert queue.failed == [('1', 'API down')]
+
+
+def test_execute_fails_tasks_without_handler():
+    queue = RecordingQueue()
+
+    TaskConsumer(queue, {}).execute(_task(task_type='unknown'))
+
+    assert queue.failed == [('1', 'No handler for task type unknown')]
+
+
+def test_run_processes_tasks_until_stopped():
+    queue = RecordingQueue([_task('1'), _task('2')])
+    stop = threading.Event()
+
+    def handler(payload):
+        if not queue.tasks:
+            stop.set()
+
+    TaskConsumer(queue, {'usage': handler}, poll_interval=0.01).run(stop)
+
+    assert queue.completed == ['1', '2']
+
+
+def test_run_keeps_going_when_reporting_an_outcome_fails():
+    queue = RecordingQueue([_task('1'), _task('2')])
+    stop = threading.Event()
+    complete = queue.complete
+
+    def flaky_complete(task):
+        if task.id == '1':
+            raise ConnectionError("queue unavailable")
+        return complete(task)
+
+    def handler(payload):
+        if not queue.tasks:
+            stop.set()
+
+    queue.complete = flaky_complete
+    TaskConsumer(queue, {'usage': handler}, poll_interval=0.01).run(stop)
+
+    assert queue.completed == ['2']
+
+
+# ===== RedisWorkQueue =====
+
+@pytest.fixture
+def redis_queue(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis, 'from_url',
+        classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs))
+    )
+
+    def make_queue(worker_id='worker-a', lease_seconds=60):
+        return RedisWorkQueue('redis://test', worker_id=worker_id, lease_seconds=lease_seconds)
+
+    return make_queue
+
+
+def test_redis_claim_leases_due_tasks_once(redis_queue):
+    queue_a, queue_b = redis_queue('worker-a'), redis_queue('worker-b')
+    task_id = queue_a.enqueue('usage', {'sims': [[1, 'a']]})
+
+    claimed = queue_a.claim()
+
+    assert [(task.id, task.task_type, task.payload, task.attempts) for task in claimed] == [
+        (task_id, 'usage', {'sims': [[1, 'a']]}, 1)
+    ]
+    assert queue_b.claim() == []
+    assert queue_b.complete(claimed[0]) is False
+    assert queue_a.complete(claimed[0]) is True
+    assert queue_a.stats() == {'pending': 0, 'running': 0, 'done': 1, 'failed': 0}
+
+
+def test_redis_claims_in_due_order_up_to_limit(redis_queue):
+    queue = redis_queue()
+    ids = queue.enqueue_many([{'task_type': 'usage', 'payload': {'n': n}} for n in range(3)])
+
+    assert [task.id for task in queue.claim(limit=2)] == ids[:2]
+    assert [task.id for task in queue.claim(limit=2)] == ids[2:]
+
+
+def test_redis_dedupe_key_allows_one_active_task(redis_queue):
+    queue = redis_queue()
+
+    first = queue.enqueue('usage', dedupe_key='usage:0')
+    assert queue.enqueue('usage', dedupe_key='usage:0') is None
+    assert len(queue.enqueue_many([
+        {'task_type': 'usage', 'dedupe_key': 'usage:0'},
+        {'task_type': 'usage', 'dedupe_key': 'usage:1'},
+    ])) == 1
+
+    # Still deduplicated while running
+    task = next(task for task in queue.claim(limit=2) if task.id == first)
+    assert queue.enqueue('usage', dedupe_key='usage:0') is None
+
+    queue.complete(task)
+    assert queue.enqueue('usage', dedupe_key='usage:0') is not None
+
+
+def test_redis_expired_leases_return_to_the_queue(redis_queue):
+    queue_a, queue_b = redis_queue('worker-a', lease_seconds=0.05), redis_queue('worker-b')
+    queue_a.enqueue('usage', dedupe_key='usage:0')
+    lost = queue_a.claim()[0]
+
+    assert queue_b.requeue_expired() == 0
+    time.sleep(0.1)
+    assert queue_b.requeue_expired() == 1
+
+    retried = queue_b.claim()
+    assert [(task.id, task.attempts) for task in retried] == [(lost.id, 2)]
+    assert queue_a.complete(lost) is False
+    assert queue_b.enqueue('usage', dedupe_key='usage:0') is None
+
+
+def test_redis_expired_lease_on_last_attempt_fails_the_task(redis_queue):
+    queue = redis_queue(lease_seconds=0.05)
+    queue.enqueue('usage', dedupe_key='usage:0', max_attempts=1)
+    queue.claim()
+    time.sleep(0.1)
+
+    assert queue.requeue_expired() == 1
+    assert queue.stats() == {'pending': 0, 'running': 0, 'done': 0, 'failed': 1}
+    assert queue.enqueue('usage', dedupe_key='usage:0') is not None
+
+
+def test_redis_extend_lease_keeps_the_task(redis_queue):
+    queue = redis_queue(lease_seconds=0.2)
+    queue.enqueue('usage')
+    task = queue.claim()[0]
+
+    time.sleep(0.1)
+    assert queue.extend_lease(task) is True
+    time.sleep(0.15)
+
+    assert queue.requeue_expired() == 0
+    assert queue.complete(task) is True
+
+
+def test_redis_failed_tasks_back_off_then_give_up(redis_queue, monkeypatch):
+    monkeypatch.setattr(config, 'TASK_RETRY_BASE_SECONDS', 0.05)
+    queue = redis_queue()
+    queue.enqueue('usage', max_attempts=2)
+
+    assert queue.fail(queue.claim()[0], 'boom') is True
+    assert queue.claim() == []
+    time.sleep(0.1)
+
+    retried = queue.claim()
+    assert [task.attempts for task in retried] == [2]
+    assert queue.fail(retried[0], 'boom again') is True
+    assert queue.stats() == {'pending': 0, 'running': 0, 'done': 0, 'failed': 1}
+
+
+def test_redis_purge_drops_finished_tasks(redis_queue):
+    queue = redis_queue()
+    queue.enqueue('usage')
+    queue.enqueue('usage')
+    queue.complete(queue.claim()[0])
+
+    assert queue.purge_finished(older_than_days=1) == 0
+    assert queue.purge_finished(older_than_days=0) == 1
+    assert queue.stats() == {'pending': 1, 'running': 0, 'done': 0, 'failed': 0}
+
+
+# ===== PostgresWorkQueue =====
+
+@pytest.fixture(scope='module')
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_queue(engine, monkeypatch):
+    @contextmanager
+    def test_db():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr(work_queue, 'get_db', test_db)
+    with engine.begin() as conn:
+        conn.execute(CollectionTask.__table__.delete())
+
+    def make_queue(worker_id='worker-a', lease_seconds=60):
+        return PostgresWorkQueue(worker_id=worker_id, lease_seconds=lease_seconds)
+
+    return make_queue
+
+
+def _expire_leases(engine):
+    with engine.begin() as conn:
+        conn.execute(update(CollectionTask.__table__).values(lease_expires_at=datetime(2000, 1, 1)))
+
+
+def _task_row(engine, task_id):
+    table = CollectionTask.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(table).where(table.c.id == int(task_id))).one()
+
+
+@requires_postgres
+def test_claim_leases_due_tasks_once(pg_queue):
+    queue_a, queue_b = pg_queue('worker-a'), pg_queue('worker-b')
+    task_id = queue_a.enqueue('usage', {'sims': [[1, 'a']]})
+
+    claimed = queue_a.claim()
+
+    assert [(task.id, task.payload, task.attempts) for task in claimed] == [
+        (task_id, {'sims': [[1, 'a']]}, 1)
+    ]
+    assert queue_b.claim() == []
+    assert queue_b.complete(claimed[0]) is False
+    assert queue_a.complete(claimed[0]) is True
+    assert queue_a.stats() == {'done': 1}
+
+
+@requires_postgres
+def test_dedupe_key_allows_one_active_task(pg_queue):
+    queue = pg_queue()
+
+    first = queue.enqueue('usage', dedupe_key='usage:2024-01-01')
+    assert queue.enqueue('usage', dedupe_key='usage:2024-01-01') is None
+    assert len(queue.enqueue_many([
+        {'task_type': 'usage', 'dedupe_key': 'usage:2024-01-01'},
+        {'task_type': 'usage', 'dedupe_key': 'usage:2024-01-02'},
+    ])) == 1
+
+    queue.complete(next(task for task in queue.claim(limit=5) if task.id == first))
+
+    assert queue.enqueue('usage', dedupe_key='usage:2024-01-01') is not None
+
+
+@requires_postgres
+def test_expired_leases_return_to_the_queue(pg_queue, engine):
+    queue_a, queue_b = pg_queue('worker-a'), pg_queue('worker-b')
+    queue_a.enqueue('usage')
+    lost = queue_a.claim()[0]
+    _expire_leases(engine)
+
+    assert queue_b.requeue_expired() == 1
+
+    retried = queue_b.claim()
+    assert [task.attempts for task in retried] == [2]
+    assert queue_a.complete(lost) is False
+    assert _task_row(engine, lost.id).last_error == 'Lease expired on worker worker-a'
+
+
+@requires_postgres
+def test_failed_tasks_back_off_then_give_up(pg_queue, engine):
+    queue = pg_queue()
+    task_id = queue.enqueue('usage', max_attempts=1)
+    queue.enqueue('usage', dedupe_key='retried', max_attempts=2)
+    tasks = {task.id: task for task in queue.claim(limit=2)}
+
+    for task in tasks.values():
+        assert queue.fail(task, 'boom')
+
+    given_up = _task_row(engine, task_id)
+    assert given_up.status == 'failed'
+    assert given_up.completed_at is not None
+    # The retry is scheduled in the future, so nothing is due yet
+    assert queue.claim() == []
+    assert queue.stats() == {'failed': 1, 'pending': 1}
+
+
+@requires_postgres
+def test_expired_lease_on_last_attempt_fails_the_task(pg_queue, engine):
+    queue = pg_queue()
+    task_id = queue.enqueue('usage', dedupe_key='usage:0', max_attempts=1)
+    queue.claim()
+    _expire_leases(engine)
+
+    assert queue.requeue_expired() == 1
+
+    row = _task_row(engine, task_id)
+    assert row.status == 'failed'
+    assert row.completed_at is not None
+    assert queue.enqueue('usage', dedupe_key='usage:0') is not None